@@ -0,0 +1,170 @@
+import argparse
+import json
+import os
+import sys
+import time
+from collections import Counter
+from concurrent.futures import ProcessPoolExecutor, as_completed
+import cv2
+import numpy as np
+from biomechanics.symmetry_analysis import SymmetryAnalyzer
+from utils.session_store import SESSION_EXTENSION, SessionReader
+
+VIDEO_EXTENSIONS = ('.mp4', '.mov', '.avi', '.mkv', '.webm')
+
+# One tracker per worker process, created by _init_worker (or the reason it could not be built)
+_tracker = None
+_init_error = None
+
+
+def _init_worker(options):
+    """
+    Build the per-process PoseTracker. Each worker owns one core, so native thread pools are pinned to 1.
+    """
+    global _tracker, _init_error
+    cv2.setNumThreads(1)
+    try:
+        from pose_estimation.pose_tracker import PoseTracker
+        _tracker = PoseTracker(depth_interval=options['depth_interval'], inference_backend=options['backend'],
+                               num_threads=1, enable_audio=False)
+    except Exception as e:
+        # An exception here would break the whole pool; report it with each video instead
+        _init_error = f"{type(e).__name__}: {e}"
+
+
+def find_videos(input_dir, extensions=VIDEO_EXTENSIONS):
+    """
+    List the video files of a directory, sorted by name.
+    """
+    return sorted(
+        os.path.join(input_dir, name) for name in os.listdir(input_dir)
+        if name.lower().endswith(extensions)
+    )
+
+
+def output_names(videos):
+    """
+    Names of the result files of each video: the file name without its extension, or the full file
+    name for videos that share it (squat.mp4 and squat.avi), so no video overwrites another's results.
+
+    Returns:
+        dict: Video path -> output name.
+    """
+    basenames = [os.path.basename(video) for video in videos]
+    stems = [os.path.splitext(basename)[0] for basename in basenames]
+    counts = Counter(stems)
+    names = [stem if counts[stem] == 1 else basename for stem, basename in zip(stems, basenames)]
+    if len(set(names)) < len(names):
+        # A full file name can still match another video's stem (squat.mp4.avi); file names are unique
+        names = basenames
+    return dict(zip(videos, names))
+
+
+def process_video(video_path, output_dir, exercise_type='all', name=None):
+    """
+    Run the analysis pipeline over every frame of a recorded video and write the results.
+
+    Per-frame landmarks, joint angles, center of mass, landmark velocities, rep count and activity are
+    recorded to a columnar session file <name>.session (see utils.session_store) and a session summary
+    is written to <name>.json in output_dir. The name defaults to the video file name without its extension.
+
+    Returns:
+        dict: The session summary.
+    """
+    tracker = _tracker
+    if tracker is None:
+        raise RuntimeError(f"the pose tracker could not be built ({_init_error})")
+    tracker.reset_session()
+    if exercise_type != tracker.exercise_type:
+        # Also selects the feedback rules; only on a change, since every worker processes the same exercise
+        tracker.update_exercise(exercise_type, None)
+
+    if name is None:
+        name = os.path.splitext(os.path.basename(video_path))[0]
+    session_path = os.path.join(output_dir, name + SESSION_EXTENSION)
+    capture = cv2.VideoCapture(video_path)
+    fps = capture.get(cv2.CAP_PROP_FPS) or 30.0
+    tracker.start_recording(session_path, metadata={'video': video_path, 'video_fps': fps})
+
+    start_time = time.perf_counter()
+    frame_index = 0
+    try:
+        while True:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            # Video time, so smoothing and velocities follow the recording rather than the processing speed
+            tracker.analyze_frame(frame, frame_index / fps)
+            frame_index += 1
+    finally:
+        capture.release()
+        tracker.stop_recording()
+    elapsed = time.perf_counter() - start_time
+
+    with SessionReader(session_path) as session:
+        joint_names = session.metadata['joint_names']
+        frames_with_pose = int(np.isfinite(session.read('landmarks')[:, 0, 0]).sum())
+        joint_angles = session.read('joint_angles')
+
+    mean_angles = {}
+    for i, joint in enumerate(joint_names):
+        visible = joint_angles[:, i][np.isfinite(joint_angles[:, i])]
+        mean_angles[joint] = float(visible.mean()) if visible.size else None
+    symmetry = SymmetryAnalyzer().analyze_symmetry({k: v for k, v in mean_angles.items() if v is not None})
+    summary = {
+        'video': video_path,
+        'session': session_path,
+        'frames': frame_index,
+        'frames_with_pose': frames_with_pose,
+        'video_fps': fps,
+        'processing_fps': frame_index / elapsed if elapsed > 0 else 0.0,
+        'realtime_factor': (frame_index / fps) / elapsed if elapsed > 0 else 0.0,
+        'rep_count': tracker.rep_count,
+        'mean_joint_angles': mean_angles,
+        'symmetry': symmetry,
+    }
+    with open(os.path.join(output_dir, f"{name}.json"), 'w') as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Score a directory of recorded workout videos without the GUI.")
+    parser.add_argument('input_dir', help="Directory containing the video files.")
+    parser.add_argument('output_dir', help="Directory the per-video results are written to.")
+    parser.add_argument('--workers', type=int, default=os.cpu_count() or 1,
+                        help="Worker processes (default: one per core).")
+    parser.add_argument('--exercise', default='all', help="Exercise type used for rep counting (squat or pushup).")
+    parser.add_argument('--backend', default='torch', choices=['torch', 'onnx'],
+                        help="Inference backend for the models.")
+    parser.add_argument('--depth-interval', type=int, default=None,
+                        help="Run depth estimation every N frames (disabled by default).")
+    args = parser.parse_args(argv)
+
+    videos = find_videos(args.input_dir)
+    if not videos:
+        print(f"No videos found in {args.input_dir}")
+        return 1
+    os.makedirs(args.output_dir, exist_ok=True)
+
+    options = {'depth_interval': args.depth_interval, 'backend': args.backend}
+    names = output_names(videos)
+    failures = 0
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=_init_worker, initargs=(options,)) as executor:
+        futures = {executor.submit(process_video, video, args.output_dir, args.exercise, names[video]): video
+                   for video in videos}
+        for done, future in enumerate(as_completed(futures), 1):
+            video = futures[future]
+            try:
+                summary = future.result()
+            except Exception as e:
+                failures += 1
+                print(f"[{done}/{len(videos)}] {video}: failed ({e})")
+                continue
+            print(f"[{done}/{len(videos)}] {video}: {summary['frames']} frames, "
+                  f"{summary['rep_count']} reps, {summary['realtime_factor']:.1f}x real time")
+    return 1 if failures else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,113 @@
+import cv2
+import numpy as np
+from pose_estimation.pose_frame import PoseFrame, NUM_LANDMARKS
+from pose_estimation.replay import ReplaySource
+
+# Normalized (x, y) of a standing, front-facing BlazePose skeleton
+STANDING_POSE = np.array([
+    (0.500, 0.150),                                      # nose
+    (0.490, 0.130), (0.480, 0.130), (0.470, 0.130),      # left eye inner, eye, outer
+    (0.510, 0.130), (0.520, 0.130), (0.530, 0.130),      # right eye inner, eye, outer
+    (0.460, 0.140), (0.540, 0.140),                      # ears
+    (0.490, 0.170), (0.510, 0.170),                      # mouth
+    (0.420, 0.250), (0.580, 0.250),                      # shoulders
+    (0.400, 0.370), (0.600, 0.370),                      # elbows
+    (0.390, 0.480), (0.610, 0.480),                      # wrists
+    (0.385, 0.500), (0.615, 0.500),                      # pinkies
+    (0.390, 0.510), (0.610, 0.510),                      # index fingers
+    (0.395, 0.500), (0.605, 0.500),                      # thumbs
+    (0.450, 0.520), (0.550, 0.520),                      # hips
+    (0.450, 0.700), (0.550, 0.700),                      # knees
+    (0.450, 0.880), (0.550, 0.880),                      # ankles
+    (0.445, 0.900), (0.555, 0.900),                      # heels
+    (0.440, 0.930), (0.560, 0.930),                      # foot indices
+], dtype=np.float32)
+
+# Limbs drawn into the synthetic frames
+SKELETON_EDGES = [(11, 12), (11, 13), (13, 15), (12, 14), (14, 16), (11, 23), (12, 24), (23, 24),
+                  (23, 25), (25, 27), (24, 26), (26, 28), (0, 11), (0, 12)]
+
+
+class Fixture:
+    """
+    Frames and landmark streams the stage benchmarks cycle through.
+    """
+    def __init__(self, name, frames, poses):
+        """
+        Args:
+            name (str): Fixture name, reported in the benchmark results.
+            frames (list): BGR frames.
+            poses (list): PoseFrames of the frames in which a pose was detected.
+        """
+        if not frames or not poses:
+            raise ValueError(f"Fixture {name} needs at least one frame and one pose")
+        self.name = name
+        self.frames = frames
+        self.poses = poses
+
+    def describe(self):
+        height, width = self.frames[0].shape[:2]
+        return {'name': self.name, 'frames': len(self.frames), 'poses': len(self.poses),
+                'resolution': [width, height]}
+
+
+def synthetic_poses(num_frames=300, fps=30.0, rep_period=2.0, jitter=0.004, seed=0):
+    """
+    Landmark stream of a person squatting, with measurement jitter and occasional occluded landmarks.
+    """
+    rng = np.random.default_rng(seed)
+    timestamps = np.arange(num_frames) / fps
+    depth = 0.5 - 0.5 * np.cos(2 * np.pi * timestamps / rep_period)  # 0 standing, 1 bottom of the squat
+
+    data = np.empty((num_frames, NUM_LANDMARKS, 4), dtype=np.float32)
+    data[:, :, :2] = STANDING_POSE
+    data[:, :25, 1] += 0.18 * depth[:, None]      # upper body and hips move down
+    data[:, 25:27, 0] += np.array([-0.06, 0.06]) * depth[:, None]  # knees move out
+    data[:, 25:27, 1] += 0.08 * depth[:, None]
+    data[:, :, :2] += rng.normal(0.0, jitter, (num_frames, NUM_LANDMARKS, 2))
+    data[:, :, 2] = rng.normal(0.0, 0.05, (num_frames, NUM_LANDMARKS))
+    data[:, :, 3] = np.where(rng.random((num_frames, NUM_LANDMARKS)) < 0.05, 0.2, 0.95)
+    return [PoseFrame(frame, timestamp) for frame, timestamp in zip(data, timestamps.tolist())]
+
+
+def render_pose(pose, width, height):
+    """
+    Draw a pose as a thick stick figure on a noisy background.
+    """
+    frame = np.random.default_rng(int(pose.timestamp * 1000)).integers(60, 120, (height, width, 3), dtype=np.uint8)
+    points = (pose.xy * (width, height)).astype(np.int32)
+    for a, b in SKELETON_EDGES:
+        cv2.line(frame, tuple(points[a].tolist()), tuple(points[b].tolist()), (200, 180, 160), max(2, width // 40))
+    cv2.circle(frame, tuple(points[0].tolist()), max(3, width // 25), (170, 190, 220), -1)
+    return frame
+
+
+def synthetic_fixture(num_frames=300, width=640, height=480, num_images=16, seed=0):
+    """
+    Synthetic fixture: a squatting landmark stream and stick-figure frames rendered from it.
+    Only `num_images` distinct frames are rendered and cycled, to keep the fixture small.
+    """
+    poses = synthetic_poses(num_frames, seed=seed)
+    step = max(1, num_frames // num_images)
+    frames = [render_pose(pose, width, height) for pose in poses[::step][:num_images]]
+    return Fixture('synthetic', frames, poses)
+
+
+def recorded_fixture(session_path, video_path=None, max_frames=300):
+    """
+    Fixture from a recorded session file and, optionally, the video it was recorded from.
+    Without a video, frames are rendered from the recorded landmarks.
+    """
+    poses = [pose for _, pose in ReplaySource(session_path, stop=max_frames) if pose is not None]
+    if video_path is not None:
+        frames = []
+        capture = cv2.VideoCapture(video_path)
+        while len(frames) < max_frames:
+            ok, frame = capture.read()
+            if not ok:
+                break
+            frames.append(frame)
+        capture.release()
+    else:
+        frames = [render_pose(pose, 640, 480) for pose in poses[:16]]
+    return Fixture('recorded', frames, poses)
@@ -0,0 +1,176 @@
+import argparse
+import json
+import os
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+import cv2
+import numpy as np
+from benchmarks.fixtures import recorded_fixture, synthetic_fixture
+from benchmarks.stages import STAGES, STAGE_NAMES
+
+# Relative p50 slowdown reported as a regression by --compare
+DEFAULT_REGRESSION_THRESHOLD = 0.10
+
+
+def time_stage(func, iterations=200, warmup=20, memory_iterations=50):
+    """
+    Time a stage callable.
+
+    Latency is measured without tracing; peak Python-side memory is measured in a separate
+    tracemalloc pass, so the tracing overhead does not distort the latency percentiles.
+
+    Returns:
+        dict: p50/p95/p99/mean latency (ms), throughput (fps) and peak traced memory (KiB).
+    """
+    for i in range(warmup):
+        func(i)
+
+    durations = np.empty(iterations)
+    for i in range(iterations):
+        start = time.perf_counter()
+        func(warmup + i)
+        durations[i] = time.perf_counter() - start
+    durations *= 1000.0
+
+    tracemalloc.start()
+    try:
+        for i in range(min(iterations, memory_iterations)):
+            func(i)
+        _, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+
+    p50, p95, p99 = np.percentile(durations, [50, 95, 99])
+    mean = float(durations.mean())
+    return {
+        'iterations': iterations,
+        'p50_ms': float(p50),
+        'p95_ms': float(p95),
+        'p99_ms': float(p99),
+        'mean_ms': mean,
+        'fps': 1000.0 / mean if mean > 0 else 0.0,
+        'peak_memory_kb': peak / 1024.0,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.check_output(['git', 'rev-parse', '--short', 'HEAD'], stderr=subprocess.DEVNULL,
+                                       cwd=os.path.dirname(os.path.abspath(__file__))).decode().strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def environment():
+    """
+    Machine and library versions, recorded with the results so runs are comparable.
+    """
+    return {
+        'commit': _git_commit(),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'processor': platform.processor() or platform.machine(),
+        'cpu_count': os.cpu_count(),
+        'numpy': np.__version__,
+        'opencv': cv2.__version__,
+    }
+
+
+def run_benchmarks(fixture, stage_names=None, iterations=200, warmup=20, options=None):
+    """
+    Benchmark the selected stages on a fixture.
+
+    Returns:
+        dict: Benchmark report (environment, fixture and per-stage results).
+    """
+    options = options or {}
+    results = {}
+    for name, setup in STAGES:
+        if stage_names and name not in stage_names:
+            continue
+        try:
+            func = setup(fixture, options)
+        except Exception as e:
+            results[name] = {'skipped': f"{type(e).__name__}: {e}"}
+            print(f"{name:<22} skipped ({type(e).__name__}: {e})")
+            continue
+        results[name] = time_stage(func, iterations, warmup)
+        r = results[name]
+        print(f"{name:<22} p50 {r['p50_ms']:8.3f} ms  p95 {r['p95_ms']:8.3f} ms  p99 {r['p99_ms']:8.3f} ms  "
+              f"{r['fps']:9.1f} fps  peak {r['peak_memory_kb']:9.1f} KiB")
+    return {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment(),
+        'fixture': fixture.describe(),
+        'options': options,
+        'stages': results,
+    }
+
+
+def compare_reports(baseline, current, threshold=DEFAULT_REGRESSION_THRESHOLD):
+    """
+    Compare the p50/p95 latencies of two reports.
+
+    Returns:
+        list: Names of the stages whose p50 latency regressed by more than `threshold`.
+    """
+    regressions = []
+    print(f"{'stage':<22} {'base p50':>10} {'p50':>10} {'change':>8} {'base p95':>10} {'p95':>10}")
+    for name, result in current['stages'].items():
+        base = baseline['stages'].get(name)
+        if base is None or 'skipped' in base or 'skipped' in result:
+            continue
+        change = (result['p50_ms'] - base['p50_ms']) / base['p50_ms'] if base['p50_ms'] > 0 else 0.0
+        flag = '  REGRESSION' if change > threshold else ''
+        if flag:
+            regressions.append(name)
+        print(f"{name:<22} {base['p50_ms']:10.3f} {result['p50_ms']:10.3f} {change:+8.1%} "
+              f"{base['p95_ms']:10.3f} {result['p95_ms']:10.3f}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark the per-frame pipeline stages.")
+    parser.add_argument('--stages', nargs='+', choices=STAGE_NAMES, help="Stages to run (default: all).")
+    parser.add_argument('--iterations', type=int, default=200, help="Timed calls per stage.")
+    parser.add_argument('--warmup', type=int, default=20, help="Untimed calls per stage before timing.")
+    parser.add_argument('--frames', type=int, default=300, help="Frames in the synthetic fixture.")
+    parser.add_argument('--resolution', type=int, nargs=2, default=(640, 480), metavar=('WIDTH', 'HEIGHT'),
+                        help="Synthetic frame resolution.")
+    parser.add_argument('--session', help="Recorded session file to use instead of the synthetic fixture.")
+    parser.add_argument('--video', help="Video the session was recorded from (frames for the image stages).")
+    parser.add_argument('--backend', default='torch', choices=['torch', 'onnx'], help="Model inference backend.")
+    parser.add_argument('--depth-model', default='MiDaS_small', help="MiDaS variant for the depth stage.")
+    parser.add_argument('--output', help="Write the JSON report to this file.")
+    parser.add_argument('--compare', metavar='BASELINE', help="Compare against a previous JSON report.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_REGRESSION_THRESHOLD,
+                        help="Relative p50 slowdown counted as a regression by --compare.")
+    args = parser.parse_args(argv)
+
+    cv2.setNumThreads(1)
+    if args.session:
+        fixture = recorded_fixture(args.session, args.video, args.frames)
+    else:
+        fixture = synthetic_fixture(args.frames, *args.resolution)
+    options = {'backend': args.backend, 'depth_model': args.depth_model}
+    report = run_benchmarks(fixture, args.stages, args.iterations, args.warmup, options)
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)
+        regressions = compare_reports(baseline, report, args.threshold)
+        if regressions:
+            print(f"Regressions: {', '.join(regressions)}")
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,118 @@
+from pose_estimation.temporal_smoothing import SMOOTHING_METHODS
+
+# Stage benchmarks. Each setup function builds its component once and returns a callable
+# that processes fixture item i. Components are imported inside the setup functions, so a
+# stage whose dependencies or model weights are unavailable is skipped instead of failing the run.
+
+
+def _setup_lighting(method):
+    def setup(fixture, options):
+        # Curve refresh plus the normalized RGB model input, i.e. everything before BlazePose
+        from pose_estimation.lighting import LightingNormalizer
+        normalizer = LightingNormalizer(method, model_input_size=options.get('pose_input_size', 640))
+        frames = fixture.frames
+
+        def run(i):
+            frame = frames[i % len(frames)]
+            normalizer.update(frame)
+            return normalizer.model_input(frame)
+        return run
+    return setup
+
+
+def _setup_blazepose(roi_tracking):
+    def setup(fixture, options):
+        from pose_estimation.mediapipe_blazepose import BlazePoseEstimator
+        estimator = BlazePoseEstimator(roi_tracking=roi_tracking)
+        frames = fixture.frames
+        return lambda i: estimator.process_frame(frames[i % len(frames)], i / 30.0)
+    return setup
+
+
+def _setup_smoothing(method):
+    def setup(fixture, options):
+        from pose_estimation.temporal_smoothing import TemporalSmoothing
+        smoother = TemporalSmoothing(window_size=10, method=method)
+        poses = fixture.poses
+        return lambda i: smoother.smooth_landmarks(poses[i % len(poses)])
+    return setup
+
+
+def setup_refine_pose(fixture, options):
+    from pose_estimation.heatmaps import landmark_heatmaps
+    from pose_estimation.pose_refinement import PoseRefiner
+    refiner = PoseRefiner(backend=options['backend'])
+    height, width = fixture.frames[0].shape[:2]
+    heatmaps = [landmark_heatmaps(pose.xy, (width, height)) for pose in fixture.poses[:16]]
+    return lambda i: refiner.refine_pose(heatmaps[i % len(heatmaps)])
+
+
+def setup_landmark_heatmap(fixture, options):
+    from pose_estimation.heatmaps import landmark_heatmaps
+    height, width = fixture.frames[0].shape[:2]
+    poses = fixture.poses
+    return lambda i: landmark_heatmaps(poses[i % len(poses)].xy, (width, height))
+
+
+def setup_estimate_depth(fixture, options):
+    from pose_estimation.depth_estimator import DepthEstimator
+    estimator = DepthEstimator(options['depth_model'], backend=options['backend'])
+    frames = fixture.frames
+    return lambda i: estimator.estimate_depth(frames[i % len(frames)])
+
+
+def setup_joint_angles(fixture, options):
+    from biomechanics.joint_angles import JointAnglesCalculator
+    calculator = JointAnglesCalculator()
+    poses = fixture.poses
+    return lambda i: calculator.get_joint_angles(poses[i % len(poses)])
+
+
+def setup_center_of_mass(fixture, options):
+    from biomechanics.center_of_mass import CenterOfMassEstimator
+    estimator = CenterOfMassEstimator()
+    poses = fixture.poses
+    return lambda i: estimator.estimate_com(poses[i % len(poses)])
+
+
+def setup_motion_parameters(fixture, options):
+    from biomechanics.motion_analysis import MotionAnalyzer
+    analyzer = MotionAnalyzer(window_size=5)
+    poses = fixture.poses
+
+    def run(i):
+        analyzer.update_landmarks(poses[i % len(poses)])
+        return analyzer.get_motion_parameters()
+    return run
+
+
+def _setup_draw_overlays(output_size):
+    def setup(fixture, options):
+        from utils.visualization_utils import OverlayRenderer
+        renderer = OverlayRenderer()
+        frames = [frame.copy() for frame in fixture.frames]
+        poses = fixture.poses
+        return lambda i: renderer.render(frames[i % len(frames)], poses[i % len(poses)], 'white', i // 30,
+                                         output_size=output_size)
+    return setup
+
+
+STAGES = [
+    ('preprocess_lighting', _setup_lighting('equalize')),
+    ('preprocess_clahe', _setup_lighting('clahe')),
+    ('blazepose', _setup_blazepose(False)),
+    ('blazepose_roi', _setup_blazepose(True)),
+] + [
+    (f"smooth_{method}", _setup_smoothing(method)) for method in SMOOTHING_METHODS
+] + [
+    ('landmark_heatmap', setup_landmark_heatmap),
+    ('refine_pose', setup_refine_pose),
+    ('estimate_depth', setup_estimate_depth),
+    ('joint_angles', setup_joint_angles),
+    ('center_of_mass', setup_center_of_mass),
+    ('motion_parameters', setup_motion_parameters),
+    ('draw_overlays', _setup_draw_overlays(None)),
+    ('draw_overlays_display', _setup_draw_overlays((480, 360))),
+]
+
+STAGE_NAMES = [name for name, _ in STAGES]
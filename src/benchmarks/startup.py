@@ -0,0 +1,124 @@
+import argparse
+import json
+import os
+import subprocess
+import sys
+import time
+import numpy as np
+from benchmarks.run import environment
+
+SRC_DIR = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules on the startup path of the GUI, and the heavy dependencies it should not import eagerly
+STARTUP_MODULES = ['pose_estimation.pose_tracker', 'gui.main_window']
+HEAVY_MODULES = ['torch', 'torchvision', 'mediapipe', 'pyttsx3']
+
+# Runs in a fresh interpreter: import time of one module, and which heavy modules it pulled in
+_IMPORT_PROBE = '''
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{'seconds': seconds, 'heavy_imported': [m for m in {heavy!r} if m in sys.modules]}}))
+'''
+
+# Runs in a fresh interpreter: time until PoseTracker returns, then until each component is loaded
+_TRACKER_PROBE = '''
+import json, time
+start = time.perf_counter()
+from pose_estimation.pose_tracker import PoseTracker
+imported = time.perf_counter() - start
+tracker = PoseTracker(background_loading=True, enable_audio={enable_audio}, depth_interval={depth_interval})
+constructed = time.perf_counter() - start
+tracker.wait_until_ready()
+ready = time.perf_counter() - start
+print(json.dumps({{'import': imported, 'constructed': constructed, 'ready': ready,
+                  'components': tracker.component_status()}}))
+'''
+
+
+def _run_probe(code, timeout):
+    env = dict(os.environ, PYTHONPATH=SRC_DIR)
+    output = subprocess.run([sys.executable, '-c', code], cwd=SRC_DIR, env=env, capture_output=True, text=True,
+                            timeout=timeout)
+    if output.returncode != 0:
+        lines = output.stderr.strip().splitlines()
+        raise RuntimeError(lines[-1] if lines else f"exit code {output.returncode}")
+    return json.loads(output.stdout.strip().splitlines()[-1])
+
+
+def _summary(values):
+    values = np.asarray(values) * 1000.0
+    return {'median_ms': float(np.median(values)), 'min_ms': float(values.min()), 'max_ms': float(values.max())}
+
+
+def measure_imports(modules, repeat=5, timeout=300):
+    """
+    Import time of each module in fresh interpreters (the first run includes cold file caches).
+
+    Returns:
+        dict: Module -> latency summary and the heavy dependencies the import pulled in.
+    """
+    results = {}
+    for module in modules:
+        try:
+            runs = [_run_probe(_IMPORT_PROBE.format(module=module, heavy=HEAVY_MODULES), timeout)
+                    for _ in range(repeat)]
+        except (RuntimeError, subprocess.TimeoutExpired) as e:
+            results[module] = {'skipped': str(e)}
+            print(f"import {module:<32} skipped ({e})")
+            continue
+        results[module] = _summary([run['seconds'] for run in runs])
+        results[module]['heavy_imported'] = runs[-1]['heavy_imported']
+        heavy = ', '.join(runs[-1]['heavy_imported']) or 'none'
+        print(f"import {module:<32} median {results[module]['median_ms']:9.1f} ms  heavy deps: {heavy}")
+    return results
+
+
+def measure_tracker_startup(repeat=3, enable_audio=True, depth_interval=10, timeout=600):
+    """
+    Time from a fresh interpreter until PoseTracker(background_loading=True) returns (the GUI can
+    show its window) and until every component is loaded, with the per-component load times.
+    """
+    code = _TRACKER_PROBE.format(enable_audio=enable_audio, depth_interval=depth_interval)
+    try:
+        runs = [_run_probe(code, timeout) for _ in range(repeat)]
+    except (RuntimeError, subprocess.TimeoutExpired) as e:
+        print(f"tracker startup skipped ({e})")
+        return {'skipped': str(e)}
+
+    result = {key: _summary([run[key] for run in runs]) for key in ('import', 'constructed', 'ready')}
+    result['components'] = runs[-1]['components']
+    print(f"tracker usable after   median {result['constructed']['median_ms']:9.1f} ms")
+    print(f"all components after   median {result['ready']['median_ms']:9.1f} ms")
+    for name, info in result['components'].items():
+        seconds = f"{info['seconds'] * 1000.0:9.1f} ms" if info['seconds'] is not None else ''
+        print(f"  {name:<22} {info['state']:<8} {seconds}  {info['error'] or ''}")
+    return result
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Benchmark application startup (imports and model loading).")
+    parser.add_argument('--repeat', type=int, default=5, help="Fresh interpreters per import measurement.")
+    parser.add_argument('--tracker-repeat', type=int, default=3, help="Fresh interpreters for the tracker startup.")
+    parser.add_argument('--no-audio', action='store_true', help="Measure the tracker without audio feedback.")
+    parser.add_argument('--depth-interval', type=int, default=10,
+                        help="Depth interval of the measured tracker (0 disables depth estimation).")
+    parser.add_argument('--output', help="Write the JSON report to this file.")
+    args = parser.parse_args(argv)
+
+    report = {
+        'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'environment': environment(),
+        'imports': measure_imports(STARTUP_MODULES + HEAVY_MODULES, args.repeat),
+        'tracker': measure_tracker_startup(args.tracker_repeat, not args.no_audio, args.depth_interval or None),
+    }
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2)
+        print(f"Report written to {args.output}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -1,4 +1,5 @@
 import numpy as np
+from pose_estimation.pose_frame import PoseFrame, NUM_LANDMARKS
 
 class CenterOfMassEstimator:
     def __init__(self):
@@ -34,30 +35,37 @@ class CenterOfMassEstimator:
             'right_foot': [28, 32]
         }
 
-    def calculate_segment_com(self, landmarks, indices):
-        points = [np.array([landmarks[i].x, landmarks[i].y, landmarks[i].z]) for i in indices]
-        segment_com = np.mean(points, axis=0)
-        return segment_com
+        # Per-landmark weights so the whole-body COM is a single weighted sum
+        self.landmark_weights = self._build_landmark_weights()
 
-    def estimate_com(self, landmarks):
+    def _build_landmark_weights(self):
+        """
+        Fold segment masses into one weight per landmark.
+
+        Each segment COM is the mean of its landmarks, so every landmark of a segment
+        receives an equal share of that segment's mass.
+        """
         total_mass = sum(self.segment_masses.values())
-        com_numerator = np.zeros(3)
+        weights = np.zeros(NUM_LANDMARKS)
 
         for segment, mass in self.segment_masses.items():
-            segment_name = segment
             # Handle left and right segments
             if segment in ['upper_arm', 'forearm', 'hand', 'thigh', 'shank', 'foot']:
-                for side in ['left', 'right']:
-                    seg_key = f"{side}_{segment}"
-                    indices = self.segments.get(seg_key, [])
-                    if indices:
-                        seg_com = self.calculate_segment_com(landmarks, indices)
-                        com_numerator += seg_com * (mass / 2)
+                seg_keys = [f"{side}_{segment}" for side in ['left', 'right']]
+                mass = mass / 2
             else:
-                indices = self.segments.get(segment_name, [])
+                seg_keys = [segment]
+            for seg_key in seg_keys:
+                indices = self.segments.get(seg_key, [])
                 if indices:
-                    seg_com = self.calculate_segment_com(landmarks, indices)
-                    com_numerator += seg_com * mass
+                    weights[indices] += mass / len(indices)
+
+        return weights / total_mass
 
-        body_com = com_numerator / total_mass
-        return body_com
\ No newline at end of file
+    def calculate_segment_com(self, landmarks, indices):
+        frame = PoseFrame.from_landmarks(landmarks)
+        return frame.xyz[indices].mean(axis=0)
+
+    def estimate_com(self, landmarks):
+        frame = PoseFrame.from_landmarks(landmarks)
+        return self.landmark_weights @ frame.xyz
\ No newline at end of file
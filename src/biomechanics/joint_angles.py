@@ -1,11 +1,46 @@
 import numpy as np
+from pose_estimation.pose_frame import PoseFrame, NUM_LANDMARKS, stack_pose_frames
+
+# Joint table: joint name -> (point a, vertex b, point c); the angle is measured at b
+JOINT_DEFINITIONS = {
+    'left_elbow': ('left_shoulder', 'left_elbow', 'left_wrist'),
+    'right_elbow': ('right_shoulder', 'right_elbow', 'right_wrist'),
+    'left_shoulder': ('left_elbow', 'left_shoulder', 'left_hip'),
+    'right_shoulder': ('right_elbow', 'right_shoulder', 'right_hip'),
+    'left_hip': ('left_shoulder', 'left_hip', 'left_knee'),
+    'right_hip': ('right_shoulder', 'right_hip', 'right_knee'),
+    'left_knee': ('left_hip', 'left_knee', 'left_ankle'),
+    'right_knee': ('right_hip', 'right_knee', 'right_ankle'),
+    'left_ankle': ('left_knee', 'left_ankle', 'left_foot_index'),
+    'right_ankle': ('right_knee', 'right_ankle', 'right_foot_index'),
+    # Angle between the trunk and the vertical (0 when upright)
+    'trunk_lean': ('mid_shoulder', 'mid_hip', 'vertical_reference'),
+}
+
+# Joints reported per exercise type; 'all' reports every joint in the table
+EXERCISE_JOINTS = {
+    'pushup': ['left_elbow', 'right_elbow'],
+    'squat': ['left_knee', 'right_knee'],
+    'lunge': ['left_knee', 'right_knee'],
+}
+
+
+def normalize_exercise(exercise_type):
+    """
+    Map exercise names as shown in the GUI ('Push-up') or written elsewhere ('push_up') to table keys ('pushup').
+    """
+    return (exercise_type or 'all').lower().replace('-', '').replace('_', '')
 
 
 class JointAnglesCalculator:
     """
     A class for calculating joint angles using 3D pose landmarks.
+
+    Joints are declared as (a, b, c) landmark triplets and compiled into index arrays,
+    so all joints of a frame, or of a (T, 33, 4) batch of frames, are computed in one
+    vectorized pass.
     """
-    def __init__(self):
+    def __init__(self, joint_definitions=None):
         # MediaPipe landmark indices
         self.landmark_indices = {
             'left_shoulder': 11,
@@ -20,10 +55,46 @@ class JointAnglesCalculator:
             'right_knee': 26,
             'left_ankle': 27,
             'right_ankle': 28,
+            'left_heel': 29,
+            'right_heel': 30,
+            'left_foot_index': 31,
+            'right_foot_index': 32,
+            # Virtual landmarks appended after the 33 BlazePose landmarks
+            'mid_shoulder': NUM_LANDMARKS,
+            'mid_hip': NUM_LANDMARKS + 1,
+            'vertical_reference': NUM_LANDMARKS + 2,
         }
         # Visibility threshold
         self.visibility_threshold = 0.2
 
+        self.joint_definitions = dict(JOINT_DEFINITIONS if joint_definitions is None else joint_definitions)
+        self._compile_joint_table()
+
+    def _compile_joint_table(self):
+        """
+        Compile the joint table into a (J, 3) array of landmark indices.
+        """
+        self.joint_names = list(self.joint_definitions)
+        self.joint_positions = {name: i for i, name in enumerate(self.joint_names)}
+        self.joint_triplets = np.array(
+            [[self.landmark_indices[point] for point in self.joint_definitions[name]] for name in self.joint_names],
+            dtype=np.intp
+        ).reshape(-1, 3)
+
+    def add_joint(self, name, point_a_name, point_b_name, point_c_name):
+        """
+        Add (or replace) a joint in the joint table.
+        :param name: Name of the joint angle.
+        :param point_a_name: Name of the first point.
+        :param point_b_name: Name of the middle point (vertex of the angle).
+        :param point_c_name: Name of the third point.
+        """
+        for point in (point_a_name, point_b_name, point_c_name):
+            if point not in self.landmark_indices:
+                raise ValueError(f"Unknown landmark: {point}")
+        self.joint_definitions[name] = (point_a_name, point_b_name, point_c_name)
+        self._compile_joint_table()
+
     def calculate_angle(self, a, b, c):
         """
         Calculate the angle at point b formed by points a, b, and c in 3D space.
@@ -51,10 +122,58 @@ class JointAnglesCalculator:
         """
         return landmark.visibility >= self.visibility_threshold
 
+    def _with_virtual_landmarks(self, data):
+        """
+        Append the virtual landmarks (shoulder/hip midpoints and a vertical reference
+        above the hip midpoint) to a (..., 33, 4) landmark array.
+        """
+        lm = self.landmark_indices
+        virtual = np.empty(data.shape[:-2] + (3, 4), dtype=np.float32)
+        for i, (left, right) in enumerate((('left_shoulder', 'right_shoulder'), ('left_hip', 'right_hip'))):
+            left, right = data[..., lm[left], :], data[..., lm[right], :]
+            virtual[..., i, :3] = (left[..., :3] + right[..., :3]) / 2
+            virtual[..., i, 3] = np.minimum(left[..., 3], right[..., 3])
+        virtual[..., 2, :] = virtual[..., 1, :]
+        virtual[..., 2, 1] -= 1.0  # Image y grows downwards
+        return np.concatenate([data, virtual], axis=-2)
+
+    def _angles_from_array(self, data):
+        """
+        Compute every joint in the table for a (..., 33, 4) landmark array.
+        :return: Array of shape (..., J) in degrees, NaN where a joint is not visible.
+        """
+        points = self._with_virtual_landmarks(data)[..., self.joint_triplets, :]  # (..., J, 3, 4)
+        ba = points[..., 0, :3] - points[..., 1, :3]
+        bc = points[..., 2, :3] - points[..., 1, :3]
+        norms = np.linalg.norm(ba, axis=-1) * np.linalg.norm(bc, axis=-1)
+        dots = np.einsum('...i,...i->...', ba, bc)
+
+        valid = (norms > 0) & (points[..., 3] >= self.visibility_threshold).all(axis=-1)
+        cosine_angles = np.divide(dots, norms, out=np.zeros_like(dots), where=valid)
+        angles = np.degrees(np.arccos(np.clip(cosine_angles, -1.0, 1.0)))
+        angles[~valid] = np.nan
+        return angles
+
+    def calculate_angles(self, landmarks):
+        """
+        Calculate all joints in the joint table for a single frame.
+        :param landmarks: PoseFrame (or list of MediaPipe pose landmarks).
+        :return: Array of shape (J,) ordered as self.joint_names, NaN where not visible.
+        """
+        return self._angles_from_array(PoseFrame.from_landmarks(landmarks).data)
+
+    def calculate_angles_batch(self, frames):
+        """
+        Calculate all joints in the joint table for a batch of frames at once.
+        :param frames: (T, 33, 4) landmark array or sequence of PoseFrames.
+        :return: Array of shape (T, J) ordered as self.joint_names, NaN where not visible.
+        """
+        return self._angles_from_array(stack_pose_frames(frames))
+
     def calculate_joint_angle(self, landmarks, point_a_name, point_b_name, point_c_name):
         """
         Calculate the joint angle for specified points in 3D space.
-        :param landmarks: List of pose landmarks.
+        :param landmarks: PoseFrame (or list of MediaPipe pose landmarks).
         :param point_a_name: Name of the first point.
         :param point_b_name: Name of the middle point.
         :param point_c_name: Name of the third point.
@@ -62,40 +181,55 @@ class JointAnglesCalculator:
         """
         lm = self.landmark_indices
         try:
-            point_a = landmarks[lm[point_a_name]]
-            point_b = landmarks[lm[point_b_name]]
-            point_c = landmarks[lm[point_c_name]]
-
-            # Check visibility
-            if not (self.is_landmark_visible(point_a) and
-                    self.is_landmark_visible(point_b) and
-                    self.is_landmark_visible(point_c)):
-                return None
-
-            # Use 3D coordinates
-            return self.calculate_angle(
-                (point_a.x, point_a.y, point_a.z),
-                (point_b.x, point_b.y, point_b.z),
-                (point_c.x, point_c.y, point_c.z)
-            )
-        except (IndexError, AttributeError):
+            frame = PoseFrame.from_landmarks(landmarks)
+            points = self._with_virtual_landmarks(frame.data)[[lm[point_a_name], lm[point_b_name], lm[point_c_name]]]
+        except (IndexError, AttributeError, ValueError):
+            return None
+
+        # Check visibility
+        if (points[:, 3] < self.visibility_threshold).any():
             return None
 
+        # Use 3D coordinates
+        return self.calculate_angle(points[0, :3], points[1, :3], points[2, :3])
+
+    def get_exercise_joints(self, exercise_type='all'):
+        """
+        Return the joint names reported for an exercise type.
+        """
+        exercise_type = normalize_exercise(exercise_type)
+        if exercise_type == 'all':
+            return list(self.joint_names)
+        return [name for name in EXERCISE_JOINTS.get(exercise_type, []) if name in self.joint_positions]
+
     def get_joint_angles(self, landmarks, exercise_type='all'):
         """
         Calculate joint angles based on landmarks and exercise type.
-        :param landmarks: List of pose landmarks.
+        :param landmarks: PoseFrame (or list of MediaPipe pose landmarks).
         :param exercise_type: Type of exercise ('pushup', 'squat', 'lunge', or 'all').
-        :return: Dictionary of joint angles.
+        :return: Dictionary of joint angles, None for joints that are not visible.
         """
-        joints = {}
+        return self.angles_to_dict(self.calculate_angles(landmarks), exercise_type)
 
-        if exercise_type in ['pushup', 'all']:
-            joints['left_elbow'] = self.calculate_joint_angle(landmarks, 'left_shoulder', 'left_elbow', 'left_wrist')
-            joints['right_elbow'] = self.calculate_joint_angle(landmarks, 'right_shoulder', 'right_elbow', 'right_wrist')
-
-        if exercise_type in ['squat', 'lunge', 'all']:
-            joints['left_knee'] = self.calculate_joint_angle(landmarks, 'left_hip', 'left_knee', 'left_ankle')
-            joints['right_knee'] = self.calculate_joint_angle(landmarks, 'right_hip', 'right_knee', 'right_ankle')
+    def angles_to_dict(self, angles, exercise_type='all'):
+        """
+        Convert an angle array from calculate_angles() into the dictionary returned by get_joint_angles().
+        :param angles: Array of shape (J,) ordered as self.joint_names.
+        :param exercise_type: Type of exercise ('pushup', 'squat', 'lunge', or 'all').
+        :return: Dictionary of joint angles, None for joints that are not visible.
+        """
+        joints = {}
+        for name in self.get_exercise_joints(exercise_type):
+            angle = angles[self.joint_positions[name]]
+            joints[name] = None if np.isnan(angle) else float(angle)
+        return joints
 
-        return joints
\ No newline at end of file
+    def get_joint_angles_batch(self, frames, exercise_type='all'):
+        """
+        Calculate joint angles for a batch of frames, e.g. a recorded session.
+        :param frames: (T, 33, 4) landmark array or sequence of PoseFrames.
+        :param exercise_type: Type of exercise ('pushup', 'squat', 'lunge', or 'all').
+        :return: Dictionary mapping joint names to (T,) angle arrays (NaN where not visible).
+        """
+        angles = self.calculate_angles_batch(frames)
+        return {name: angles[:, self.joint_positions[name]] for name in self.get_exercise_joints(exercise_type)}
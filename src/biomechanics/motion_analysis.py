@@ -1,25 +1,22 @@
-import torch
-import torch.nn as nn
 import numpy as np
-import time
+from collections import deque
+from pose_estimation.pose_frame import PoseFrame
 
 class MotionAnalyzer:
     def __init__(self, window_size=5):
         self.window_size = window_size
-        self.landmark_histories = {}
+        # Each entry is a (33, 3) array of landmark positions for one frame
+        self.landmark_histories = deque(maxlen=self.window_size)
         self.time_stamps = deque(maxlen=self.window_size)
 
     def update_landmarks(self, landmarks):
-        current_time = time.time()
-        self.time_stamps.append(current_time)
-        for idx, landmark in enumerate(landmarks):
-            if idx not in self.landmark_histories:
-                self.landmark_histories[idx] = deque(maxlen=self.window_size)
-            self.landmark_histories[idx].append((landmark.x, landmark.y, landmark.z))
+        frame = PoseFrame.from_landmarks(landmarks)
+        self.time_stamps.append(frame.timestamp)
+        self.landmark_histories.append(frame.xyz.copy())
 
     def calculate_velocity(self, p1, p2, dt):
-        """Calculate velocity between two points over time dt."""
-        displacement = np.array(p2) - np.array(p1)
+        """Calculate velocity between two points (or landmark arrays) over time dt."""
+        displacement = np.asarray(p2) - np.asarray(p1)
         velocity = displacement / dt
         return velocity
 
@@ -34,16 +31,15 @@ class MotionAnalyzer:
         if len(self.time_stamps) < 2:
             return velocities, accelerations  # Not enough data
 
+        history = self.landmark_histories
         dt = self.time_stamps[-1] - self.time_stamps[-2]
-        for idx, history in self.landmark_histories.items():
-            if len(history) >= 2:
-                v = self.calculate_velocity(history[-2], history[-1], dt)
-                velocities[idx] = v
-
-            if len(history) >= 3:
-                dt_prev = self.time_stamps[-2] - self.time_stamps[-3]
-                v_prev = self.calculate_velocity(history[-3], history[-2], dt_prev)
-                a = self.calculate_acceleration(v_prev, velocities[idx], dt)
-                accelerations[idx] = a
-
-        return velocities, accelerations
\ No newline at end of file
+        v = self.calculate_velocity(history[-2], history[-1], dt)
+        velocities = dict(enumerate(v))
+
+        if len(history) >= 3:
+            dt_prev = self.time_stamps[-2] - self.time_stamps[-3]
+            v_prev = self.calculate_velocity(history[-3], history[-2], dt_prev)
+            a = self.calculate_acceleration(v_prev, v, dt)
+            accelerations = dict(enumerate(a))
+
+        return velocities, accelerations
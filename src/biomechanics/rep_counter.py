@@ -0,0 +1,58 @@
+import math
+from biomechanics.joint_angles import normalize_exercise
+
+# Joint whose angle drives the rep count of each exercise
+REP_JOINTS = {
+    'squat': 'left_knee',
+    'pushup': 'left_elbow',
+}
+
+
+class RepCounter:
+    """
+    Counts repetitions from joint angles and tracks the range of motion (ROM) status.
+
+    A rep starts when the driving joint flexes to `flexed_angle` or below and is counted
+    once the joint is extended past `extended_angle` again.
+    """
+    def __init__(self, extended_angle=160.0, flexed_angle=90.0, rep_joints=None):
+        self.extended_angle = extended_angle
+        self.flexed_angle = flexed_angle
+        self.rep_joints = dict(REP_JOINTS if rep_joints is None else rep_joints)
+        self.reset()
+
+    def reset(self):
+        self.rep_count = 0
+        self.rom_status = 'white'
+        self.rep_started = False
+
+    @property
+    def phase(self):
+        """'down' while a rep is in progress, 'up' otherwise."""
+        return 'down' if self.rep_started else 'up'
+
+    def update(self, joint_angles, exercise_type):
+        """
+        Update the ROM status and repetition count with the joint angles of a new frame.
+
+        Args:
+            joint_angles (dict): Joint name -> angle in degrees (None or NaN when not visible).
+            exercise_type (str): Selected exercise ('Push-up', 'push_up' and 'pushup' are equivalent).
+
+        Returns:
+            tuple: (rom_status, rep_count)
+        """
+        joint = self.rep_joints.get(normalize_exercise(exercise_type))
+        angle = joint_angles.get(joint) if joint else None
+        if angle is None or math.isnan(angle):
+            return self.rom_status, self.rep_count
+
+        if angle > self.extended_angle:
+            if self.rep_started:
+                self.rep_count += 1
+                self.rep_started = False
+            self.rom_status = 'white'
+        elif angle <= self.flexed_angle:
+            self.rom_status = 'dark_green'
+            self.rep_started = True
+        return self.rom_status, self.rep_count
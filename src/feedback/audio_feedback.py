@@ -1,20 +1,122 @@
+import heapq
+import itertools
+import threading
+import time
 import pyttsx3
+from feedback.phrase_cache import PhraseCache
+
+# Message priorities, lower values are spoken first
+PRIORITY_SAFETY = 0
+PRIORITY_CORRECTION = 1
+PRIORITY_INFO = 2
+
+
+class _Utterance:
+    __slots__ = ('text', 'key', 'priority', 'expires', 'cancelled')
+
+    def __init__(self, text, key, priority, expires):
+        self.text = text
+        self.key = key
+        self.priority = priority
+        self.expires = expires
+        self.cancelled = False
+
 
 class AudioFeedback:
-    def __init__(self):
-        # Initialize the TTS engine
-        self.engine = pyttsx3.init()
-        self.engine.setProperty('rate', 150)  # Speed of speech
-        self.engine.setProperty('volume', 1)  # Volume range: 0.0 to 1.0
+    """
+    Spoken feedback on a dedicated worker thread, so the frame loop never waits for speech.
+
+    Messages are queued by priority. A pending message with the same key replaces the older one,
+    the same text is not repeated within `repeat_interval`, utterances are spaced at least
+    `min_interval` apart (safety messages excepted) and corrections that could not be spoken
+    within `max_age` are dropped as stale.
+
+    When the optional simpleaudio package is installed, phrases are played from a PhraseCache of
+    pre-rendered audio instead of being synthesized on every utterance.
+    """
+    def __init__(self, min_interval=2.0, repeat_interval=6.0, max_age=3.0, rate=150, volume=1.0,
+                 use_phrase_cache=True, preload_phrases=(), cache_dir=None):
+        """
+        Args:
+            min_interval (float): Minimum pause in seconds between two utterances
+                (the SettingsDialog feedback interval).
+            repeat_interval (float): The same text is not spoken again within this many seconds.
+            max_age (float): Corrections still queued after this many seconds are discarded.
+            rate (int): Speed of speech.
+            volume (float): Volume range: 0.0 to 1.0.
+            use_phrase_cache (bool): Play phrases from pre-rendered audio when simpleaudio is available.
+            preload_phrases (iterable): Known phrases synthesized when the worker starts.
+            cache_dir (str): Phrase cache directory (defaults to ~/.robiq/tts_cache).
+        """
+        self.min_interval = min_interval
+        self.repeat_interval = repeat_interval
+        self.max_age = max_age
+        self.rate = rate
+        self.volume = volume
+        self.enabled = True
+        self.phrase_cache = None
+        if use_phrase_cache and PhraseCache.available():
+            self.phrase_cache = PhraseCache(cache_dir, rate=rate, volume=volume)
+        self.preload_phrases = list(preload_phrases)
+
+        self._queue = []  # Heap of (priority, sequence, _Utterance)
+        self._pending = {}  # key -> queued _Utterance
+        self._sequence = itertools.count()
+        self._condition = threading.Condition()
+        self._last_spoken = {}  # text -> time it was last spoken
+        self._last_utterance_end = float('-inf')
+        self._speaking = False
+        self._stopping = False
+
+        # The TTS engine is created on, and only used from, the worker thread
+        self.thread = threading.Thread(target=self._run, name='audio-feedback', daemon=True)
+        self.thread.start()
+
+    def say(self, text, priority=PRIORITY_INFO, key=None, max_age=None):
+        """
+        Queue a message without blocking.
+
+        Args:
+            text (str): Text to speak.
+            priority (int): PRIORITY_SAFETY, PRIORITY_CORRECTION or PRIORITY_INFO.
+            key (str): Coalescing key; a pending message with the same key is replaced. Defaults to the text.
+            max_age (float): Drop the message if it is still queued after this many seconds.
+
+        Returns:
+            bool: False if the message was suppressed (disabled, or spoken too recently).
+        """
+        if not self.enabled or not text:
+            return False
+        now = time.monotonic()
+        key = text if key is None else key
+        with self._condition:
+            if now - self._last_spoken.get(text, float('-inf')) < self.repeat_interval:
+                return False
+            previous = self._pending.get(key)
+            if previous is not None:
+                if previous.text == text:
+                    return True  # Already queued
+                previous.cancelled = True
+            utterance = _Utterance(text, key, priority, None if max_age is None else now + max_age)
+            self._pending[key] = utterance
+            heapq.heappush(self._queue, (priority, next(self._sequence), utterance))
+            self._condition.notify()
+        return True
 
     def speak(self, text):
         """
-        Convert text to speech.
+        Convert text to speech (queued; returns immediately).
         Parameters:
         - text: The string of text to be converted into audio.
         """
-        self.engine.say(text)
-        self.engine.runAndWait()
+        return self.say(text)
+
+    def provide_correction(self, correction_text, key='correction'):
+        """
+        Queue a form correction. Only the newest correction per key is kept, and it is
+        dropped if it cannot be spoken within `max_age` seconds.
+        """
+        return self.say(correction_text, PRIORITY_CORRECTION, key, self.max_age)
 
     def give_feedback(self, feedback_text):
         """
@@ -23,7 +125,112 @@ class AudioFeedback:
         - feedback_text: Textual feedback to be converted into speech.
         """
         print("Feedback: ", feedback_text)  # Optionally print for debugging
-        self.speak(feedback_text)
+        return self.say(feedback_text)
+
+    def cancel(self, key=None):
+        """
+        Drop pending messages: the one queued under `key`, or all of them.
+        """
+        with self._condition:
+            keys = list(self._pending) if key is None else [key]
+            for k in keys:
+                utterance = self._pending.pop(k, None)
+                if utterance is not None:
+                    utterance.cancelled = True
+            self._condition.notify()
+
+    def set_min_interval(self, seconds):
+        with self._condition:
+            self.min_interval = seconds
+            self._condition.notify()
+
+    def pending_count(self):
+        with self._condition:
+            return len(self._pending)
+
+    def wait_idle(self, timeout=None):
+        """
+        Block until every queued message has been spoken or dropped.
+
+        Returns:
+            bool: False if the timeout expired first.
+        """
+        with self._condition:
+            return self._condition.wait_for(lambda: not self._pending and not self._speaking, timeout)
+
+    def stop(self, timeout=1.0):
+        """
+        Stop the speech worker; pending messages are discarded.
+        """
+        with self._condition:
+            self._stopping = True
+            self._condition.notify_all()
+        self.thread.join(timeout)
+
+    def _next_utterance(self):
+        """
+        Wait for the next message that is due. Returns None when stopping.
+        """
+        with self._condition:
+            while not self._stopping:
+                now = time.monotonic()
+                while self._queue:
+                    utterance = self._queue[0][2]
+                    if not utterance.cancelled and (utterance.expires is None or now <= utterance.expires):
+                        break
+                    heapq.heappop(self._queue)
+                    if self._pending.get(utterance.key) is utterance:
+                        del self._pending[utterance.key]
+                if not self._queue:
+                    self._condition.notify_all()  # Idle
+                    self._condition.wait()
+                    continue
+
+                utterance = self._queue[0][2]
+                if utterance.priority != PRIORITY_SAFETY:
+                    delay = self._last_utterance_end + self.min_interval - now
+                    if delay > 0:
+                        self._condition.wait(delay)
+                        continue
+                heapq.heappop(self._queue)
+                del self._pending[utterance.key]
+                self._speaking = True
+                return utterance
+        return None
+
+    def _run(self):
+        try:
+            engine = pyttsx3.init()
+            engine.setProperty('rate', self.rate)  # Speed of speech
+            engine.setProperty('volume', self.volume)  # Volume range: 0.0 to 1.0
+        except Exception as e:
+            print(f"Audio feedback disabled: {e}")
+            self.enabled = False
+            self.cancel()
+            return
+
+        if self.phrase_cache is not None:
+            self.phrase_cache.configure_engine(engine)
+            self.phrase_cache.preload(self.preload_phrases, engine)
+
+        while True:
+            utterance = self._next_utterance()
+            if utterance is None:
+                break
+            try:
+                clip = self.phrase_cache.get(utterance.text, engine) if self.phrase_cache is not None else None
+                if clip is not None:
+                    clip.play()
+                else:
+                    engine.say(utterance.text)
+                    engine.runAndWait()
+            except Exception as e:
+                print(f"Audio feedback failed: {e}")
+            with self._condition:
+                self._last_utterance_end = time.monotonic()
+                self._last_spoken[utterance.text] = self._last_utterance_end
+                self._speaking = False
+                self._condition.notify_all()
 
 
 # Test Feedback Module
@@ -32,17 +239,18 @@ if __name__ == "__main__":
     from src.feedback.audio_feedback import AudioFeedback
 
     def test_feedback():
-        fg = FeedbackGenerator()
+        fg = FeedbackGenerator('pushup', activate_frames=1)
         af = AudioFeedback()
 
         # Example joint angles
-        joint_angles = {'elbow': 150}
+        joint_angles = {'left_elbow': 150}
 
         # Generate text feedback
-        feedback_text = fg.analyze_joint_angles(joint_angles)
+        feedback_text = fg.analyze_joint_angles(joint_angles, phase='up')
         print(feedback_text)
 
         # Provide audio feedback
         af.give_feedback(feedback_text)
+        af.wait_idle()
 
-    test_feedback()
\ No newline at end of file
+    test_feedback()
@@ -1,24 +1,185 @@
+import numpy as np
+from biomechanics.joint_angles import JOINT_DEFINITIONS, normalize_exercise
+
+# Spoken coaching messages, pre-rendered by the audio phrase cache
+FEEDBACK_MESSAGES = {
+    'extend_arms': "Try to extend your arms more for full range of motion.",
+    'arm_extension_ok': "Great form on the arm extension!",
+    'good_form': "Good form, keep it up!",
+    'elbows_flare': "Keep your elbows closer to your body.",
+    'hips_sag': "Keep your hips in line with your shoulders.",
+    'chest_up': "Keep your chest up.",
+    'torso_upright': "Keep your torso upright.",
+}
+
+# Rep phases a rule applies to: 'down' while a rep is in progress (see RepCounter), 'up' otherwise
+PHASES = ('any', 'up', 'down')
+
+# Declarative form rules. A rule fires when the joint angle (degrees) leaves [min_angle, max_angle]
+# during the given phase. skill_level None applies to every level; lower priority is more important.
+FEEDBACK_RULES = [
+    # Push-up
+    {'exercise': 'pushup', 'joint': 'left_hip', 'min_angle': 160.0, 'message': 'hips_sag', 'priority': 0},
+    {'exercise': 'pushup', 'joint': 'right_hip', 'min_angle': 160.0, 'message': 'hips_sag', 'priority': 0},
+    {'exercise': 'pushup', 'joint': 'left_shoulder', 'max_angle': 75.0, 'phase': 'down',
+     'message': 'elbows_flare', 'priority': 1},
+    {'exercise': 'pushup', 'joint': 'right_shoulder', 'max_angle': 75.0, 'phase': 'down',
+     'message': 'elbows_flare', 'priority': 1},
+    # Squat: forward lean tolerance tightens with skill level
+    {'exercise': 'squat', 'joint': 'trunk_lean', 'max_angle': 45.0, 'message': 'chest_up', 'priority': 0},
+    {'exercise': 'squat', 'joint': 'trunk_lean', 'max_angle': 35.0, 'skill_level': 'intermediate',
+     'message': 'chest_up', 'priority': 0},
+    {'exercise': 'squat', 'joint': 'trunk_lean', 'max_angle': 25.0, 'skill_level': 'advanced',
+     'message': 'chest_up', 'priority': 0},
+    # Lunge
+    {'exercise': 'lunge', 'joint': 'trunk_lean', 'max_angle': 20.0, 'message': 'torso_upright', 'priority': 0},
+    {'exercise': 'lunge', 'joint': 'trunk_lean', 'max_angle': 12.0, 'skill_level': 'advanced',
+     'message': 'torso_upright', 'priority': 0},
+    # No exercise selected
+    {'exercise': 'all', 'joint': 'left_elbow', 'min_angle': 160.0, 'message': 'extend_arms', 'priority': 2},
+]
+
+# Message when no rule fires, per exercise
+OK_MESSAGES = {
+    'all': 'arm_extension_ok',
+    'pushup': 'good_form',
+    'squat': 'good_form',
+    'lunge': 'good_form',
+}
+
+
 class FeedbackGenerator:
-    def __init__(self):
-        # You might initialize thresholds or load models for assessing performance
-        self.angle_thresholds = {
-            'elbow': 160.0,  # Example threshold for elbow angle at full extension
-            # Add thresholds for other joints as needed
-        }
+    """
+    Form feedback from a declarative rule table.
 
-    def analyze_joint_angles(self, joint_angles):
+    The rules of the selected exercise and skill level are compiled into arrays (joint index,
+    angle bounds, phase, priority), so every rule of a frame is evaluated in one vectorized pass.
+    Hysteresis keeps messages from flapping: a rule fires only after `activate_frames` consecutive
+    violations and clears only once the angle is back inside its bounds by `hysteresis` degrees.
+    """
+    def __init__(self, exercise_type='all', skill_level=None, rules=None, joint_names=None,
+                 hysteresis=5.0, activate_frames=3, max_messages=2):
+        """
+        Args:
+            exercise_type (str): Selected exercise.
+            skill_level (str): 'beginner', 'intermediate' or 'advanced'; None uses only level-independent rules.
+            rules (list): Rule table; defaults to FEEDBACK_RULES.
+            joint_names (list): Order of the joint angle arrays passed in (JointAnglesCalculator.joint_names).
+            hysteresis (float): Degrees an angle must return inside its bounds before a rule clears.
+            activate_frames (int): Consecutive violating frames before a rule fires.
+            max_messages (int): Maximum number of messages reported per frame.
+        """
+        self.rules = list(FEEDBACK_RULES if rules is None else rules)
+        self.joint_names = list(JOINT_DEFINITIONS if joint_names is None else joint_names)
+        self.joint_positions = {name: i for i, name in enumerate(self.joint_names)}
+        self.hysteresis = hysteresis
+        self.activate_frames = activate_frames
+        self.max_messages = max_messages
+        self.set_exercise(exercise_type, skill_level)
+
+    def set_exercise(self, exercise_type, skill_level=None):
+        """
+        Select the rules of an exercise and skill level and compile them.
+        """
+        self.exercise_type = normalize_exercise(exercise_type)
+        self.skill_level = skill_level.lower() if skill_level else None
+        self._compile_rules()
+
+    def _compile_rules(self):
+        selected = [rule for rule in self.rules
+                    if normalize_exercise(rule['exercise']) == self.exercise_type
+                    and rule.get('skill_level') in (None, self.skill_level)]
+        for rule in selected:
+            if rule['joint'] not in self.joint_positions:
+                raise ValueError(f"Feedback rule references unknown joint: {rule['joint']}")
+            if rule.get('phase', 'any') not in PHASES:
+                raise ValueError(f"Unsupported feedback rule phase: {rule['phase']}")
+            if rule['message'] not in FEEDBACK_MESSAGES:
+                raise ValueError(f"Unknown feedback message: {rule['message']}")
+
+        # Rules sorted by priority once, so active rules come out of a mask already ordered
+        selected.sort(key=lambda rule: rule.get('priority', 0))
+        self.active_rules = selected
+        self.rule_joints = np.array([self.joint_positions[rule['joint']] for rule in selected], dtype=np.intp)
+        self.rule_min = np.array([rule.get('min_angle', -np.inf) for rule in selected], dtype=float)
+        self.rule_max = np.array([rule.get('max_angle', np.inf) for rule in selected], dtype=float)
+        self.rule_phase = np.array([PHASES.index(rule.get('phase', 'any')) for rule in selected], dtype=np.intp)
+        self.rule_messages = [FEEDBACK_MESSAGES[rule['message']] for rule in selected]
+        ok_key = OK_MESSAGES.get(self.exercise_type)
+        self.ok_message = FEEDBACK_MESSAGES[ok_key] if ok_key else None
+        self.reset()
+
+    def reset(self):
+        """
+        Clear the hysteresis state.
+        """
+        self.rule_active = np.zeros(len(self.active_rules), dtype=bool)
+        self.violation_frames = np.zeros(len(self.active_rules), dtype=np.intp)
+
+    def _angle_array(self, joint_angles):
+        if isinstance(joint_angles, np.ndarray):
+            return joint_angles
+        angles = np.full(len(self.joint_names), np.nan)
+        for name, angle in joint_angles.items():
+            position = self.joint_positions.get(name)
+            if position is not None and angle is not None:
+                angles[position] = angle
+        return angles
+
+    def evaluate(self, joint_angles, phase='any'):
+        """
+        Evaluate all compiled rules on one frame and update their hysteresis state.
+
+        Args:
+            joint_angles: Dict of joint name -> angle (None when not visible), or an angle array
+                ordered as `joint_names` (NaN when not visible).
+            phase (str): Current rep phase, 'up', 'down' or 'any'.
+
+        Returns:
+            list: Messages of the active rules, most important first (without duplicates).
+        """
+        if not self.active_rules:
+            return []
+        angles = self._angle_array(joint_angles)[self.rule_joints]
+        measured = ~np.isnan(angles)
+        applies = measured & ((self.rule_phase == 0) | (phase == 'any') | (self.rule_phase == PHASES.index(phase)))
+
+        # Active rules must come back inside their bounds by the hysteresis margin to clear
+        margin = self.hysteresis * self.rule_active
+        with np.errstate(invalid='ignore'):
+            violated = applies & ((angles < self.rule_min + margin) | (angles > self.rule_max - margin))
+
+        self.violation_frames = np.where(violated, self.violation_frames + 1, 0)
+        # Rules that cannot be evaluated this frame (joint hidden, other phase) keep their state
+        self.rule_active = np.where(applies, violated & ((self.violation_frames >= self.activate_frames) |
+                                                         self.rule_active), self.rule_active)
+
+        messages = []
+        for idx in np.flatnonzero(self.rule_active).tolist():
+            message = self.rule_messages[idx]
+            if message not in messages:
+                messages.append(message)
+                if len(messages) == self.max_messages:
+                    break
+        return messages
+
+    def analyze_joint_angles(self, joint_angles, phase='any'):
         """
         Analyze joint angles to determine if forms and postures are correct.
         Parameters:
-        - joint_angles: A dictionary containing joint names and their respective angles in degrees.
+        - joint_angles: A dictionary containing joint names and their respective angles in degrees
+          (or an angle array ordered as `joint_names`).
+        - phase: Current rep phase ('up', 'down' or 'any').
         Returns:
         - feedback: A string providing recommendations or confirmations based on the analysis.
         """
-        feedback = []
-        if joint_angles['elbow'] < self.angle_thresholds['elbow']:
-            feedback.append("Try to extend your arms more for full range of motion.")
-        else:
-            feedback.append("Great form on the arm extension!")
+        messages = self.evaluate(joint_angles, phase)
+        if not messages:
+            return self.ok_message or ""
+        return " ".join(messages)
 
-        # Additional analysis for other joints can be added here
-        return " ".join(feedback)
\ No newline at end of file
+    def phrases(self):
+        """
+        All messages this generator can produce, e.g. for pre-rendering speech.
+        """
+        return list(FEEDBACK_MESSAGES.values())
@@ -0,0 +1,162 @@
+import hashlib
+import os
+import wave
+from collections import OrderedDict
+
+try:
+    import simpleaudio
+except ImportError:  # Optional: without it, phrases are spoken through pyttsx3 directly
+    simpleaudio = None
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.robiq', 'tts_cache')
+
+
+class AudioClip:
+    """
+    Decoded PCM audio of one synthesized phrase, held in memory for immediate playback.
+    """
+    __slots__ = ('frames', 'channels', 'sample_width', 'sample_rate')
+
+    def __init__(self, frames, channels, sample_width, sample_rate):
+        self.frames = frames
+        self.channels = channels
+        self.sample_width = sample_width
+        self.sample_rate = sample_rate
+
+    @classmethod
+    def from_wav(cls, path):
+        with wave.open(path, 'rb') as wav:
+            return cls(wav.readframes(wav.getnframes()), wav.getnchannels(), wav.getsampwidth(), wav.getframerate())
+
+    def play(self, wait=True):
+        """
+        Play the clip through simpleaudio, by default blocking until it has finished.
+        """
+        play_object = simpleaudio.play_buffer(self.frames, self.channels, self.sample_width, self.sample_rate)
+        if wait:
+            play_object.wait_done()
+        return play_object
+
+
+class PhraseCache:
+    """
+    Pre-rendered TTS phrases, so the coaching loop plays audio buffers instead of synthesizing speech.
+
+    Phrases are synthesized once with pyttsx3's save_to_file, stored on disk keyed by
+    text + voice + rate + volume, and kept in memory as decoded clips. Preloaded phrases (the known
+    feedback vocabulary) stay in memory; other phrases are kept in an LRU of `max_entries` clips.
+
+    Phrases that fail to synthesize or decode are remembered and not retried, and file caching is
+    disabled altogether after `max_failures` failures (e.g. an engine whose save_to_file does not
+    write WAV), so the caller falls back to live speech without paying for a second synthesis.
+    """
+    def __init__(self, cache_dir=None, max_entries=64, voice=None, rate=150, volume=1.0, max_failures=3):
+        """
+        Args:
+            cache_dir (str): Directory of the synthesized WAV files. Defaults to ~/.robiq/tts_cache.
+            max_entries (int): Dynamic phrases kept in memory.
+            voice (str): pyttsx3 voice id; the engine default when None.
+            rate (int): Speed of speech.
+            volume (float): Volume range: 0.0 to 1.0.
+            max_failures (int): Failed phrases after which file caching is disabled.
+        """
+        self.cache_dir = cache_dir or DEFAULT_CACHE_DIR
+        self.max_entries = max_entries
+        self.voice = voice
+        self.rate = rate
+        self.volume = volume
+        self.pinned = {}  # text -> AudioClip of preloaded phrases
+        self.recent = OrderedDict()  # text -> AudioClip, least recently used first
+        self.failed = set()  # Texts that could not be synthesized or decoded
+        self.max_failures = max_failures
+        self.disabled = False
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(self.cache_dir, exist_ok=True)
+
+    @staticmethod
+    def available():
+        """
+        Whether cached clips can be played (the optional simpleaudio package is installed).
+        """
+        return simpleaudio is not None
+
+    def configure_engine(self, engine):
+        """
+        Apply the cache's voice, rate and volume to a pyttsx3 engine, so synthesized files match their keys.
+        """
+        if self.voice is None:
+            self.voice = engine.getProperty('voice')
+        else:
+            engine.setProperty('voice', self.voice)
+        engine.setProperty('rate', self.rate)
+        engine.setProperty('volume', self.volume)
+
+    def path_for(self, text):
+        key = hashlib.sha1(f"{self.voice}|{self.rate}|{self.volume}|{text}".encode('utf-8')).hexdigest()
+        return os.path.join(self.cache_dir, f"{key}.wav")
+
+    def preload(self, phrases, engine):
+        """
+        Synthesize (or load from disk) known phrases ahead of time and keep them in memory.
+        """
+        for text in phrases:
+            clip = self._load(text, engine)
+            if clip is not None:
+                self.pinned[text] = clip
+
+    def get(self, text, engine):
+        """
+        Return the clip of a phrase, synthesizing and caching it on first use.
+
+        Returns:
+            AudioClip: The phrase audio, or None if it could not be synthesized (now or before).
+        """
+        clip = self.pinned.get(text)
+        if clip is None:
+            clip = self.recent.get(text)
+            if clip is not None:
+                self.recent.move_to_end(text)
+        if clip is not None:
+            self.hits += 1
+            return clip
+
+        self.misses += 1
+        if self.disabled or text in self.failed:
+            return None
+        clip = self._load(text, engine)
+        if clip is not None:
+            self.recent[text] = clip
+            while len(self.recent) > self.max_entries:
+                self.recent.popitem(last=False)
+        return clip
+
+    def _fail(self, text, message):
+        self.failed.add(text)
+        print(message)
+        if len(self.failed) >= self.max_failures and not self.disabled:
+            self.disabled = True
+            print(f"Phrase caching disabled after {len(self.failed)} failures; speaking phrases directly")
+
+    def _load(self, text, engine):
+        if self.disabled or text in self.failed:
+            return None
+        path = self.path_for(text)
+        if not os.path.exists(path):
+            # Write to a temporary name first, so an interrupted synthesis never leaves a truncated cache entry
+            partial_path = path + '.partial'
+            try:
+                engine.save_to_file(text, partial_path)
+                engine.runAndWait()
+                os.replace(partial_path, path)
+            except Exception as e:
+                if os.path.exists(partial_path):
+                    os.remove(partial_path)
+                self._fail(text, f"Could not synthesize phrase '{text}': {e}")
+                return None
+        try:
+            return AudioClip.from_wav(path)
+        except (wave.Error, EOFError) as e:
+            os.remove(path)
+            self._fail(text, f"Discarding unreadable phrase cache entry {path}: {e}")
+            return None
@@ -1,27 +1,30 @@
 import cv2
 from PyQt5.QtWidgets import (
     QMainWindow, QApplication, QWidget, QVBoxLayout, QHBoxLayout, QLabel,
-    QPushButton, QSizePolicy
+    QPushButton
 )
-from PyQt5.QtCore import Qt, QThread, pyqtSignal
-from PyQt5.QtGui import QPixmap, QImage
+from PyQt5.QtCore import Qt, pyqtSignal
 from .exercise_selection import ExerciseSelectionWidget
 from .settings import SettingsDialog
 from .metrics_display import MetricsDisplayWidget
+from .video_display import VideoDisplayWidget
+from .video_thread import VideoThread
 from pose_estimation.pose_tracker import PoseTracker
-from pose_estimation.pose_refiner import PoseRefiner
-from motion_analysis.motion_analyzer import MotionAnalyzer
-from symmetry_analysis.symmetry_analyzer import SymmetryAnalyzer
+from biomechanics.motion_analysis import MotionAnalyzer
+from biomechanics.symmetry_analysis import SymmetryAnalyzer
 
 class MainWindow(QMainWindow):
+    # Emitted from the model loader thread, delivered on the GUI thread
+    component_state_changed = pyqtSignal(str, str)
+
     def __init__(self):
         super().__init__()
         self.setWindowTitle('ROBIQ - AI Personal Trainer')
         self.setGeometry(100, 100, 1200, 600)  # Wider window to display all info
 
-        # Initialize Pose Tracker and auxiliary components
-        self.pose_tracker = PoseTracker()
-        self.pose_refiner = PoseRefiner()
+        # Initialize Pose Tracker and auxiliary components; the models load in the background,
+        # so the window appears immediately
+        self.pose_tracker = PoseTracker(background_loading=True)
         self.motion_analyzer = MotionAnalyzer(window_size=5)
         self.symmetry_analyzer = SymmetryAnalyzer()
 
@@ -29,8 +32,9 @@ class MainWindow(QMainWindow):
         self.init_ui()
 
         # Initialize video thread
-        self.video_thread = VideoThread(self.pose_tracker, self.pose_refiner, self.motion_analyzer, self.symmetry_analyzer)
-        self.video_thread.frame_updated.connect(self.update_video_frame)
+        self.video_thread = VideoThread(self.pose_tracker, self.motion_analyzer, self.symmetry_analyzer,
+                                        self.video_display.frame_buffer)
+        self.video_thread.frame_updated.connect(self.video_display.show_latest)
         self.video_thread.joint_angles_updated.connect(self.update_joint_angles)
         self.video_thread.rom_status_updated.connect(self.update_rom_status)
         self.video_thread.rep_count_updated.connect(self.update_rep_count)
@@ -39,6 +43,11 @@ class MainWindow(QMainWindow):
         self.video_thread.motion_metrics_updated.connect(self.update_motion_metrics)
         self.video_thread.symmetry_scores_updated.connect(self.update_symmetry_scores)
 
+        # Model loading progress in the status bar
+        self.component_state_changed.connect(self.update_component_status)
+        self.pose_tracker.loader.add_listener(self.component_state_changed.emit)
+        self.update_component_status()
+
     def init_ui(self):
         # Central widget
         central_widget = QWidget()
@@ -49,12 +58,9 @@ class MainWindow(QMainWindow):
         video_layout = QVBoxLayout()
         control_layout = QHBoxLayout()
 
-        # Video display area
-        self.video_label = QLabel()
-        self.video_label.setFixedSize(640, 480)
-        self.video_label.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
-        self.video_label.setAlignment(Qt.AlignCenter)
-        video_layout.addWidget(self.video_label)
+        # Video display area (frames are rendered at this size by the video thread)
+        self.video_display = VideoDisplayWidget(640, 480)
+        video_layout.addWidget(self.video_display)
 
         # Joint angles display
         self.joint_angles_label = QLabel("Joint Angles")
@@ -121,9 +127,18 @@ class MainWindow(QMainWindow):
     def stop_session(self):
         self.video_thread.stop()
 
-    def update_video_frame(self, qt_image):
-        scaled_image = qt_image.scaled(self.video_label.size(), Qt.KeepAspectRatioByExpanding)
-        self.video_label.setPixmap(QPixmap.fromImage(scaled_image))
+    def update_component_status(self, name=None, state=None):
+        status = self.pose_tracker.component_status()
+        loading = [component for component, info in status.items() if info['state'] in ('pending', 'loading')]
+        failed = [component for component, info in status.items() if info['state'] == 'failed']
+        if loading:
+            finished = len(status) - len(loading)
+            message = f"Loading models ({finished}/{len(status)}): {loading[0].replace('_', ' ')}..."
+        else:
+            message = "Ready"
+        if failed:
+            message += f" (unavailable: {', '.join(failed)})"
+        self.statusBar().showMessage(message)
 
     def update_joint_angles(self, joint_angles):
         angles_text = "\n".join([f"{joint}: {angle:.2f}" for joint, angle in joint_angles.items()])
@@ -159,7 +174,13 @@ class MainWindow(QMainWindow):
 
     def open_settings(self):
         settings_dialog = SettingsDialog(self)
-        settings_dialog.exec_()
+        if settings_dialog.exec_():
+            audio_feedback = self.pose_tracker.audio_feedback
+            if audio_feedback is not None:
+                audio_feedback.enabled = settings_dialog.audio_feedback_enabled()
+                audio_feedback.set_min_interval(settings_dialog.feedback_interval())
+                if not audio_feedback.enabled:
+                    audio_feedback.cancel()
 
     def closeEvent(self, event):
         self.stop_session()
@@ -1,10 +1,13 @@
 # src/gui/metrics_display.py
-from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QGridLayout
-from PyQt5.QtCore import Qt
+from PyQt5.QtWidgets import QWidget, QVBoxLayout, QLabel, QGridLayout, QGroupBox
+from PyQt5.QtCore import Qt, QTimer
 
 class MetricsDisplayWidget(QWidget):
-    def __init__(self):
+    def __init__(self, show_performance=False):
         super().__init__()
+        self.show_performance = show_performance
+        self.metrics_source = None
+        self.performance_timer = None
         self.init_ui()
 
     def init_ui(self):
@@ -25,8 +28,24 @@ class MetricsDisplayWidget(QWidget):
             self.metrics_grid.addWidget(value, i, 1)
 
         layout.addLayout(self.metrics_grid)
+
+        # Optional live performance panel (see attach_performance_metrics)
+        self.performance_labels = {}
+        if self.show_performance:
+            performance_box = QGroupBox('Performance')
+            self.performance_grid = QGridLayout()
+            for i, metric in enumerate(['FPS', 'Frame Latency', 'Dropped Frames']):
+                self._add_performance_row(metric, i)
+            performance_box.setLayout(self.performance_grid)
+            layout.addWidget(performance_box)
         self.setLayout(layout)
 
+    def _add_performance_row(self, metric, row):
+        value = QLabel('--')
+        self.performance_labels[metric] = value
+        self.performance_grid.addWidget(QLabel(f'{metric}:'), row, 0)
+        self.performance_grid.addWidget(value, row, 1)
+
     def update_metrics(self, joint_angles, symmetry_scores, avg_speed):
         left_knee_angle = joint_angles.get('left_knee', '--')
         right_knee_angle = joint_angles.get('right_knee', '--')
@@ -34,4 +53,36 @@ class MetricsDisplayWidget(QWidget):
         self.metrics_labels['Left Knee Angle'].setText(f'{left_knee_angle:.1f}')
         self.metrics_labels['Right Knee Angle'].setText(f'{right_knee_angle:.1f}')
         self.metrics_labels['Symmetry Score'].setText(f'{symmetry:.2f}')
-        self.metrics_labels['Average Speed'].setText(f'{avg_speed:.2f} m/s')
\ No newline at end of file
+        self.metrics_labels['Average Speed'].setText(f'{avg_speed:.2f} m/s')
+
+    def attach_performance_metrics(self, metrics, interval_ms=500):
+        """
+        Poll a PipelineMetrics object (e.g. PoseTracker.metrics) and refresh the performance panel.
+        """
+        self.metrics_source = metrics
+        if self.performance_timer is None:
+            self.performance_timer = QTimer(self)
+            self.performance_timer.timeout.connect(self._refresh_performance)
+        self.performance_timer.start(interval_ms)
+
+    def _refresh_performance(self):
+        if self.metrics_source is not None:
+            self.update_performance(self.metrics_source.snapshot())
+
+    def update_performance(self, snapshot):
+        """
+        Show fps, end-to-end latency, dropped frames and per-stage p50/p95 latency from a metrics snapshot.
+        """
+        if not self.show_performance:
+            return
+        frame = snapshot['frame_latency_ms']
+        self.performance_labels['FPS'].setText(f"{snapshot['fps']:.1f}")
+        if frame['count']:
+            self.performance_labels['Frame Latency'].setText(f"{frame['p50']:.1f} / {frame['p95']:.1f} ms")
+        self.performance_labels['Dropped Frames'].setText(str(sum(snapshot['dropped_frames'].values())))
+        for name, stage in snapshot['stage_latency_ms'].items():
+            if '.' in name or not stage['count']:
+                continue  # Top-level stages only; steps are in the log line and the exporter
+            if name not in self.performance_labels:
+                self._add_performance_row(name, self.performance_grid.rowCount())
+            self.performance_labels[name].setText(f"{stage['p50']:.1f} / {stage['p95']:.1f} ms")
@@ -43,4 +43,11 @@ class SettingsDialog(QDialog):
         self.setLayout(layout)
 
     def save_settings(self):
-        self.accept()
\ No newline at end of file
+        self.accept()
+
+    def audio_feedback_enabled(self):
+        return self.audio_feedback_checkbox.isChecked()
+
+    def feedback_interval(self):
+        """Minimum pause between spoken feedback messages, in seconds."""
+        return self.interval_spinbox.value()
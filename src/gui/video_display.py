@@ -0,0 +1,126 @@
+# src/gui/video_display.py
+import threading
+import cv2
+import numpy as np
+from PyQt5.QtWidgets import QWidget, QSizePolicy
+from PyQt5.QtGui import QImage, QPainter
+from PyQt5.QtCore import Qt
+from utils.visualization_utils import resize_interpolation
+
+# Qt >= 5.14 displays BGR buffers directly; older versions need an RGB conversion in the worker
+BGR_FORMAT = getattr(QImage, 'Format_BGR888', None)
+
+
+class DisplayFrameBuffer:
+    """
+    Triple buffer between the video worker and the GUI thread.
+
+    The worker renders each frame, already scaled to the display size, into the back buffer and
+    publishes it; the GUI takes the most recently published buffer and paints it in place. The
+    worker never writes to the buffer the GUI is painting, so frames cross threads without copies,
+    and frames published before the GUI gets to them are simply overwritten (only the latest is painted).
+    """
+    def __init__(self, width=640, height=480):
+        self._lock = threading.Lock()
+        self.target_size = (width, height)
+        self._buffers = [self._allocate(width, height) for _ in range(3)]
+        self._back, self._ready, self._front = 0, 1, 2
+        self._has_new = False
+        self.published = 0
+        self.painted = 0
+
+    @staticmethod
+    def _allocate(width, height):
+        return np.zeros((height, width, 3), dtype=np.uint8)
+
+    def set_target_size(self, width, height):
+        """
+        Called from the GUI when the display is resized; the worker renders at this size from the next frame on.
+        """
+        with self._lock:
+            self.target_size = (max(1, width), max(1, height))
+
+    def render(self, frame):
+        """
+        Worker side: scale a BGR frame to fill the display (cropping the overflow, like
+        Qt.KeepAspectRatioByExpanding) straight into the back buffer and publish it.
+
+        Returns:
+            bool: True if the GUI had consumed the previous frame, i.e. a repaint needs to be requested.
+        """
+        with self._lock:
+            width, height = self.target_size
+            back = self._buffers[self._back]
+        if back.shape[:2] != (height, width):
+            back = self._allocate(width, height)
+
+        frame_height, frame_width = frame.shape[:2]
+        scale = max(width / frame_width, height / frame_height)
+        crop_width = min(frame_width, int(round(width / scale)))
+        crop_height = min(frame_height, int(round(height / scale)))
+        x0 = (frame_width - crop_width) // 2
+        y0 = (frame_height - crop_height) // 2
+        cv2.resize(frame[y0:y0 + crop_height, x0:x0 + crop_width], (width, height), dst=back,
+                   interpolation=resize_interpolation(scale))
+        if BGR_FORMAT is None:
+            cv2.cvtColor(back, cv2.COLOR_BGR2RGB, dst=back)
+
+        with self._lock:
+            self._buffers[self._back] = back
+            self._back, self._ready = self._ready, self._back
+            request_repaint = not self._has_new
+            self._has_new = True
+            self.published += 1
+        return request_repaint
+
+    def take(self):
+        """
+        GUI side: the latest published frame, or None if nothing new was published since the last call.
+        The returned array stays valid (and unmodified) until the next call.
+        """
+        with self._lock:
+            if not self._has_new:
+                return None
+            self._front, self._ready = self._ready, self._front
+            self._has_new = False
+            self.painted += 1
+            return self._buffers[self._front]
+
+
+class VideoDisplayWidget(QWidget):
+    """
+    Paints frames from a DisplayFrameBuffer directly, without QPixmap conversion or GUI-thread scaling.
+    """
+    def __init__(self, width=640, height=480, parent=None):
+        super().__init__(parent)
+        self.frame_buffer = DisplayFrameBuffer(width, height)
+        self.image = None
+        self._frame = None  # Keeps the array behind self.image alive
+        self.setFixedSize(width, height)
+        self.setSizePolicy(QSizePolicy.Fixed, QSizePolicy.Fixed)
+        self.setAttribute(Qt.WA_OpaquePaintEvent)
+
+    def show_latest(self):
+        """
+        Slot for the worker's frame signal: wrap the newest frame in a QImage (no copy) and repaint.
+        """
+        frame = self.frame_buffer.take()
+        if frame is None:
+            return
+        height, width = frame.shape[:2]
+        image_format = BGR_FORMAT if BGR_FORMAT is not None else QImage.Format_RGB888
+        self._frame = frame
+        self.image = QImage(frame.data, width, height, frame.strides[0], image_format)
+        self.update()
+
+    def resizeEvent(self, event):
+        self.frame_buffer.set_target_size(event.size().width(), event.size().height())
+        super().resizeEvent(event)
+
+    def paintEvent(self, event):
+        painter = QPainter(self)
+        if self.image is None:
+            painter.fillRect(self.rect(), Qt.black)
+        else:
+            painter.drawImage(0, 0, self.image)
+        painter.end()
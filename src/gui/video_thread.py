@@ -0,0 +1,105 @@
+# src/gui/video_thread.py
+import numpy as np
+from PyQt5.QtCore import QThread, pyqtSignal
+from utils.camera_utils import CameraCapture
+
+
+class VideoThread(QThread):
+    """
+    Capture and processing loop of the GUI, off the GUI thread.
+
+    Processed frames are rendered into the display's DisplayFrameBuffer at display size; frame_updated
+    carries no image, it only tells the GUI a new frame is ready and is emitted at most once per
+    painted frame. Analysis results are sent as signals, the discrete ones only when they change.
+    """
+    frame_updated = pyqtSignal()
+    joint_angles_updated = pyqtSignal(dict)
+    rom_status_updated = pyqtSignal(str)
+    rep_count_updated = pyqtSignal(int)
+    activity_updated = pyqtSignal(str)
+    pose_similarity_updated = pyqtSignal(float)
+    motion_metrics_updated = pyqtSignal(dict)
+    symmetry_scores_updated = pyqtSignal(dict)
+
+    def __init__(self, pose_tracker, motion_analyzer, symmetry_analyzer, display_buffer, camera_index=0,
+                 resolution=None, fps=None, fourcc=None, parent=None):
+        """
+        Args:
+            pose_tracker (PoseTracker): Runs pose estimation, biomechanics, feedback and overlays.
+            motion_analyzer (MotionAnalyzer): Landmark velocities for the motion metrics.
+            symmetry_analyzer (SymmetryAnalyzer): Left/right joint angle symmetry.
+            display_buffer (DisplayFrameBuffer): Buffer of the widget the frames are painted on.
+            camera_index (int): OpenCV camera index.
+            resolution (tuple): Requested (width, height) of the camera; its default when None.
+            fps (float): Requested camera frame rate.
+            fourcc (str): Requested camera pixel format, e.g. 'MJPG'.
+        """
+        super().__init__(parent)
+        self.pose_tracker = pose_tracker
+        self.motion_analyzer = motion_analyzer
+        self.symmetry_analyzer = symmetry_analyzer
+        self.display_buffer = display_buffer
+        width, height = resolution or (None, None)
+        # Frames are read on the capture's own thread; processing always takes the freshest one
+        self.capture = CameraCapture(camera_index, width, height, fps, fourcc)
+        self.running = False
+
+    def run(self):
+        try:
+            width, height, fps = self.capture.start()
+        except RuntimeError as e:
+            print(e)
+            return
+        print(f"Camera running at {width}x{height}, {fps:.0f} fps")
+
+        self.running = True
+        last_rom_status = last_rep_count = last_activity = None
+        try:
+            while self.running:
+                captured = self.capture.read(timeout=0.5)
+                if captured is None:
+                    if not self.capture.running:
+                        break
+                    continue
+
+                # Overlays are drawn at the size the frame is displayed at
+                self.pose_tracker.render_size = self.display_buffer.target_size
+                packet = self.pose_tracker.process_packet(captured.frame, captured.timestamp, captured.captured)
+                if self.display_buffer.render(packet.frame):
+                    self.frame_updated.emit()
+
+                joint_angles = {joint: angle for joint, angle in packet.joint_angles.items() if angle is not None}
+                if joint_angles:
+                    self.joint_angles_updated.emit(joint_angles)
+                    self.symmetry_scores_updated.emit(self.symmetry_analyzer.analyze_symmetry(joint_angles))
+                if packet.rom_status != last_rom_status:
+                    last_rom_status = packet.rom_status
+                    self.rom_status_updated.emit(packet.rom_status)
+                if packet.rep_count != last_rep_count:
+                    last_rep_count = packet.rep_count
+                    self.rep_count_updated.emit(packet.rep_count)
+                if packet.activity is not None and packet.activity != last_activity:
+                    last_activity = packet.activity
+                    self.activity_updated.emit(str(packet.activity))
+                if packet.similarity_score is not None:
+                    self.pose_similarity_updated.emit(float(packet.similarity_score))
+                if packet.refined_landmarks is not None:
+                    self.motion_metrics_updated.emit(self._motion_metrics(packet.refined_landmarks))
+        finally:
+            self.running = False
+            self.capture.stop()
+
+    def _motion_metrics(self, landmarks):
+        """
+        Mean and peak landmark speed (normalized image units per second).
+        """
+        self.motion_analyzer.update_landmarks(landmarks)
+        velocities, _ = self.motion_analyzer.get_motion_parameters()
+        if not velocities:
+            return {}
+        speeds = np.linalg.norm(np.array(list(velocities.values())), axis=1)
+        return {'mean_speed': round(float(speeds.mean()), 3), 'peak_speed': round(float(speeds.max()), 3)}
+
+    def stop(self):
+        self.running = False
+        self.wait()
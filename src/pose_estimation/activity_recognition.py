@@ -1,26 +1,141 @@
-import torch
-import torch.nn as nn
+import os
 import numpy as np
+from collections import deque
+from pose_estimation.onnx_backend import (BACKENDS, OnnxModel, cached_onnx_path, check_parity, export_to_onnx,
+                                         load_temporary_export)
 
-class ActivityRecognitionModel(nn.Module):
-    def __init__(self, input_size=68, hidden_size=128, num_layers=2, num_classes=5):
-        super(ActivityRecognitionModel, self).__init__()
-        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
-        self.fc = nn.Linear(hidden_size, num_classes)
+# LSTM geometry
+INPUT_SIZE = 68  # 34 keypoints (x, y)
+HIDDEN_SIZE = 128
+NUM_LAYERS = 2
 
-    def forward(self, x):
-        h_lstm, _ = self.lstm(x)
-        out = self.fc(h_lstm[:, -1, :])
-        return out
+def softmax(logits):
+    exp = np.exp(logits - logits.max(axis=-1, keepdims=True))
+    return exp / exp.sum(axis=-1, keepdims=True)
+
+def smoothed_label(recent_probabilities, probabilities):
+    """
+    Add one prediction's class probabilities to a bounded history (a deque with maxlen) and
+    return the most likely label of the averaged history.
+    """
+    recent_probabilities.append(probabilities)
+    return int(np.argmax(np.mean(recent_probabilities, axis=0)))
 
 class ActivityRecognizer:
-    def __init__(self, model_path=None, num_classes=5):
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model = ActivityRecognitionModel(num_classes=num_classes).to(self.device)
+    def __init__(self, model_path=None, num_classes=5, backend='torch', onnx_path=None, num_threads=None,
+                 smoothing_window=15):
+        """
+        Input:
+            - model_path: Optional trained weights (.pth)
+            - num_classes: Number of activity classes
+            - backend: Inference backend, 'torch' or 'onnx'
+            - onnx_path: Exported ONNX graph; exported from the PyTorch model on first use if missing.
+              Defaults to a cache file keyed by the weights and num_classes; without model_path
+              (untrained weights) the graph is exported for this instance only
+            - num_threads: onnxruntime intra-op threads (defaults to half the cores)
+            - smoothing_window: Number of streaming predictions averaged into the reported label
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unsupported inference backend: {backend}")
+        self.backend = backend
+        self.num_classes = num_classes
+        self.model = None
+        self.onnx_model = None
+        self.input_size = INPUT_SIZE
+        self.hidden_size = HIDDEN_SIZE
+        self.num_layers = NUM_LAYERS
+
+        # torch is only imported on the PyTorch and export paths; a cached graph runs without it
+        if backend == 'onnx' and onnx_path is None and not model_path:
+            self._load_torch_model(None, "cpu")
+            self.onnx_model = load_temporary_export(self.export_onnx, num_threads)
+        elif backend == 'onnx':
+            onnx_path = onnx_path or cached_onnx_path('activity_recognition_stateful', model_path,
+                                                      num_classes=num_classes, input_size=INPUT_SIZE,
+                                                      hidden_size=HIDDEN_SIZE, num_layers=NUM_LAYERS)
+            if not os.path.exists(onnx_path):
+                self._load_torch_model(model_path, "cpu")
+                self.export_onnx(onnx_path)
+            self.onnx_model = OnnxModel(onnx_path, num_threads)
+        else:
+            self._load_torch_model(model_path)
+
+        # Streaming state
+        self.smoothing_window = smoothing_window
+        self.reset_stream()
+
+    def _load_torch_model(self, model_path, device=None):
+        import torch
+        from pose_estimation.activity_recognition_model import ActivityRecognitionModel
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        self.model = ActivityRecognitionModel(num_classes=self.num_classes).to(self.device)
         if model_path:
             self.model.load_state_dict(torch.load(model_path, map_location=self.device))
-            self.model.eval()
-        self.num_classes = num_classes
+        self.model.eval()
+
+    def export_onnx(self, path, verify=True):
+        """
+        Export the PyTorch model to ONNX with the LSTM state as explicit inputs and outputs
+        (batch and sequence length are dynamic).
+        With verify, the export is checked for numerical parity against PyTorch.
+        """
+        import torch
+        from pose_estimation.activity_recognition_model import StatefulActivityModel
+        self.model.to("cpu")
+        stateful = StatefulActivityModel(self.model).eval()
+        h0, c0 = self.initial_state(2)
+        sample = (torch.randn(2, 8, self.input_size), torch.from_numpy(h0), torch.from_numpy(c0))
+        export_to_onnx(stateful, sample, path, input_names=['keypoints', 'h0', 'c0'],
+                       output_names=['logits', 'hn', 'cn'],
+                       dynamic_axes={'keypoints': {0: 'batch', 1: 'sequence'}, 'h0': {1: 'batch'},
+                                     'c0': {1: 'batch'}, 'logits': {0: 'batch'}, 'hn': {1: 'batch'},
+                                     'cn': {1: 'batch'}})
+        if verify:
+            check_parity(stateful, OnnxModel(path, num_threads=1), sample)
+        self.model.to(self.device)
+        return path
+
+    def initial_state(self, batch_size=1):
+        """
+        Zero LSTM state (h, c), each of shape (num_layers, batch_size, hidden_size).
+        """
+        shape = (self.num_layers, batch_size, self.hidden_size)
+        return np.zeros(shape, dtype=np.float32), np.zeros(shape, dtype=np.float32)
+
+    def keypoints_from_pose(self, landmarks):
+        """
+        Flatten the (x, y) coordinates of a PoseFrame into a model input vector,
+        zero-padded to the LSTM input size.
+        """
+        features = np.zeros(self.input_size, dtype=np.float32)
+        keypoints = landmarks.xy.reshape(-1)[:self.input_size]
+        features[:len(keypoints)] = keypoints
+        return features
+
+    def infer(self, sequences, state=None):
+        """
+        Run the recognizer on a batch of keypoint sequences.
+        Input:
+            - sequences: Numpy array (batch x sequence_length x input_size)
+            - state: Optional (h, c) state to continue from; zeros when None
+        Returns:
+            - logits: Numpy array (batch x num_classes)
+            - state: Final (h, c) state
+        """
+        sequences = np.ascontiguousarray(sequences, dtype=np.float32)
+        if state is None:
+            state = self.initial_state(len(sequences))
+
+        if self.onnx_model is not None:
+            logits, h, c = self.onnx_model.run(sequences, *state)
+            return logits, (h, c)
+
+        import torch
+        with torch.no_grad():
+            inputs = torch.from_numpy(sequences).to(self.device)
+            h0, c0 = (torch.from_numpy(np.asarray(s, dtype=np.float32)).to(self.device) for s in state)
+            logits, (h, c) = self.model.forward_step(inputs, (h0, c0))
+        return logits.cpu().numpy(), (h.cpu().numpy(), c.cpu().numpy())
 
     def predict_activity(self, keypoints_sequence):
         """
@@ -29,8 +144,56 @@ class ActivityRecognizer:
         Returns:
             - Predicted activity label (class index)
         """
-        with torch.no_grad():
-            input_tensor = torch.tensor(keypoints_sequence, dtype=torch.float32).unsqueeze(0).to(self.device)
-            outputs = self.model(input_tensor)
-            _, predicted = torch.max(outputs, 1)
-        return predicted.item()
\ No newline at end of file
+        logits, _ = self.infer(np.asarray(keypoints_sequence, dtype=np.float32)[None])
+        return int(np.argmax(logits, axis=1)[0])
+
+    def predict_windows(self, keypoints, window_size=30, stride=15, batch_size=64):
+        """
+        Windowed batch mode for offline clips.
+        Input:
+            - keypoints: Numpy array (num_frames x input_size) for a whole clip
+            - window_size: Frames per window
+            - stride: Frames between window starts
+            - batch_size: Windows per forward pass
+        Returns:
+            - labels: Numpy array (num_windows,) of class indices
+            - window_starts: Numpy array (num_windows,) of first-frame indices
+        """
+        keypoints = np.asarray(keypoints, dtype=np.float32)
+        if len(keypoints) == 0:
+            return np.zeros(0, dtype=int), np.zeros(0, dtype=int)
+        if len(keypoints) < window_size:
+            # Clips shorter than one window are classified as a single window
+            return np.array([self.predict_activity(keypoints)]), np.array([0])
+
+        windows = np.lib.stride_tricks.sliding_window_view(keypoints, window_size, axis=0)[::stride]
+        windows = windows.transpose(0, 2, 1)  # (num_windows, window_size, input_size)
+        labels = [np.argmax(self.infer(windows[i:i + batch_size])[0], axis=1)
+                  for i in range(0, len(windows), batch_size)]
+        return np.concatenate(labels), np.arange(len(windows)) * stride
+
+    def reset_stream(self):
+        """
+        Forget the streaming LSTM state and the label history.
+        """
+        self.stream_state = None
+        self.recent_probabilities = deque(maxlen=self.smoothing_window)
+
+    def smooth_prediction(self, probabilities):
+        """
+        Average the class probabilities over the last `smoothing_window` predictions
+        and return the most likely label.
+        """
+        return smoothed_label(self.recent_probabilities, probabilities)
+
+    def predict_step(self, keypoints):
+        """
+        Streaming mode: advance the LSTM by one frame, carrying (h, c) across calls.
+        Input:
+            - keypoints: Numpy array (input_size,) for the newest frame
+        Returns:
+            - Smoothed activity label (class index)
+        """
+        logits, self.stream_state = self.infer(np.asarray(keypoints, dtype=np.float32).reshape(1, 1, -1),
+                                               self.stream_state)
+        return self.smooth_prediction(softmax(logits)[0])
@@ -0,0 +1,34 @@
+import torch.nn as nn
+from pose_estimation.activity_recognition import HIDDEN_SIZE, INPUT_SIZE, NUM_LAYERS
+
+
+class ActivityRecognitionModel(nn.Module):
+    def __init__(self, input_size=INPUT_SIZE, hidden_size=HIDDEN_SIZE, num_layers=NUM_LAYERS, num_classes=5):
+        super(ActivityRecognitionModel, self).__init__()
+        self.lstm = nn.LSTM(input_size, hidden_size, num_layers, batch_first=True)
+        self.fc = nn.Linear(hidden_size, num_classes)
+
+    def forward(self, x):
+        h_lstm, _ = self.lstm(x)
+        out = self.fc(h_lstm[:, -1, :])
+        return out
+
+    def forward_step(self, x, state=None):
+        """
+        Run the LSTM from an explicit (h, c) state and return the logits and the final state.
+        """
+        h_lstm, state = self.lstm(x, state)
+        return self.fc(h_lstm[:, -1, :]), state
+
+class StatefulActivityModel(nn.Module):
+    """
+    Export wrapper exposing the LSTM state as graph inputs/outputs: (x, h0, c0) -> (logits, hn, cn).
+    A zero state gives windowed inference; feeding hn/cn back gives streaming inference.
+    """
+    def __init__(self, model):
+        super(StatefulActivityModel, self).__init__()
+        self.model = model
+
+    def forward(self, x, h0, c0):
+        logits, (hn, cn) = self.model.forward_step(x, (h0, c0))
+        return logits, hn, cn
@@ -1,17 +1,72 @@
-import torch
+import os
 import cv2
 import numpy as np
-from torchvision.transforms import Compose, ToTensor, Resize
+from pose_estimation.model_cache import MIDAS_REPO, load_hub_model
+from pose_estimation.onnx_backend import BACKENDS, OnnxModel, check_parity, default_onnx_path, export_to_onnx
+
+# Native input resolution of the supported MiDaS variants
+MIDAS_INPUT_SIZES = {
+    'DPT_Large': 384,
+    'DPT_Hybrid': 384,
+    'MiDaS_small': 256,
+}
 
 class DepthEstimator:
-    def __init__(self, model_type='DPT_Large'):
-        # Load the MiDaS model for depth estimation
-        self.model = torch.hub.load("intel-isl/MiDaS", model_type)
+    def __init__(self, model_type='DPT_Large', input_size=None, backend='torch', onnx_path=None, num_threads=None):
+        """
+        Input:
+            - model_type: MiDaS variant loaded through torch.hub ('DPT_Large', 'DPT_Hybrid' or 'MiDaS_small')
+            - input_size: Square network input resolution; defaults to the variant's native size.
+              Smaller sizes (multiples of 32) trade detail for speed.
+            - backend: Inference backend, 'torch' or 'onnx'
+            - onnx_path: Exported ONNX graph; exported from the PyTorch model on first use if missing
+            - num_threads: onnxruntime intra-op threads (defaults to half the cores)
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unsupported inference backend: {backend}")
+        if model_type not in MIDAS_INPUT_SIZES:
+            raise ValueError(f"Unsupported MiDaS model type: {model_type}")
+        self.model_type = model_type
+        self.input_size = input_size or MIDAS_INPUT_SIZES[model_type]
+        self.depth_map = None  # Most recent depth map, reused by point lookups
+        self.backend = backend
+        self.model = None
+        self.onnx_model = None
+
+        # torch is only imported on the PyTorch and export paths; a cached graph runs without it
+        if backend == 'onnx':
+            onnx_path = onnx_path or default_onnx_path(f"midas_{model_type.lower()}_{self.input_size}")
+            if not os.path.exists(onnx_path):
+                self._load_torch_model()
+                self.export_onnx(onnx_path)
+            self.onnx_model = OnnxModel(onnx_path, num_threads)
+        else:
+            self._load_torch_model()
+
+    def _load_torch_model(self):
+        # Load the MiDaS model for depth estimation (from the local torch.hub cache when available)
+        self.model = load_hub_model(MIDAS_REPO, self.model_type)
         self.model.eval()
-        self.transforms = Compose([
-            Resize((384, 384)),
-            ToTensor()
-        ])
+
+    def export_onnx(self, path, verify=True):
+        """
+        Export the MiDaS model to ONNX at the configured input resolution.
+        With verify, the export is checked for numerical parity against PyTorch.
+        """
+        import torch
+        sample = (torch.rand(1, 3, self.input_size, self.input_size),)
+        export_to_onnx(self.model, sample, path, input_names=['image'], output_names=['depth'])
+        if verify:
+            check_parity(self.model, OnnxModel(path, num_threads=1), sample, rtol=1e-2, atol=1e-2)
+        return path
+
+    def _preprocess(self, frame):
+        """
+        Convert a BGR frame to a (1, 3, H, W) float32 RGB array in [0, 1] at the network resolution.
+        """
+        img = cv2.resize(frame, (self.input_size, self.input_size), interpolation=cv2.INTER_AREA)
+        img_rgb = cv2.cvtColor(img, cv2.COLOR_BGR2RGB)
+        return (img_rgb.astype(np.float32) / 255.0).transpose(2, 0, 1)[None]
 
     def estimate_depth(self, frame):
         """
@@ -21,19 +76,48 @@ class DepthEstimator:
         Returns:
             - depth_map: Numpy array (grayscale depth map)
         """
-        img_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        input_tensor = self.transforms(img_rgb).unsqueeze(0)
-        with torch.no_grad():
-            depth_map = self.model(input_tensor).squeeze().numpy()
+        input_array = self._preprocess(frame)
+        if self.onnx_model is not None:
+            depth_map = self.onnx_model.run(input_array)[0].squeeze()
+        else:
+            import torch
+            with torch.no_grad():
+                depth_map = self.model(torch.from_numpy(input_array)).squeeze().numpy()
+        self.depth_map = depth_map
         return depth_map
 
+    def sample_depth(self, points, depth_map=None, frame=None):
+        """
+        Look up the depth at many normalized image points with a single vectorized gather.
+        Input:
+            - points: Array (N x 2+) of normalized (x, y) coordinates, e.g. PoseFrame.xy
+            - depth_map: Depth map to sample; defaults to the cached map of the last estimate
+            - frame: BGR frame to estimate a new map from (when no depth_map is given)
+        Returns:
+            - depths: Numpy array (N,) of depth values (NaN when no depth map is available)
+        """
+        if depth_map is None:
+            depth_map = self.depth_map if frame is None else self.estimate_depth(frame)
+        points = np.asarray(points)
+        if depth_map is None:
+            return np.full(len(points), np.nan, dtype=np.float32)
+
+        height, width = depth_map.shape
+        # Normalized coordinates are mapped to map pixels and clamped to the image bounds
+        cols = np.clip((points[:, 0] * width).astype(np.intp), 0, width - 1)
+        rows = np.clip((points[:, 1] * height).astype(np.intp), 0, height - 1)
+        return depth_map[rows, cols]
+
+    def sample_landmark_depth(self, landmarks, depth_map=None, frame=None):
+        """
+        Depth at every landmark of a PoseFrame, sampled in one gather.
+        """
+        return self.sample_depth(landmarks.xy, depth_map, frame)
+
     def get_depth_at_point(self, frame, x, y):
         """
         Given a 2D point (x, y) from the pose landmarks, return the corresponding depth value.
+        Depth is estimated from `frame`; pass frame=None to read the cached map of the last estimate
+        (NaN if there is none).
         """
-        depth_map = self.estimate_depth(frame)
-        height, width = depth_map.shape
-        # Normalize the coordinates
-        x = int(x * width)
-        y = int(y * height)
-        return depth_map[y, x]
\ No newline at end of file
+        return self.sample_depth([(x, y)], frame=frame)[0]
@@ -0,0 +1,223 @@
+import itertools
+import queue
+import threading
+from collections import deque
+
+# Queue overflow policies
+DROP_OLDEST = 'drop_oldest'
+BLOCK = 'block'
+
+# Sentinel used to shut down stage workers
+_STOP = object()
+
+# Seconds a worker waits on a full 'block' queue before re-checking that the pipeline still runs
+_PUT_POLL_INTERVAL = 0.1
+
+
+class FrameQueue:
+    """
+    Bounded FIFO queue between two pipeline stages.
+
+    With the 'drop_oldest' policy a full queue discards its oldest item to make room,
+    so consumers always work on the freshest frames. With 'block' producers wait instead.
+    """
+    def __init__(self, maxsize=2, policy=DROP_OLDEST):
+        """
+        Initialize the queue.
+
+        Args:
+            maxsize (int): Maximum number of queued items.
+            policy (str): Overflow policy. Options: ['drop_oldest', 'block'].
+        """
+        if policy not in (DROP_OLDEST, BLOCK):
+            raise ValueError(f"Unsupported queue policy: {policy}")
+        self.maxsize = maxsize
+        self.policy = policy
+        self.dropped = 0
+        self._items = deque()
+        self._lock = threading.Lock()
+        self._not_empty = threading.Condition(self._lock)
+        self._not_full = threading.Condition(self._lock)
+
+    def put(self, item, timeout=None):
+        """
+        Add an item to the queue.
+
+        Args:
+            item: Item to enqueue.
+            timeout (float): Maximum time to wait for space with the 'block' policy.
+
+        Returns:
+            bool: False if the item could not be queued before the timeout.
+        """
+        with self._lock:
+            if self.policy == BLOCK:
+                if not self._not_full.wait_for(lambda: len(self._items) < self.maxsize, timeout):
+                    return False
+            elif len(self._items) >= self.maxsize:
+                self._items.popleft()
+                self.dropped += 1
+            self._items.append(item)
+            self._not_empty.notify()
+            return True
+
+    def put_control(self, item):
+        """
+        Enqueue a control item (e.g. a stop sentinel) regardless of the queue size.
+        """
+        with self._lock:
+            self._items.append(item)
+            self._not_empty.notify_all()
+
+    def get(self, timeout=None):
+        """
+        Remove and return the oldest item.
+
+        Args:
+            timeout (float): Maximum time to wait for an item. None waits forever.
+
+        Raises:
+            queue.Empty: If no item arrived before the timeout.
+        """
+        with self._lock:
+            if not self._not_empty.wait_for(lambda: self._items, timeout):
+                raise queue.Empty
+            item = self._items.popleft()
+            self._not_full.notify()
+            return item
+
+    def clear(self):
+        """
+        Discard all queued items.
+        """
+        with self._lock:
+            self._items.clear()
+            self._not_full.notify_all()
+
+    def __len__(self):
+        with self._lock:
+            return len(self._items)
+
+
+class FramePipeline:
+    """
+    Multi-stage frame pipeline with bounded queues between stages.
+
+    Each stage is a callable that takes the item produced by the previous stage and returns
+    the item for the next one (or None to drop it). Every stage runs on its own worker
+    thread(s), so stage latencies overlap instead of adding up. The heavy stages (OpenCV,
+    MediaPipe, PyTorch) release the GIL while they run.
+
+    Stages that keep state between frames (tracking, smoothing, rep counting) must use a single
+    worker. Stateless stages may use several workers; items that finish out of order are
+    discarded at the output so results never go backwards in time.
+    """
+    def __init__(self, stages, queue_size=2, drop_policy=DROP_OLDEST):
+        """
+        Initialize the pipeline.
+
+        Args:
+            stages (list): Sequence of (name, func) or (name, func, workers) tuples.
+            queue_size (int): Capacity of each inter-stage queue.
+            drop_policy (str): Overflow policy of the queues. Options: ['drop_oldest', 'block'].
+        """
+        self.stages = [(stage[0], stage[1], stage[2] if len(stage) > 2 else 1) for stage in stages]
+        self.queue_size = queue_size
+        self.drop_policy = drop_policy
+        # queues[i] feeds stage i; the last queue holds finished results
+        self.queues = [FrameQueue(queue_size, drop_policy) for _ in range(len(self.stages) + 1)]
+        self.threads = []
+        self.running = False
+        self._sequence = itertools.count()
+        self._last_result = -1
+
+    def start(self):
+        """
+        Start the stage worker threads.
+        """
+        if self.running:
+            return
+        self.running = True
+        for idx, (name, func, workers) in enumerate(self.stages):
+            for worker in range(workers):
+                thread = threading.Thread(target=self._run_stage, args=(idx, name, func),
+                                          name=f"pipeline-{name}-{worker}", daemon=True)
+                thread.start()
+                self.threads.append(thread)
+
+    def stop(self, timeout=1.0):
+        """
+        Stop all workers and discard queued items.
+        """
+        if not self.running:
+            return
+        self.running = False
+        # Clear every queue first (the output too) so no worker stays blocked on a full 'block' queue
+        for frame_queue in self.queues:
+            frame_queue.clear()
+        for idx, (_, _, workers) in enumerate(self.stages):
+            for _ in range(workers):
+                self.queues[idx].put_control(_STOP)
+        for thread in self.threads:
+            thread.join(timeout)
+        self.threads = []
+        # A stage may have queued one last item behind the stop sentinels; do not leave it for a restart
+        for frame_queue in self.queues:
+            frame_queue.clear()
+
+    def submit(self, item, timeout=None):
+        """
+        Feed a new item (typically a captured frame) into the first stage.
+
+        Returns:
+            bool: False if the pipeline is not running or the item could not be queued.
+        """
+        if not self.running:
+            return False
+        return self.queues[0].put((next(self._sequence), item), timeout)
+
+    def get_result(self, timeout=None):
+        """
+        Return the next finished item, or None if nothing finished before the timeout.
+        """
+        while True:
+            try:
+                sequence, item = self.queues[-1].get(timeout)
+            except queue.Empty:
+                return None
+            if sequence > self._last_result:
+                self._last_result = sequence
+                return item
+
+    def queue_depths(self):
+        """
+        Number of items waiting in front of each stage (and in the output queue).
+        """
+        depths = {name: len(self.queues[idx]) for idx, (name, _, _) in enumerate(self.stages)}
+        depths['output'] = len(self.queues[-1])
+        return depths
+
+    def dropped_frames(self):
+        """
+        Number of items dropped by each queue's overflow policy.
+        """
+        dropped = {name: self.queues[idx].dropped for idx, (name, _, _) in enumerate(self.stages)}
+        dropped['output'] = self.queues[-1].dropped
+        return dropped
+
+    def _run_stage(self, idx, name, func):
+        in_queue, out_queue = self.queues[idx], self.queues[idx + 1]
+        while True:
+            entry = in_queue.get()
+            if entry is _STOP:
+                break
+            sequence, item = entry
+            try:
+                result = func(item)
+            except Exception as e:
+                print(f"Pipeline stage '{name}' failed: {e}")
+                continue
+            if result is None:
+                continue
+            while self.running and not out_queue.put((sequence, result), _PUT_POLL_INTERVAL):
+                pass
@@ -0,0 +1,65 @@
+import numpy as np
+
+# Resolution of the landmark heatmaps fed to the pose refinement network
+HEATMAP_SIZE = 64
+
+# Radius of each landmark disc, in pixels of the source frame
+HEATMAP_RADIUS = 10
+
+
+def landmark_heatmaps(points, frame_size, radius=HEATMAP_RADIUS, size=HEATMAP_SIZE):
+    """
+    Rasterize landmark discs directly at network resolution.
+
+    Equivalent to drawing filled circles of `radius` frame pixels on a full-resolution image and
+    area-resizing it to size x size, without allocating the full-resolution image. The discs become
+    ellipses on the square grid. Discs spanning at least one grid pixel get edges anti-aliased over
+    one grid pixel; smaller ones (frames much wider than size * radius, e.g. 1280 px and up at the
+    defaults) are spread over the pixels they overlap by area, so each keeps the mass it has in the
+    area-resized image instead of a ramp wider than the disc itself.
+
+    Args:
+        points (np.ndarray): Normalized landmark (x, y) coordinates, shape (N, 2) or (B, N, 2).
+        frame_size (tuple): (width, height) of the frame the landmarks come from.
+        radius (float): Disc radius in frame pixels.
+        size (int): Heatmap resolution.
+
+    Returns:
+        np.ndarray: float32 heatmaps in [0, 1], shape (size, size) or (B, size, size).
+    """
+    points = np.asarray(points, dtype=np.float32)
+    single = points.ndim == 2
+    if single:
+        points = points[None]
+    width, height = frame_size
+    radius_x = radius * size / width
+    radius_y = radius * size / height
+
+    if 0.5 * (radius_x + radius_y) < 1.0:
+        heatmaps = _coverage_heatmaps(points, radius_x, radius_y, size)
+    else:
+        heatmaps = _ramp_heatmaps(points, radius_x, radius_y, size)
+    np.nan_to_num(heatmaps, copy=False)  # Frames without any landmark
+    return heatmaps[0] if single else heatmaps
+
+
+def _ramp_heatmaps(points, radius_x, radius_y, size):
+    grid = np.arange(size, dtype=np.float32) + 0.5  # Pixel centers
+    dx = (grid - points[..., 0:1] * size) / radius_x  # (B, N, size)
+    dy = (grid - points[..., 1:2] * size) / radius_y
+    # Distance of every pixel to its nearest landmark, in units of the disc radius
+    distance = np.sqrt(np.fmin.reduce(dy[..., :, None] ** 2 + dx[..., None, :] ** 2, axis=1))
+    return np.clip(0.5 + (1.0 - distance) * (0.5 * (radius_x + radius_y)), 0.0, 1.0)
+
+
+def _coverage_heatmaps(points, radius_x, radius_y, size):
+    # Sub-pixel discs: an axis-aligned box of the same area, whose coverage of each grid pixel is
+    # the product of its overlaps with the pixel's row and column
+    half_x = radius_x * float(np.sqrt(np.pi)) / 2
+    half_y = radius_y * float(np.sqrt(np.pi)) / 2
+    edges = np.arange(size, dtype=np.float32)  # Left/top pixel edges
+    x = points[..., 0:1] * size  # (B, N, 1)
+    y = points[..., 1:2] * size
+    overlap_x = np.clip(np.minimum(x + half_x, edges + 1) - np.maximum(x - half_x, edges), 0.0, 1.0)
+    overlap_y = np.clip(np.minimum(y + half_y, edges + 1) - np.maximum(y - half_y, edges), 0.0, 1.0)
+    return np.fmax.reduce(overlap_y[..., :, None] * overlap_x[..., None, :], axis=1)
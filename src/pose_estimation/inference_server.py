@@ -0,0 +1,236 @@
+import queue
+import threading
+import time
+import numpy as np
+from collections import deque
+from concurrent.futures import Future
+from pose_estimation.activity_recognition import ActivityRecognizer, smoothed_label, softmax
+from pose_estimation.pose_refinement import PoseRefiner, ema
+
+# Sentinel used to shut down batcher threads
+_STOP = object()
+
+# Seconds a client waits for its batched result before giving up
+DEFAULT_REQUEST_TIMEOUT = 5.0
+
+
+class MicroBatcher:
+    """
+    Collects requests from many callers and runs them through one batched function.
+
+    A batch is dispatched as soon as it is full or when the oldest request has waited
+    `max_latency_ms`, whichever comes first. Each caller gets a Future for its own result.
+    Once stopped, pending and new requests fail with RuntimeError instead of waiting forever.
+    """
+    def __init__(self, batch_fn, max_batch_size=16, max_latency_ms=5.0, name='batcher'):
+        """
+        Args:
+            batch_fn (callable): Takes a list of request items, returns a list of results in the same order.
+            max_batch_size (int): Maximum number of requests per batch.
+            max_latency_ms (float): Maximum time the first request of a batch waits for more requests.
+            name (str): Worker thread name.
+        """
+        self.batch_fn = batch_fn
+        self.max_batch_size = max_batch_size
+        self.max_latency = max_latency_ms / 1000.0
+        self.name = name
+        self.requests = queue.Queue()
+        self.thread = None
+        self.lock = threading.Lock()
+        self.stopped = False
+        self.batches = 0
+        self.items = 0
+
+    def start(self):
+        with self.lock:
+            self.stopped = False
+            if self.thread is None:
+                self.thread = threading.Thread(target=self._run, name=self.name, daemon=True)
+                self.thread.start()
+
+    def stop(self, timeout=1.0):
+        """
+        Stop the worker after the requests queued so far, then fail whatever it did not get to.
+        """
+        with self.lock:
+            self.stopped = True
+            if self.thread is not None:
+                self.requests.put(_STOP)
+        if self.thread is not None:
+            self.thread.join(timeout)
+            self.thread = None
+        error = RuntimeError(f"{self.name} is stopped")
+        while True:
+            try:
+                request = self.requests.get_nowait()
+            except queue.Empty:
+                break
+            if request is not _STOP:
+                request[1].set_exception(error)
+
+    def submit(self, item):
+        """
+        Queue a request.
+
+        Returns:
+            concurrent.futures.Future: Resolves to the result for this item.
+
+        Raises:
+            RuntimeError: If the batcher is stopped.
+        """
+        future = Future()
+        with self.lock:
+            if self.stopped:
+                raise RuntimeError(f"{self.name} is stopped")
+            self.requests.put((item, future))
+        return future
+
+    def mean_batch_size(self):
+        return self.items / self.batches if self.batches else 0.0
+
+    def _run(self):
+        while True:
+            request = self.requests.get()
+            if request is _STOP:
+                break
+            batch = [request]
+            deadline = time.monotonic() + self.max_latency
+            stopping = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    request = self.requests.get(timeout=remaining)
+                except queue.Empty:
+                    break
+                if request is _STOP:
+                    stopping = True
+                    break
+                batch.append(request)
+
+            self._dispatch(batch)
+            if stopping:
+                break
+
+    def _dispatch(self, batch):
+        items = [item for item, _ in batch]
+        try:
+            results = self.batch_fn(items)
+        except Exception as e:
+            for _, future in batch:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.items += len(batch)
+        for (_, future), result in zip(batch, results):
+            future.set_result(result)
+
+
+class InferenceServer:
+    """
+    Shared in-process inference service for the activity and refinement models.
+
+    One copy of each model serves every PoseTracker in the process. Requests from all
+    sessions are micro-batched, and each session keeps its own streaming state through
+    a lightweight client object.
+    """
+    def __init__(self, activity_model_path=None, pose_refinement_model_path=None, backend='torch',
+                 num_threads=None, max_batch_size=16, max_latency_ms=5.0):
+        """
+        Args:
+            activity_model_path: Optional weights for the activity recognizer.
+            pose_refinement_model_path: Optional weights for the pose refiner.
+            backend (str): 'torch' or 'onnx'.
+            num_threads (int): onnxruntime intra-op threads per model.
+            max_batch_size (int): Maximum requests per batched forward pass.
+            max_latency_ms (float): Maximum time a request waits for a batch to fill.
+        """
+        self.activity_recognizer = ActivityRecognizer(activity_model_path, backend=backend, num_threads=num_threads)
+        self.pose_refiner = PoseRefiner(pose_refinement_model_path, backend=backend, num_threads=num_threads)
+        self.activity_batcher = MicroBatcher(self._activity_batch, max_batch_size, max_latency_ms,
+                                             name='inference-activity')
+        self.refinement_batcher = MicroBatcher(self._refinement_batch, max_batch_size, max_latency_ms,
+                                               name='inference-refinement')
+        self.start()
+
+    def start(self):
+        self.activity_batcher.start()
+        self.refinement_batcher.start()
+
+    def stop(self):
+        self.activity_batcher.stop()
+        self.refinement_batcher.stop()
+
+    def activity_client(self, smoothing_window=15):
+        """
+        Per-session activity recognizer backed by the shared model.
+        """
+        return ActivityClient(self, smoothing_window)
+
+    def refiner_client(self, alpha=0.9):
+        """
+        Per-session pose refiner backed by the shared model.
+        """
+        return RefinerClient(self, alpha)
+
+    def _activity_batch(self, requests):
+        """
+        One streaming LSTM step for every session in the batch.
+        Each request is (keypoints, state) with state None for a fresh stream.
+        """
+        recognizer = self.activity_recognizer
+        keypoints = np.stack([features for features, _ in requests])[:, None, :]
+        zero_h, zero_c = recognizer.initial_state(1)
+        h0 = np.concatenate([zero_h if state is None else state[0] for _, state in requests], axis=1)
+        c0 = np.concatenate([zero_c if state is None else state[1] for _, state in requests], axis=1)
+        logits, (h, c) = recognizer.infer(keypoints, (h0, c0))
+        return [(logits[i], (h[:, i:i + 1], c[:, i:i + 1])) for i in range(len(requests))]
+
+    def _refinement_batch(self, heatmaps):
+        return list(self.pose_refiner.infer_batch(heatmaps))
+
+
+class ActivityClient:
+    """
+    Session view of the shared activity model, with the same streaming API as ActivityRecognizer.
+    """
+    def __init__(self, server, smoothing_window=15):
+        self.server = server
+        self.smoothing_window = smoothing_window
+        self.reset_stream()
+
+    def keypoints_from_pose(self, landmarks):
+        return self.server.activity_recognizer.keypoints_from_pose(landmarks)
+
+    def reset_stream(self):
+        self.stream_state = None
+        self.recent_probabilities = deque(maxlen=self.smoothing_window)
+
+    def predict_step(self, keypoints, timeout=DEFAULT_REQUEST_TIMEOUT):
+        """
+        Advance this session's LSTM state by one frame through the shared batcher.
+        Returns the smoothed activity label. Raises concurrent.futures.TimeoutError if the
+        server does not answer within `timeout` seconds, and RuntimeError once it is stopped.
+        """
+        future = self.server.activity_batcher.submit((np.asarray(keypoints, dtype=np.float32), self.stream_state))
+        logits, self.stream_state = future.result(timeout)
+        return smoothed_label(self.recent_probabilities, softmax(logits))
+
+
+class RefinerClient:
+    """
+    Session view of the shared refinement model, with the same API as PoseRefiner.
+    """
+    def __init__(self, server, alpha=0.9):
+        self.server = server
+        self.alpha = alpha  # EMA smoothing factor
+        self.prev_keypoints = None
+
+    def refine_pose(self, heatmap, timeout=DEFAULT_REQUEST_TIMEOUT):
+        """
+        Refine one frame's heatmap through the shared batcher (see ActivityClient.predict_step for errors).
+        """
+        refined_points = self.server.refinement_batcher.submit(heatmap).result(timeout)
+        self.prev_keypoints = ema(self.prev_keypoints, refined_points, self.alpha)
+        return self.prev_keypoints
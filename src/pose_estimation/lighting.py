@@ -0,0 +1,133 @@
+import cv2
+import numpy as np
+
+LIGHTING_METHODS = ('equalize', 'clahe', None)
+
+
+class LightingNormalizer:
+    """
+    Lighting normalization before pose estimation, without full-resolution color conversions.
+
+    'equalize' (the default) computes a histogram-equalization curve from a small luma thumbnail
+    of the captured frame (see update()). The curve is cached and only recomputed when the scene
+    brightness or contrast drifts (or every `refresh_interval` frames), which also keeps it from
+    flickering frame to frame. 'clahe' uses contrast-limited adaptive equalization instead.
+
+    Either is applied to the luma (Y of YUV) of the model input only, so colors keep their hue and
+    saturation, and the frame shown to the user is left as captured. The model input is the frame
+    downscaled to at most `model_input_size` pixels on its longest side and converted at that
+    size; BlazePose resizes to its own low network resolution anyway, so nothing is lost by not
+    converting the full frame.
+    """
+    def __init__(self, method='equalize', analysis_width=160, drift_threshold=6.0, refresh_interval=30,
+                 model_input_size=640, clip_limit=2.0, tile_grid_size=(8, 8)):
+        """
+        Args:
+            method (str): 'equalize', 'clahe' or None (no normalization).
+            analysis_width (int): Width of the luma thumbnail the equalization curve is computed on.
+            drift_threshold (float): Change of the thumbnail's mean or standard deviation (gray levels)
+                that triggers recomputing the curve.
+            refresh_interval (int): Recompute the curve at least every N frames (0 disables).
+            model_input_size (int): Longest side of the model input. None keeps the capture resolution.
+            clip_limit (float): CLAHE contrast limit.
+            tile_grid_size (tuple): CLAHE tile grid.
+        """
+        if method not in LIGHTING_METHODS:
+            raise ValueError(f"Unsupported lighting method: {method}")
+        self.method = method
+        self.analysis_width = analysis_width
+        self.drift_threshold = drift_threshold
+        self.refresh_interval = refresh_interval
+        self.model_input_size = model_input_size
+        self.clahe = cv2.createCLAHE(clipLimit=clip_limit, tileGridSize=tile_grid_size) if method == 'clahe' else None
+        self.reset()
+
+    def reset(self):
+        self.lut = None
+        self.lut_stats = None  # (mean, std) of the luma the curve was computed from
+        self.frames_since_refresh = 0
+        self.refreshes = 0
+
+    def _thumbnail_luma(self, frame):
+        height, width = frame.shape[:2]
+        scale = min(1.0, self.analysis_width / width)
+        thumbnail = cv2.resize(frame, (max(1, round(width * scale)), max(1, round(height * scale))),
+                               interpolation=cv2.INTER_NEAREST)
+        return cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+
+    @staticmethod
+    def equalization_lut(luma):
+        """
+        The cv2.equalizeHist mapping of a grayscale image, as a 256-entry LUT.
+        """
+        histogram = np.bincount(luma.ravel(), minlength=256)
+        cdf = np.cumsum(histogram)
+        cdf_min = cdf[np.flatnonzero(histogram)[0]]
+        total = cdf[-1]
+        if total == cdf_min:  # Uniform image
+            return np.arange(256, dtype=np.uint8)
+        return np.clip(np.round((cdf - cdf_min) * 255.0 / (total - cdf_min)), 0, 255).astype(np.uint8)
+
+    def update(self, frame):
+        """
+        Recompute the cached equalization curve if the scene's lighting drifted.
+
+        Returns:
+            np.ndarray: The current 256-entry luma LUT (None unless the method is 'equalize').
+        """
+        if self.method != 'equalize':
+            return None
+        self.frames_since_refresh += 1
+        luma = self._thumbnail_luma(frame)
+        stats = (float(luma.mean()), float(luma.std()))
+        stale = (self.lut is None
+                 or abs(stats[0] - self.lut_stats[0]) > self.drift_threshold
+                 or abs(stats[1] - self.lut_stats[1]) > self.drift_threshold
+                 or (self.refresh_interval and self.frames_since_refresh >= self.refresh_interval))
+        if stale:
+            self.lut = self.equalization_lut(luma)
+            self.lut_stats = stats
+            self.frames_since_refresh = 0
+            self.refreshes += 1
+        return self.lut
+
+    def _equalize_luma(self, frame, code_back):
+        yuv = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV)
+        luma = yuv[:, :, 0]
+        if self.clahe is not None:
+            yuv[:, :, 0] = self.clahe.apply(luma)
+        else:
+            yuv[:, :, 0] = cv2.LUT(luma, self.lut if self.lut is not None else self.update(frame))
+        return cv2.cvtColor(yuv, code_back)
+
+    def normalize(self, frame):
+        """
+        Lighting-normalized BGR frame at full resolution (a new array; the input is not modified),
+        e.g. for display or export. Costs two full-frame color conversions, so the tracking path
+        uses model_input() instead. Without a method, the frame is returned unchanged.
+        """
+        if self.method is None:
+            return frame
+        self.update(frame)
+        return self._equalize_luma(frame, cv2.COLOR_YUV2BGR)
+
+    def model_input(self, frame):
+        """
+        Downscaled, lighting-normalized RGB input for the pose model. With 'equalize', the curve
+        cached by the last update() is used (computed from this frame if there is none yet).
+
+        Args:
+            frame (np.ndarray): BGR frame (or crop) as captured.
+
+        Returns:
+            np.ndarray: RGB image of at most model_input_size pixels on its longest side.
+        """
+        height, width = frame.shape[:2]
+        if self.model_input_size and max(height, width) > self.model_input_size:
+            scale = self.model_input_size / max(height, width)
+            # Bilinear even for strong downscaling: BlazePose resamples to its network input again,
+            # and area averaging would cost several times more than everything else here
+            frame = cv2.resize(frame, (round(width * scale), round(height * scale)), interpolation=cv2.INTER_LINEAR)
+        if self.method is None:
+            return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        return self._equalize_luma(frame, cv2.COLOR_YUV2RGB)
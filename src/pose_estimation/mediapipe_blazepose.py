@@ -1,64 +1,149 @@
+import time
 import mediapipe as mp
 import cv2
+import numpy as np
+from pose_estimation.pose_frame import PoseFrame
+from pose_estimation.roi_tracking import RoiTracker, ComplexitySelector, crop_to_frame
+from utils.visualization_utils import OverlayRenderer
+
+
+def _bgr_to_rgb(frame):
+    return cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
 
 
 class BlazePoseEstimator:
     """
     A class for detecting human pose landmarks using MediaPipe Pose.
     Provides functionality for drawing landmarks and returning pose landmarks.
+
+    With roi_tracking, frames after the first detection are cropped to the region around the
+    previous pose (see RoiTracker) before conversion and inference, and the full frame is only
+    processed again when the person is lost. With latency_budget_ms, the model complexity is
+    chosen per frame to fit the budget (see ComplexitySelector).
     """
     def __init__(self, static_image_mode=False, model_complexity=2, enable_segmentation=False,
-                 min_detection_confidence=0.5, min_tracking_confidence=0.7):
+                 min_detection_confidence=0.5, min_tracking_confidence=0.7, roi_tracking=False, roi_padding=0.25,
+                 roi_min_size=0.2, min_track_visibility=0.5, latency_budget_ms=None, min_model_complexity=0):
         """
         Initialize MediaPipe Pose with the specified configuration.
+        :param roi_tracking: Run the model on a crop around the previous pose instead of the full frame.
+        :param roi_padding: Crop padding on each side, as a fraction of the pose's bounding box.
+        :param roi_min_size: Minimum crop width and height, as a fraction of the frame.
+        :param min_track_visibility: Mean landmark visibility below which the track counts as lost.
+        :param latency_budget_ms: Per-frame inference budget; None always uses model_complexity.
+        :param min_model_complexity: Lowest complexity the latency budget may fall back to.
         """
         self.static_image_mode = static_image_mode
         self.model_complexity = model_complexity
         self.enable_segmentation = enable_segmentation
         self.min_detection_confidence = min_detection_confidence
         self.min_tracking_confidence = min_tracking_confidence
+        self.min_track_visibility = min_track_visibility
+
+        self.roi_tracker = RoiTracker(padding=roi_padding, min_size=roi_min_size) if roi_tracking else None
+        self.complexity_selector = None
+        if latency_budget_ms is not None:
+            self.complexity_selector = ComplexitySelector(latency_budget_ms, max_complexity=model_complexity,
+                                                          min_complexity=min_model_complexity)
 
-        # Initialize MediaPipe Pose
+        # Initialize MediaPipe Pose; one instance per complexity, created when first selected
         self.mp_pose = mp.solutions.pose
-        self.pose = self.mp_pose.Pose(static_image_mode=self.static_image_mode,
-                                      model_complexity=self.model_complexity,
-                                      enable_segmentation=self.enable_segmentation,
-                                      min_detection_confidence=self.min_detection_confidence,
-                                      min_tracking_confidence=self.min_tracking_confidence)
+        self.models = {}
+        self.pose = self._model(model_complexity)
+
+        # Frames processed on a crop, on the full frame, and tracks lost
+        self.stats = {'roi': 0, 'full_frame': 0, 'track_lost': 0}
 
         # Drawing utilities
-        self.mp_drawing = mp.solutions.drawing_utils
-        self.mp_drawing_styles = mp.solutions.drawing_styles
+        self.overlay_renderer = OverlayRenderer(show_labels=False)
+
+    def _model(self, complexity):
+        if complexity not in self.models:
+            # MediaPipe's landmark smoothing works in input image coordinates, which a moving crop
+            # would distort; PoseTracker smooths in frame coordinates afterwards
+            self.models[complexity] = self.mp_pose.Pose(static_image_mode=self.static_image_mode,
+                                                        model_complexity=complexity,
+                                                        smooth_landmarks=self.roi_tracker is None,
+                                                        enable_segmentation=self.enable_segmentation,
+                                                        min_detection_confidence=self.min_detection_confidence,
+                                                        min_tracking_confidence=self.min_tracking_confidence)
+        return self.models[complexity]
+
+    def _infer(self, image, timestamp):
+        start = time.perf_counter()
+        results = self.pose.process(np.ascontiguousarray(image))
+        if self.complexity_selector is not None:
+            complexity = self.complexity_selector.observe((time.perf_counter() - start) * 1000.0)
+            self.pose = self._model(complexity)
+        if results.pose_landmarks:
+            return PoseFrame.from_landmarks(results.pose_landmarks.landmark, timestamp)
+        return None
+
+    def _track_held(self, landmarks):
+        return landmarks is not None and float(landmarks.visibility.mean()) >= self.min_track_visibility
 
-    def process_frame(self, frame):
+    def process_frame(self, frame, timestamp=None, rgb=False, input_transform=None):
         """
         Process a video frame to detect pose landmarks.
-        :param frame: Input video frame (BGR format).
-        :return: Processed pose landmarks or None if not detected.
+        :param frame: Input video frame (BGR format, or RGB with rgb=True). Landmarks are normalized,
+            so a downscaled frame gives the same coordinates.
+        :param timestamp: Capture time of the frame in seconds. Defaults to now.
+        :param rgb: The frame is already RGB (e.g. LightingNormalizer.model_input()).
+        :param input_transform: Turns the frame (or the ROI crop) into the RGB model input, e.g.
+            LightingNormalizer.model_input. Overrides rgb.
+        :return: PoseFrame with the detected landmarks (normalized to the full frame) or None if not detected.
         """
-        # Convert the frame to RGB as MediaPipe uses RGB
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
-        results = self.pose.process(image_rgb)
+        if timestamp is None:
+            timestamp = time.time()
+        if input_transform is None:
+            # Convert the frame to RGB as MediaPipe uses RGB
+            input_transform = (lambda image: image) if rgb else _bgr_to_rgb
 
-        if results.pose_landmarks:
-            return results.pose_landmarks.landmark
-        return None
+        if self.roi_tracker is None:
+            return self._infer(input_transform(frame), timestamp)
+
+        height, width = frame.shape[:2]
+        rect = self.roi_tracker.crop_rect(width, height)
+        landmarks = None
+        if rect is not None:
+            x0, y0, x1, y1 = rect
+            landmarks = self._infer(input_transform(frame[y0:y1, x0:x1]), timestamp)
+            if self._track_held(landmarks):
+                self.stats['roi'] += 1
+                landmarks = crop_to_frame(landmarks, rect, (width, height))
+            else:
+                # Track lost: look for the person in the whole frame right away
+                self.stats['track_lost'] += 1
+                landmarks = None
+        if landmarks is None:
+            self.stats['full_frame'] += 1
+            landmarks = self._infer(input_transform(frame), timestamp)
+            if not self._track_held(landmarks):
+                self.roi_tracker.reset()
+                return landmarks
+        self.roi_tracker.update(landmarks)
+        return landmarks
+
+    def reset_tracking(self):
+        """
+        Forget the tracked region; the next frame is processed in full.
+        """
+        if self.roi_tracker is not None:
+            self.roi_tracker.reset()
 
     def draw_landmarks(self, frame, landmarks):
         """
         Draw pose landmarks on the frame.
         :param frame: Input video frame.
-        :param landmarks: MediaPipe landmarks to be drawn.
+        :param landmarks: MediaPipe landmarks to be drawn, or a PoseFrame.
         """
-        self.mp_drawing.draw_landmarks(
-            frame,
-            landmarks,
-            self.mp_pose.POSE_CONNECTIONS,
-            landmark_drawing_spec=self.mp_drawing_styles.get_default_pose_landmarks_style()
-        )
+        if not isinstance(landmarks, PoseFrame):
+            landmarks = PoseFrame.from_landmarks(landmarks.landmark)
+        self.overlay_renderer.render(frame, landmarks)
 
     def close(self):
         """
         Release MediaPipe resources.
         """
-        self.pose.close()
\ No newline at end of file
+        for model in self.models.values():
+            model.close()
\ No newline at end of file
@@ -0,0 +1,97 @@
+import argparse
+import os
+import sys
+
+# Set to 1 on machines that must never download weights at startup (e.g. kiosks); run this module
+# once with network access to fill the cache
+OFFLINE_ENV = 'ROBIQ_OFFLINE'
+
+# ImageNet weights of the pose refinement backbone
+RESNET18_WEIGHTS_URL = 'https://download.pytorch.org/models/resnet18-f37072fd.pth'
+
+MIDAS_REPO = 'intel-isl/MiDaS'
+
+
+def offline_mode():
+    return os.environ.get(OFFLINE_ENV, '').lower() in ('1', 'true', 'yes')
+
+
+def hub_repo_dir(repo, ref='master'):
+    """
+    Local checkout of a torch.hub repository (inside $TORCH_HOME/hub, as torch.hub lays it out).
+    """
+    import torch
+    owner, name = repo.split('/')
+    return os.path.join(torch.hub.get_dir(), f"{owner}_{name}_{ref}")
+
+
+def checkpoint_path(url):
+    """
+    Local cache file of a weight file downloaded with torch.hub.load_state_dict_from_url.
+    """
+    import torch
+    return os.path.join(torch.hub.get_dir(), 'checkpoints', os.path.basename(url))
+
+
+def load_hub_model(repo, model, offline=None, **kwargs):
+    """
+    Load a torch.hub model from the local checkout when there is one, without contacting GitHub.
+
+    torch.hub.load(repo, ...) checks the remote repository on every call; loading the cached checkout
+    with source='local' needs no network once the repository and its weights are cached.
+    """
+    import torch
+    offline = offline_mode() if offline is None else offline
+    repo_dir = hub_repo_dir(repo)
+    if os.path.isdir(repo_dir):
+        return torch.hub.load(repo_dir, model, source='local', **kwargs)
+    if offline:
+        raise RuntimeError(f"{repo} is not in the model cache ({torch.hub.get_dir()}); "
+                           f"run `python -m pose_estimation.model_cache` with network access")
+    return torch.hub.load(repo, model, trust_repo=True, **kwargs)
+
+
+def load_pretrained_weights(module, url, offline=None):
+    """
+    Load cached (or, when online, downloaded) weights into a module.
+
+    Returns:
+        bool: False if the weights are not cached and downloading is not allowed.
+    """
+    from torch.hub import load_state_dict_from_url
+    offline = offline_mode() if offline is None else offline
+    if offline and not os.path.exists(checkpoint_path(url)):
+        print(f"Pretrained weights {os.path.basename(url)} are not cached; using random initialization")
+        return False
+    module.load_state_dict(load_state_dict_from_url(url, map_location='cpu', progress=False))
+    return True
+
+
+def prefetch(depth_models=('MiDaS_small',), blazepose_complexity=2):
+    """
+    Download everything the tracker loads at startup into the local caches.
+    """
+    import torchvision.models as models
+    load_pretrained_weights(models.resnet18(), RESNET18_WEIGHTS_URL, offline=False)
+    print(f"Cached {checkpoint_path(RESNET18_WEIGHTS_URL)}")
+    for model_type in depth_models:
+        load_hub_model(MIDAS_REPO, model_type, offline=False)
+        print(f"Cached MiDaS {model_type} in {hub_repo_dir(MIDAS_REPO)}")
+    # MediaPipe fetches the landmark model of the heavier complexities on first use
+    from pose_estimation.mediapipe_blazepose import BlazePoseEstimator
+    BlazePoseEstimator(model_complexity=blazepose_complexity).close()
+    print(f"Cached BlazePose model (complexity {blazepose_complexity})")
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Download model weights into the local caches for offline startup.")
+    parser.add_argument('--depth-models', nargs='+', default=['MiDaS_small'], help="MiDaS variants to cache.")
+    parser.add_argument('--blazepose-complexity', type=int, default=2, choices=[0, 1, 2],
+                        help="BlazePose model complexity to cache.")
+    args = parser.parse_args(argv)
+    prefetch(args.depth_models, args.blazepose_complexity)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,175 @@
+import hashlib
+import json
+import os
+import tempfile
+import numpy as np
+
+# Where components export their ONNX graphs when no explicit path is given
+DEFAULT_EXPORT_DIR = os.path.join(os.path.expanduser('~'), '.robiq', 'onnx')
+
+# Inference backends selectable per component
+BACKENDS = ('torch', 'onnx')
+
+
+def default_onnx_path(name):
+    """
+    Default location of the exported ONNX graph for a component.
+    """
+    return os.path.join(DEFAULT_EXPORT_DIR, f"{name}.onnx")
+
+
+def file_digest(path, chunk_size=1 << 20):
+    """
+    SHA-256 hex digest of a file's contents.
+    """
+    digest = hashlib.sha256()
+    with open(path, 'rb') as f:
+        for chunk in iter(lambda: f.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def cached_onnx_path(name, weights_path, **config):
+    """
+    Default location of the ONNX graph exported from trained weights. The file name carries a
+    digest of the weights file and of the model configuration, so other weights or settings
+    never reuse a stale graph.
+
+    Args:
+        name (str): Component name.
+        weights_path (str): Trained weights the graph is exported from.
+        config: Model settings that change the graph (e.g. number of classes).
+    """
+    key = hashlib.sha256(file_digest(weights_path).encode())
+    key.update(json.dumps(config, sort_keys=True).encode())
+    return default_onnx_path(f"{name}-{key.hexdigest()[:16]}")
+
+
+def load_temporary_export(export, num_threads=None):
+    """
+    Export a graph to a temporary file, load it and delete the file. For models without trained
+    weights, whose randomly initialized layers must not be cached and reused.
+
+    Args:
+        export (callable): Writes the graph to the path it is given.
+        num_threads (int): Intra-op threads of the session.
+
+    Returns:
+        OnnxModel: The loaded graph.
+    """
+    fd, path = tempfile.mkstemp(suffix='.onnx')
+    os.close(fd)
+    try:
+        export(path)
+        return OnnxModel(path, num_threads)
+    finally:
+        os.remove(path)
+
+
+def default_thread_count():
+    """
+    Default intra-op thread count: half the cores, leaving room for capture, UI and other sessions.
+    """
+    return max(1, (os.cpu_count() or 2) // 2)
+
+
+def export_to_onnx(model, sample_inputs, path, input_names, output_names, dynamic_axes=None, opset_version=13):
+    """
+    Export a PyTorch model to an ONNX graph.
+
+    Args:
+        model (torch.nn.Module): Model to export. It is switched to eval mode.
+        sample_inputs (tuple): Example input tensors used for tracing.
+        path (str): Destination .onnx file.
+        input_names (list): Names of the graph inputs.
+        output_names (list): Names of the graph outputs.
+        dynamic_axes (dict): Axes allowed to vary at inference time (e.g. batch, sequence length).
+        opset_version (int): ONNX opset to target.
+
+    Returns:
+        str: Path of the exported graph.
+    """
+    import torch
+
+    directory = os.path.dirname(path)
+    if directory:
+        os.makedirs(directory, exist_ok=True)
+    model.eval()
+    with torch.no_grad():
+        torch.onnx.export(model, tuple(sample_inputs), path, input_names=input_names, output_names=output_names,
+                          dynamic_axes=dynamic_axes, opset_version=opset_version)
+    return path
+
+
+class OnnxModel:
+    """
+    ONNX Runtime inference session on the CPU execution provider.
+    """
+    def __init__(self, path, num_threads=None, inter_op_threads=1):
+        """
+        Load an ONNX graph.
+
+        Args:
+            path (str): Path to the .onnx file.
+            num_threads (int): Intra-op threads. Defaults to half the available cores.
+            inter_op_threads (int): Inter-op threads. The graphs used here are sequential, so 1 is optimal.
+        """
+        import onnxruntime as ort
+        options = ort.SessionOptions()
+        options.intra_op_num_threads = num_threads or default_thread_count()
+        options.inter_op_num_threads = inter_op_threads
+        options.execution_mode = ort.ExecutionMode.ORT_SEQUENTIAL
+        options.graph_optimization_level = ort.GraphOptimizationLevel.ORT_ENABLE_ALL
+        self.path = path
+        self.session = ort.InferenceSession(path, sess_options=options, providers=['CPUExecutionProvider'])
+        self.input_names = [node.name for node in self.session.get_inputs()]
+        self.output_names = [node.name for node in self.session.get_outputs()]
+
+    def run(self, *inputs):
+        """
+        Run the graph.
+
+        Args:
+            inputs: One numpy array per graph input, in declaration order.
+
+        Returns:
+            list: One numpy array per graph output.
+        """
+        feed = {name: np.ascontiguousarray(value, dtype=np.float32) for name, value in zip(self.input_names, inputs)}
+        return self.session.run(self.output_names, feed)
+
+
+def check_parity(torch_model, onnx_model, sample_inputs, rtol=1e-3, atol=1e-4):
+    """
+    Compare the outputs of a PyTorch model and its ONNX export on the same inputs.
+
+    Args:
+        torch_model (torch.nn.Module): Reference model (in eval mode).
+        onnx_model (OnnxModel): Exported graph.
+        sample_inputs (tuple): Input tensors.
+        rtol (float): Relative tolerance.
+        atol (float): Absolute tolerance.
+
+    Returns:
+        float: Largest absolute difference across all outputs.
+
+    Raises:
+        ValueError: If any output differs beyond the tolerances.
+    """
+    import torch
+
+    with torch.no_grad():
+        expected = torch_model(*sample_inputs)
+    if not isinstance(expected, (tuple, list)):
+        expected = (expected,)
+    expected = [tensor.cpu().numpy() for tensor in expected]
+    actual = onnx_model.run(*[tensor.cpu().numpy() for tensor in sample_inputs])
+
+    max_diff = 0.0
+    for name, exp, act in zip(onnx_model.output_names, expected, actual):
+        if exp.shape != act.shape:
+            raise ValueError(f"ONNX output '{name}' has shape {act.shape}, expected {exp.shape}")
+        max_diff = max(max_diff, float(np.max(np.abs(exp - act))) if exp.size else 0.0)
+        if not np.allclose(exp, act, rtol=rtol, atol=atol):
+            raise ValueError(f"ONNX output '{name}' deviates from PyTorch (max abs diff {max_diff:.2e})")
+    return max_diff
@@ -0,0 +1,120 @@
+import time
+import numpy as np
+from collections import namedtuple
+
+# Number of landmarks produced by BlazePose
+NUM_LANDMARKS = 33
+
+# Lightweight per-landmark view, kept for callers that still expect attribute access
+Landmark = namedtuple('Landmark', ['x', 'y', 'z', 'visibility'])
+
+
+class PoseFrame:
+    """
+    Array-backed pose for a single video frame.
+
+    All landmarks live in one contiguous float32 buffer of shape (33, 4) holding
+    x, y, z and visibility, so downstream stages can work on whole-frame slices
+    instead of walking MediaPipe landmark objects one by one.
+    """
+    __slots__ = ('data', 'timestamp')
+
+    def __init__(self, data, timestamp=None):
+        """
+        Initialize a PoseFrame.
+
+        Args:
+            data (array-like): Landmark array of shape (33, 4) as x, y, z, visibility.
+            timestamp (float): Capture time in seconds. Defaults to the current time.
+        """
+        data = np.ascontiguousarray(data, dtype=np.float32)
+        if data.shape != (NUM_LANDMARKS, 4):
+            raise ValueError(f"Expected landmark array of shape ({NUM_LANDMARKS}, 4), got {data.shape}")
+        self.data = data
+        self.timestamp = time.time() if timestamp is None else float(timestamp)
+
+    @classmethod
+    def from_landmarks(cls, landmarks, timestamp=None):
+        """
+        Build a PoseFrame from MediaPipe landmarks (or any objects with x, y, z, visibility).
+
+        Args:
+            landmarks: PoseFrame, (33, 4) array or sequence of landmark objects.
+            timestamp (float): Capture time in seconds.
+
+        Returns:
+            PoseFrame: The converted frame. PoseFrame inputs are returned unchanged.
+        """
+        if isinstance(landmarks, cls):
+            return landmarks
+        if isinstance(landmarks, np.ndarray):
+            return cls(landmarks, timestamp)
+        data = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+        for idx, lm in enumerate(landmarks):
+            data[idx] = (lm.x, lm.y, lm.z, lm.visibility)
+        return cls(data, timestamp)
+
+    @property
+    def xyz(self):
+        """(33, 3) view of the landmark coordinates."""
+        return self.data[:, :3]
+
+    @property
+    def xy(self):
+        """(33, 2) view of the normalized image coordinates."""
+        return self.data[:, :2]
+
+    @property
+    def visibility(self):
+        """(33,) view of the landmark visibility scores."""
+        return self.data[:, 3]
+
+    def copy(self):
+        """
+        Return a deep copy of the frame.
+        """
+        return PoseFrame(self.data.copy(), self.timestamp)
+
+    def with_xy(self, xy):
+        """
+        Return a copy of the frame with its image coordinates replaced.
+
+        Args:
+            xy (array-like): Replacement coordinates of shape (33, 2).
+
+        Returns:
+            PoseFrame: New frame sharing z, visibility and timestamp with this one.
+        """
+        frame = self.copy()
+        frame.data[:, :2] = xy
+        return frame
+
+    def __len__(self):
+        return NUM_LANDMARKS
+
+    def __getitem__(self, idx):
+        return Landmark(*self.data[idx].tolist())
+
+    def __iter__(self):
+        for row in self.data.tolist():
+            yield Landmark(*row)
+
+    def __repr__(self):
+        return f"PoseFrame(timestamp={self.timestamp:.3f}, mean_visibility={self.visibility.mean():.2f})"
+
+
+def stack_pose_frames(frames):
+    """
+    Stack a sequence of frames into a single (T, 33, 4) float32 array.
+
+    Args:
+        frames: Sequence of PoseFrame objects, landmark lists or an existing (T, 33, 4) array.
+
+    Returns:
+        np.ndarray: Stacked landmark array.
+    """
+    if isinstance(frames, np.ndarray):
+        if frames.ndim != 3 or frames.shape[1:] != (NUM_LANDMARKS, 4):
+            raise ValueError(f"Expected landmark array of shape (T, {NUM_LANDMARKS}, 4), got {frames.shape}")
+        return np.asarray(frames, dtype=np.float32)
+    return np.stack([PoseFrame.from_landmarks(frame).data for frame in frames]).astype(np.float32, copy=False)
@@ -1,36 +1,126 @@
-import torch
-import torch.nn as nn
-import torchvision.models as models
-import torchvision.transforms as transforms
+import os
+import cv2
+import numpy as np
+from pose_estimation.heatmaps import HEATMAP_SIZE
+from pose_estimation.onnx_backend import (BACKENDS, OnnxModel, cached_onnx_path, check_parity, export_to_onnx,
+                                         load_temporary_export)
 
-class PoseRefinementModel(nn.Module):
-    def __init__(self):
-        super(PoseRefinementModel, self).__init__()
-        # Using pretrained ResNet18 as the backbone for feature extraction
-        self.backbone = models.resnet18(pretrained=True)
-        self.backbone.fc = nn.Linear(self.backbone.fc.in_features, 34 * 2)  # 34 keypoints (x, y)
+# Heatmap input resolution and normalization of the refinement network
+INPUT_SIZE = HEATMAP_SIZE
+HEATMAP_MEAN = 0.485
+HEATMAP_STD = 0.229
 
-    def forward(self, x):
-        return self.backbone(x)
+
+def ema(previous, new, alpha):
+    """
+    Exponential moving average step; the first value (previous None) is taken as is.
+    """
+    if previous is None:
+        return new
+    return alpha * new + (1 - alpha) * previous
 
 class PoseRefiner:
-    def __init__(self, model_path=None, alpha=0.9):
-        self.device = torch.device("cuda" if torch.cuda.is_available() else "cpu")
-        self.model = PoseRefinementModel().to(self.device)
-        if model_path:
-            self.model.load_state_dict(torch.load(model_path, map_location=self.device))
-            self.model.eval()
-        self.transform = transforms.Compose([
-            transforms.ToTensor(),
-            transforms.Resize((64, 64)),
-            transforms.RandomRotation(30),  # Random rotation up to 30 degrees
-            transforms.RandomHorizontalFlip(),  # Random horizontal flip
-            transforms.RandomAffine(10),  # Random affine transformation
-            transforms.Normalize(mean=[0.485], std=[0.229])  # Normalization
-        ])
+    def __init__(self, model_path=None, alpha=0.9, backend='torch', onnx_path=None, num_threads=None):
+        """
+        Input:
+            - model_path: Optional trained weights (.pth)
+            - alpha: EMA smoothing factor for the refined keypoints
+            - backend: Inference backend, 'torch' or 'onnx'
+            - onnx_path: Exported ONNX graph; exported from the PyTorch model on first use if missing.
+              Defaults to a cache file keyed by the weights; without model_path (an untrained
+              keypoint head) the graph is exported for this instance only
+            - num_threads: onnxruntime intra-op threads (defaults to half the cores)
+        """
+        if backend not in BACKENDS:
+            raise ValueError(f"Unsupported inference backend: {backend}")
+        self.backend = backend
+        self.model = None
+        self.onnx_model = None
+
+        # torch is only imported on the PyTorch and export paths; a cached graph runs without it
+        if backend == 'onnx' and onnx_path is None and not model_path:
+            self._load_torch_model(None, "cpu")
+            self.onnx_model = load_temporary_export(self.export_onnx, num_threads)
+        elif backend == 'onnx':
+            onnx_path = onnx_path or cached_onnx_path('pose_refinement', model_path, input_size=INPUT_SIZE)
+            if not os.path.exists(onnx_path):
+                self._load_torch_model(model_path, "cpu")
+                self.export_onnx(onnx_path)
+            self.onnx_model = OnnxModel(onnx_path, num_threads)
+        else:
+            self._load_torch_model(model_path)
+
         self.alpha = alpha  # EMA smoothing factor
         self.prev_keypoints = None
 
+    def _load_torch_model(self, model_path, device=None):
+        import torch
+        from pose_estimation.pose_refinement_model import PoseRefinementModel
+        self.device = device or ("cuda" if torch.cuda.is_available() else "cpu")
+        # Trained weights replace the backbone's ImageNet weights, so those are only loaded without them
+        self.model = PoseRefinementModel(pretrained_backbone=not model_path).to(self.device)
+        if model_path:
+            self.model.load_state_dict(torch.load(model_path, map_location=self.device))
+        self.model.eval()
+
+    def export_onnx(self, path, verify=True):
+        """
+        Export the PyTorch model to ONNX (batch size is dynamic).
+        With verify, the export is checked for numerical parity against PyTorch.
+        """
+        import torch
+        self.model.to("cpu").eval()
+        sample = (torch.randn(2, 1, INPUT_SIZE, INPUT_SIZE),)
+        export_to_onnx(self.model, sample, path, input_names=['heatmap'], output_names=['keypoints'],
+                       dynamic_axes={'heatmap': {0: 'batch'}, 'keypoints': {0: 'batch'}})
+        if verify:
+            check_parity(self.model, OnnxModel(path, num_threads=1), sample)
+        self.model.to(self.device)
+        return path
+
+    def _preprocess(self, heatmaps):
+        """
+        Fixed inference transform: resize (if needed) and normalize heatmaps to a (B, 1, 64, 64)
+        float32 array. Deterministic; no augmentation is applied at inference time.
+        Input:
+            - heatmaps: One heatmap (H x W) or a stack (B x H x W); uint8 in [0, 255] or float in [0, 1]
+              (see landmark_heatmaps, which rasterizes at network resolution and skips the resize)
+        """
+        heatmaps = np.asarray(heatmaps)
+        if heatmaps.ndim == 2:
+            heatmaps = heatmaps[None]
+        if heatmaps.shape[1:] != (INPUT_SIZE, INPUT_SIZE):
+            heatmaps = np.stack([cv2.resize(heatmap, (INPUT_SIZE, INPUT_SIZE), interpolation=cv2.INTER_AREA)
+                                 for heatmap in heatmaps])
+        scale = 1.0 / 255.0 if heatmaps.dtype == np.uint8 else 1.0
+        normalized = (heatmaps.astype(np.float32) * scale - HEATMAP_MEAN) / HEATMAP_STD
+        return normalized[:, None]
+
+    def infer_batch(self, heatmaps):
+        """
+        Stateless batched inference (no EMA smoothing), used when serving many sessions at once.
+        Input:
+            - heatmaps: Sequence of 1-channel heatmaps, or a (B x H x W) array
+        Returns:
+            - Numpy array (batch x 34 x 2) of refined keypoints
+        """
+        if isinstance(heatmaps, np.ndarray) and heatmaps.ndim == 3:
+            inputs = self._preprocess(heatmaps)
+        else:
+            inputs = np.concatenate([self._preprocess(heatmap) for heatmap in heatmaps])
+        if self.onnx_model is not None:
+            outputs = self.onnx_model.run(inputs)[0]
+        else:
+            import torch
+            with torch.inference_mode():
+                outputs = self.model(torch.from_numpy(inputs).to(self.device)).cpu().numpy()
+        return outputs.reshape(len(inputs), -1, 2)
+
+    def _smooth(self, refined_points):
+        # Apply EMA smoothing to the refined keypoints
+        self.prev_keypoints = ema(self.prev_keypoints, refined_points, self.alpha)
+        return self.prev_keypoints
+
     def refine_pose(self, heatmap):
         """
         Input:
@@ -38,14 +128,16 @@ class PoseRefiner:
         Returns:
             - refined keypoints [(x1, y1), (x2, y2), ...]
         """
-        with torch.no_grad():
-            input_tensor = self.transform(heatmap).unsqueeze(0).to(self.device)
-            outputs = self.model(input_tensor)
-            refined_points = outputs.cpu().numpy().reshape(-1, 2)
-
-            # Apply EMA smoothing to the refined keypoints
-            if self.prev_keypoints is None:
-                self.prev_keypoints = refined_points
-            else:
-                self.prev_keypoints = self.alpha * refined_points + (1 - self.alpha) * self.prev_keypoints
-        return self.prev_keypoints
\ No newline at end of file
+        return self._smooth(self.infer_batch(heatmap[None])[0])
+
+    def refine_batch(self, heatmaps):
+        """
+        Refine consecutive frames of one session in a single inference call; the EMA smoothing is
+        applied in frame order, so the results match calling refine_pose frame by frame.
+        Input:
+            - heatmaps: Stack (B x H x W) or sequence of heatmaps, oldest first
+        Returns:
+            - Numpy array (batch x 34 x 2) of smoothed refined keypoints
+        """
+        refined = self.infer_batch(heatmaps)
+        return np.stack([self._smooth(points) for points in refined])
@@ -0,0 +1,21 @@
+import torch.nn as nn
+import torchvision.models as models
+from pose_estimation.model_cache import RESNET18_WEIGHTS_URL, load_pretrained_weights
+
+# Keypoints predicted by the refinement network (x, y each)
+NUM_KEYPOINTS = 34
+
+
+class PoseRefinementModel(nn.Module):
+    def __init__(self, pretrained_backbone=True):
+        super(PoseRefinementModel, self).__init__()
+        # Using pretrained ResNet18 as the backbone for feature extraction (weights from the local cache)
+        self.backbone = models.resnet18()
+        if pretrained_backbone:
+            load_pretrained_weights(self.backbone, RESNET18_WEIGHTS_URL)
+        self.backbone.fc = nn.Linear(self.backbone.fc.in_features, NUM_KEYPOINTS * 2)
+
+    def forward(self, x):
+        # Heatmaps are single-channel; the ResNet stem expects three
+        x = x.expand(-1, 3, -1, -1)
+        return self.backbone(x)
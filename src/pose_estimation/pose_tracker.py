@@ -1,127 +1,567 @@
-import cv2
+import functools
+import threading
+import time
 import numpy as np
 from biomechanics.joint_angles import JointAnglesCalculator
 from biomechanics.motion_analysis import MotionAnalyzer
 from biomechanics.center_of_mass import CenterOfMassEstimator
 from biomechanics.symmetry_analysis import SymmetryAnalyzer
-from biomechanics.injury_risk import InjuryRiskAnalyzer
-from pose_estimation.mediapipe_blazepose import BlazePoseEstimator
+from biomechanics.rep_counter import RepCounter
+from pose_estimation.pose_frame import NUM_LANDMARKS
+from pose_estimation.heatmaps import landmark_heatmaps
+from pose_estimation.lighting import LightingNormalizer
+from pose_estimation.frame_pipeline import FramePipeline, DROP_OLDEST
+from pose_estimation.stage_scheduler import StageScheduler, SceneChangeDetector
 from pose_estimation.temporal_smoothing import TemporalSmoothing
-from pose_estimation.pose_refinement import PoseRefiner
-from pose_estimation.activity_recognition import ActivityRecognizer
-from pose_estimation.pose_similarity import PoseSimilarityModel
-from pose_estimation.depth_estimation import DepthEstimator
-from utils.visualization_utils import draw_auto_corrections, draw_pose_accuracy_overlay
-from feedback.audio_feedback import AudioFeedback
-from feedback.adaptive_coach import AdaptiveCoach
+from utils.component_loader import ComponentLoader
+from utils.session_store import SessionWriter, session_columns
+from utils.metrics import DEFAULT_EXPORTER_PORT, MetricsExporter, PipelineMetrics
+from utils.visualization_utils import OverlayRenderer
+from feedback.feedback_generator import FeedbackGenerator
+
+POSTURE_CORRECTION = "Adjust your posture!"
+
+
+# Factories of the model-backed components. Their modules import mediapipe, torch or pyttsx3, so they
+# are imported only when the component loader builds them, not when this module is imported.
+def _load_pose_estimator(roi_tracking, latency_budget_ms):
+    from pose_estimation.mediapipe_blazepose import BlazePoseEstimator
+    return BlazePoseEstimator(roi_tracking=roi_tracking, latency_budget_ms=latency_budget_ms)
+
+
+def _load_pose_refiner(model_path, backend, num_threads):
+    from pose_estimation.pose_refinement import PoseRefiner
+    return PoseRefiner(model_path, backend=backend, num_threads=num_threads)
+
+
+def _load_depth_estimator(model_type, input_size, backend, num_threads):
+    from pose_estimation.depth_estimator import DepthEstimator
+    return DepthEstimator(model_type, input_size, backend=backend, num_threads=num_threads)
+
+
+def _load_activity_recognizer(model_path, backend, num_threads):
+    from pose_estimation.activity_recognition import ActivityRecognizer
+    return ActivityRecognizer(model_path, backend=backend, num_threads=num_threads)
+
+
+def _load_audio_feedback():
+    from feedback.audio_feedback import AudioFeedback
+    # The fixed coaching vocabulary is pre-rendered so corrections play without synthesis latency
+    return AudioFeedback(preload_phrases=FeedbackGenerator().phrases() + [POSTURE_CORRECTION])
+
+
+class FramePacket:
+    """
+    Per-frame state handed from one processing stage to the next.
+    """
+    __slots__ = ('frame', 'timestamp', 'landmarks', 'smoothed_landmarks', 'refined_landmarks', 'depth_map',
+                 'landmark_depth', 'joint_angles', 'rom_status', 'rep_count', 'activity', 'similarity_score', 'corrections',
+                 'form_feedback', 'feedback_message', 'received')
+
+    def __init__(self, frame, timestamp=None, rep_count=0, captured=None):
+        self.frame = frame
+        # Start of the end-to-end latency metric: capture time when known (perf_counter clock), else now
+        self.received = time.perf_counter() if captured is None else captured
+        self.timestamp = time.time() if timestamp is None else timestamp
+        self.landmarks = None
+        self.smoothed_landmarks = None
+        self.refined_landmarks = None
+        self.depth_map = None
+        self.landmark_depth = None
+        self.joint_angles = {}
+        self.rom_status = 'white'
+        self.rep_count = rep_count
+        self.activity = None
+        self.similarity_score = None
+        self.corrections = None
+        self.form_feedback = None
+        self.feedback_message = None
+
+    def result(self):
+        """
+        Tuple containing processed frame, joint angles, ROM status, rep count, activity, and feedback message.
+        """
+        return self.frame, self.joint_angles, self.rom_status, self.rep_count, self.activity, self.feedback_message
 
 
 class PoseTracker:
-    def __init__(self, activity_model_path=None, pose_refinement_model_path=None):
+    def __init__(self, activity_model_path=None, pose_refinement_model_path=None,
+                 depth_interval=10, refinement_confidence=0.6, inference_backend='torch', num_threads=None,
+                 depth_model='MiDaS_small', depth_input_size=None, inference_server=None, enable_audio=True,
+                 metrics_log_interval=None, background_loading=False, lighting='equalize', pose_input_size=640,
+                 pose_roi_tracking=False, pose_latency_budget_ms=None, similarity_model=None, injury_analyzer=None,
+                 coach=None):
         """
         Initialize the PoseTracker and all required components.
+
+        Args:
+            activity_model_path: Optional weights for the activity recognizer.
+            pose_refinement_model_path: Optional weights for the pose refiner.
+            depth_interval (int): Run depth estimation every N-th frame (and on scene changes).
+                None disables depth estimation.
+            refinement_confidence (float): Run pose refinement only when the mean landmark
+                visibility drops below this value.
+            inference_backend (str): 'torch' or 'onnx' for the refinement, depth and activity models.
+            num_threads (int): onnxruntime intra-op threads per model.
+            depth_model (str): MiDaS variant ('MiDaS_small', 'DPT_Hybrid' or 'DPT_Large').
+            depth_input_size (int): Depth network input resolution; defaults to the variant's native size.
+            inference_server (InferenceServer): Shared model service. When given, the activity and
+                refinement models are not loaded per tracker; requests are batched with other sessions.
+            enable_audio (bool): Speak corrections. Disable for headless processing.
+            metrics_log_interval (float): Print a performance summary line every N seconds. None disables it.
+            background_loading (bool): Load the models on a background thread and return immediately.
+                Frames are processed with whatever is ready (see component_status()); without
+                pose estimation they pass through unannotated.
+            lighting (str): Lighting normalization, 'equalize', 'clahe' or None (see LightingNormalizer).
+            pose_input_size (int): Longest side of the frame given to BlazePose. None keeps the capture resolution.
+            pose_roi_tracking (bool): Run BlazePose on a crop around the previous pose and on the full
+                frame only until the person is found (see RoiTracker). Best when the person fills
+                a small part of the frame, e.g. wide-angle cameras.
+            pose_latency_budget_ms (float): Per-frame BlazePose budget; the model complexity is lowered
+                while it is exceeded. None always uses the heavy model.
+            similarity_model: Optional scorer against a reference pose, with compare(landmarks) returning
+                (similarity percent, corrections). Without it, feedback comes from the form rules only.
+            injury_analyzer: Optional joint stress check, with analyze_joint_stress(joint_angles) returning
+                the overused joints.
+            coach: Optional workout adaptation, with adjust_workout(similarity_score, rep_count) returning
+                the feedback message for well-executed reps.
         """
+        # Model-backed components, built by the component loader (None until loaded)
+        self.pose_estimator = None
+        self.pose_refiner = None
+        self.depth_estimator = None
+        self.activity_recognizer = None
+        self.audio_feedback = None
+        if inference_server is not None:
+            self.pose_refiner = inference_server.refiner_client()
+            self.activity_recognizer = inference_server.activity_client()
+
+        # Loading order: what the user sees first (skeleton, speech) before the optional models
+        self.loader = ComponentLoader()
+        self._register_component('pose_estimator', functools.partial(
+            _load_pose_estimator, pose_roi_tracking, pose_latency_budget_ms))
+        if enable_audio:
+            self._register_component('audio_feedback', _load_audio_feedback)
+        if inference_server is None:
+            self._register_component('activity_recognizer', functools.partial(
+                _load_activity_recognizer, activity_model_path, inference_backend, num_threads))
+            self._register_component('pose_refiner', functools.partial(
+                _load_pose_refiner, pose_refinement_model_path, inference_backend, num_threads))
+        if depth_interval is not None:
+            self._register_component('depth_estimator', functools.partial(
+                _load_depth_estimator, depth_model, depth_input_size, inference_backend, num_threads))
+
         # Core components
-        self.pose_estimator = BlazePoseEstimator()
+        self.lighting_normalizer = LightingNormalizer(lighting, model_input_size=pose_input_size)
         self.temporal_smoother = TemporalSmoothing(window_size=10)
-        self.pose_refiner = PoseRefiner(pose_refinement_model_path)
-        self.depth_estimator = DepthEstimator()
 
         # Analysis and recognition components
         self.joint_angles_calculator = JointAnglesCalculator()
         self.motion_analyzer = MotionAnalyzer(window_size=5)
-        self.activity_recognizer = ActivityRecognizer(activity_model_path)
-        self.pose_similarity_model = PoseSimilarityModel()
-        self.injury_analyzer = InjuryRiskAnalyzer()
+        self.com_estimator = CenterOfMassEstimator()
+        self.pose_similarity_model = similarity_model
+        self.injury_analyzer = injury_analyzer
 
         # Feedback components
-        self.audio_feedback = AudioFeedback()
-        self.adaptive_coach = AdaptiveCoach()
+        self.feedback_generator = FeedbackGenerator(joint_names=self.joint_angles_calculator.joint_names)
+        self.adaptive_coach = coach
+
+        # Overlay drawing; with a render size (the display's (width, height)) frames are scaled to the
+        # display before drawing, so overlays are drawn once at the resolution they are shown at
+        self.overlay_renderer = OverlayRenderer()
+        self.render_size = None
 
         # State variables
         self.exercise_type = 'all'
         self.skill_level = None
-        self.rep_count = 0
-        self.rom_status = 'white'
-        self.rep_started = False
+        self.rep_counter = RepCounter()
         self.previous_activity = None
         self.similarity_threshold = 80
 
+        # Asynchronous stage pipeline (see start_pipeline)
+        self.pipeline = None
+
+        # Per-stage latency, fps, dropped frames and queue depths (see get_metrics)
+        self.metrics = PipelineMetrics(log_interval=metrics_log_interval, pipeline_source=lambda: self.pipeline)
+        self.metrics_exporter = None
+
+        # Session recording (see start_recording)
+        self.session_writer = None
+        self.recording_lock = threading.Lock()
+
+        # Decimated scheduling of the expensive per-frame models
+        self.refinement_confidence = refinement_confidence
+        self.scheduler = StageScheduler()
+        self.scheduler.register('depth', every_n=depth_interval, condition=SceneChangeDetector(),
+                                enabled=depth_interval is not None)
+        self.scheduler.register('refinement', every_n=0, condition=self._needs_refinement, cache=False)
+
+        if background_loading:
+            self.loader.start()
+        else:
+            self.loader.load_all(raise_errors=True)
+
+    def _register_component(self, name, factory):
+        self.loader.register(name, factory, functools.partial(setattr, self, name))
+
+    def component_status(self):
+        """
+        Load state of the model-backed components.
+
+        Returns:
+            dict: Component name -> {'state': 'pending'|'loading'|'ready'|'failed', 'seconds', 'error'}.
+        """
+        return self.loader.status()
+
+    def wait_until_ready(self, timeout=None):
+        """
+        Block until all components have been loaded (or failed to load).
+
+        Returns:
+            bool: False on timeout.
+        """
+        return self.loader.wait(timeout)
+
     def update_exercise(self, exercise_type, skill_level):
         """
         Update the selected exercise and skill level.
         """
         self.exercise_type = exercise_type
         self.skill_level = skill_level
-        self.rep_count = 0
-        self.rom_status = 'white'
-        self.rep_started = False
+        self.rep_counter.reset()
+        self.feedback_generator.set_exercise(exercise_type, skill_level)
         print(f"Exercise updated: {exercise_type}, Skill level: {skill_level}")
 
-    def process_frame(self, frame):
+    @property
+    def rep_count(self):
+        return self.rep_counter.rep_count
+
+    @property
+    def rom_status(self):
+        return self.rep_counter.rom_status
+
+    def reset_session(self):
+        """
+        Forget all per-session state (smoothing, streaming activity, reps, cached model results),
+        e.g. before processing an unrelated video.
+        """
+        self.temporal_smoother.reset()
+        self.lighting_normalizer.reset()
+        if self.pose_estimator is not None:
+            self.pose_estimator.reset_tracking()
+        if self.activity_recognizer is not None:
+            self.activity_recognizer.reset_stream()
+        self.scheduler.invalidate()
+        self.motion_analyzer = MotionAnalyzer(window_size=self.motion_analyzer.window_size)
+        self.previous_activity = None
+        self.rep_counter.reset()
+        self.feedback_generator.reset()
+
+    def process_frame(self, frame, timestamp=None):
         """
         Process a video frame for pose estimation, biomechanics, and feedback.
 
         Args:
             frame: Input video frame from OpenCV.
+            timestamp: Capture time of the frame in seconds. Defaults to now.
 
         Returns:
             Tuple containing processed frame, joint angles, ROM status, rep count, activity, and feedback message.
         """
         if frame is None or not frame.size:
             return frame, {}, 'white', 0, None, "Invalid frame"
+        return self.process_packet(frame, timestamp).result()
+
+    def process_packet(self, frame, timestamp=None, captured=None):
+        """
+        Run all processing stages on a valid frame.
+
+        Args:
+            frame: Input video frame from OpenCV.
+            timestamp: Capture time of the frame in seconds. Defaults to now.
+            captured: time.perf_counter() at capture (see CameraCapture), so the latency metric
+                includes the time the frame waited before processing.
+
+        Returns:
+            FramePacket with every intermediate result (landmarks, angles, feedback, rendered frame).
+        """
+        packet = FramePacket(frame, timestamp, self.rep_count, captured)
+        for _, stage in self._stages():
+            packet = stage(packet)
+        self.metrics.frame_done(time.perf_counter() - packet.received)
+        return packet
+
+    def analyze_frame(self, frame, timestamp=None):
+        """
+        Headless analysis of a frame: pose estimation and biomechanics only, without
+        feedback or overlay rendering.
+
+        Args:
+            frame: Input video frame from OpenCV.
+            timestamp: Capture (or video) time of the frame in seconds.
+
+        Returns:
+            FramePacket with landmarks, joint angles, ROM status, rep count and activity filled in.
+        """
+        packet = FramePacket(frame, timestamp, self.rep_count)
+        if frame is None or not frame.size:
+            return packet
+        for _, stage in self._stages()[:2]:
+            packet = stage(packet)
+        self.metrics.frame_done(time.perf_counter() - packet.received)
+        return packet
 
-        # Step 1: Lighting adjustment
-        frame = self._preprocess_lighting(frame)
+    def get_metrics(self):
+        """
+        Live performance metrics: rolling latency histograms per stage and step (ms), end-to-end
+        frame latency, effective fps, and dropped frames and queue depths of the asynchronous pipeline.
 
-        # Step 2: Pose estimation
-        results = self.pose_estimator.process_frame(frame)
-        if not results or not results.pose_landmarks:
-            return frame, {}, 'white', self.rep_count, None, None
+        Returns:
+            dict: See PipelineMetrics.snapshot().
+        """
+        return self.metrics.snapshot()
 
-        landmarks = results.pose_landmarks.landmark
+    def start_metrics_exporter(self, port=DEFAULT_EXPORTER_PORT, host='127.0.0.1'):
+        """
+        Serve the metrics in the Prometheus text format on http://host:port/metrics.
+        """
+        if self.metrics_exporter is None:
+            self.metrics_exporter = MetricsExporter(self.metrics, host, port)
+            self.metrics_exporter.start()
+        return self.metrics_exporter
 
-        # Step 3: Temporal smoothing and pose refinement
-        smoothed_landmarks = self.temporal_smoother.smooth_landmarks(landmarks)
-        refined_landmarks = self.pose_refiner.refine_pose(self._generate_heatmap(frame, smoothed_landmarks))
+    def stop_metrics_exporter(self):
+        if self.metrics_exporter is not None:
+            self.metrics_exporter.stop()
+            self.metrics_exporter = None
 
-        # Step 4: Depth estimation (optional visualizations)
-        depth_map = self.depth_estimator.estimate_depth(frame)
+    def start_recording(self, path, chunk_size=256, metadata=None):
+        """
+        Record every analyzed frame (timestamp, raw and refined landmarks, joint angles, center of mass, landmark
+        velocities, rep count and activity) to a columnar session file, see utils.session_store.
 
-        # Step 5: Joint angle calculations
-        joint_angles = self.joint_angles_calculator.get_joint_angles(refined_landmarks, self.exercise_type)
-        self._update_rom_and_reps(joint_angles)
+        Args:
+            path (str): Session file to write.
+            chunk_size (int): Frames per compressed chunk.
+            metadata (dict): Extra session metadata stored in the file header.
+        """
+        session_metadata = {
+            'exercise_type': self.exercise_type,
+            'skill_level': self.skill_level,
+            'joint_names': list(self.joint_angles_calculator.joint_names),
+        }
+        session_metadata.update(metadata or {})
+        writer = SessionWriter(path, session_columns(len(self.joint_angles_calculator.joint_names)),
+                               chunk_size=chunk_size, metadata=session_metadata)
+        self.stop_recording()
+        with self.recording_lock:
+            self.session_writer = writer
+        return writer
 
-        # Step 6: Activity recognition
-        activity = self._recognize_activity(refined_landmarks)
+    def stop_recording(self):
+        """
+        Finish the current session recording, if any.
+        """
+        with self.recording_lock:
+            writer, self.session_writer = self.session_writer, None
+        if writer is not None:
+            writer.close()
 
-        # Step 7: Pose similarity scoring
-        similarity_score, corrections = self.pose_similarity_model.compare(smoothed_landmarks)
-        feedback_message = self._handle_pose_feedback(similarity_score, corrections, joint_angles)
+    def _stages(self):
+        """
+        Processing stages in order: pose -> analysis -> feedback -> render, each timed into the metrics.
+        """
+        stages = [
+            ('pose', self._pose_stage),
+            ('analysis', self._analysis_stage),
+            ('feedback', self._feedback_stage),
+            ('render', self._render_stage),
+        ]
+        return [(name, self.metrics.timed(name, stage)) for name, stage in stages]
 
-        # Draw feedback overlays
-        annotated_frame = self._draw_overlays(frame, refined_landmarks, similarity_score, corrections)
+    def start_pipeline(self, queue_size=2, drop_policy=DROP_OLDEST):
+        """
+        Run the processing stages asynchronously, each on its own worker thread.
+
+        Frames are fed with submit_frame() and results collected with get_result(). With the
+        default 'drop_oldest' policy stale frames are discarded whenever a stage falls behind,
+        so the results always reflect the freshest captured frame.
+
+        Args:
+            queue_size (int): Capacity of the queue in front of each stage.
+            drop_policy (str): Queue overflow policy. Options: ['drop_oldest', 'block'].
+        """
+        self.stop_pipeline()
+        self.pipeline = FramePipeline(self._stages(), queue_size=queue_size, drop_policy=drop_policy)
+        self.pipeline.start()
+        return self.pipeline
 
-        return annotated_frame, joint_angles, self.rom_status, self.rep_count, activity, feedback_message
+    def stop_pipeline(self):
+        """
+        Stop the asynchronous pipeline, if running.
+        """
+        if self.pipeline is not None:
+            self.pipeline.stop()
+            self.pipeline = None
+
+    def submit_frame(self, frame, timestamp=None, captured=None):
+        """
+        Queue a captured frame for asynchronous processing (timestamp and captured as in process_packet()).
+
+        Returns:
+            bool: False if the frame was rejected (invalid frame or pipeline not running).
+        """
+        if self.pipeline is None or frame is None or not frame.size:
+            return False
+        return self.pipeline.submit(FramePacket(frame, timestamp, self.rep_count, captured))
+
+    def get_result(self, timeout=None):
+        """
+        Return the next processed frame result from the asynchronous pipeline.
+
+        Returns:
+            Tuple as returned by process_frame(), or None if no result is ready before the timeout.
+        """
+        packet = self.pipeline.get_result(timeout) if self.pipeline is not None else None
+        if packet is None:
+            return None
+        self.metrics.frame_done(time.perf_counter() - packet.received)
+        return packet.result()
+
+    def _pose_stage(self, packet):
+        """
+        Lighting adjustment and pose estimation.
+        """
+        with self.metrics.timer('pose.lighting'):
+            self._preprocess_lighting(packet.frame)
+        if self.pose_estimator is None:
+            return packet  # Still loading
+        with self.metrics.timer('pose.blazepose'):
+            # The estimator crops (with ROI tracking) before the downscale, equalization and RGB conversion
+            packet.landmarks = self.pose_estimator.process_frame(
+                packet.frame, packet.timestamp, input_transform=self.lighting_normalizer.model_input)
+        return packet
+
+    def _analysis_stage(self, packet):
+        """
+        Temporal smoothing, pose refinement, depth, joint angles, reps and activity recognition.
+        """
+        self.scheduler.tick()
+        frame = packet.frame
+
+        # Depth estimation (decimated; the cached map is reused between runs)
+        if self.depth_estimator is not None:
+            with self.metrics.timer('analysis.depth'):
+                packet.depth_map = self.scheduler.run('depth', self.depth_estimator.estimate_depth, frame,
+                                                      context=frame)
+
+        if packet.landmarks is None:
+            return self._record_packet(packet)
+
+        # Temporal smoothing and pose refinement (only when landmark confidence drops)
+        with self.metrics.timer('analysis.smoothing'):
+            smoothed_landmarks = self.temporal_smoother.smooth_landmarks(packet.landmarks)
+        refined_landmarks = None
+        if self.pose_refiner is not None:
+            with self.metrics.timer('analysis.refinement'):
+                refined_landmarks = self.scheduler.run('refinement', self._refine_landmarks, frame,
+                                                       smoothed_landmarks, context=smoothed_landmarks)
+        if refined_landmarks is None:
+            refined_landmarks = smoothed_landmarks
+        packet.smoothed_landmarks = smoothed_landmarks
+        packet.refined_landmarks = refined_landmarks
+
+        # Per-landmark depth sampled from the (possibly cached) depth map
+        if packet.depth_map is not None:
+            packet.landmark_depth = self.depth_estimator.sample_landmark_depth(refined_landmarks, packet.depth_map)
+
+        # Joint angle calculations
+        with self.metrics.timer('analysis.joint_angles'):
+            joint_angles = self.joint_angles_calculator.calculate_angles(refined_landmarks)
+            packet.joint_angles = self.joint_angles_calculator.angles_to_dict(joint_angles, self.exercise_type)
+            self._update_rom_and_reps(packet.joint_angles)
+        packet.rom_status = self.rom_status
+        packet.rep_count = self.rep_count
+
+        # Rule-based form feedback on all joint angles
+        with self.metrics.timer('analysis.form_feedback'):
+            packet.form_feedback = self.feedback_generator.evaluate(joint_angles, self.rep_counter.phase)
+
+        # Activity recognition
+        with self.metrics.timer('analysis.activity'):
+            packet.activity = self._recognize_activity(refined_landmarks)
+
+        # Pose similarity scoring
+        if self.pose_similarity_model is not None:
+            with self.metrics.timer('analysis.similarity'):
+                packet.similarity_score, packet.corrections = self.pose_similarity_model.compare(smoothed_landmarks)
+        return self._record_packet(packet)
+
+    def _record_packet(self, packet):
+        """
+        Append the analysis results of a frame to the session recording.
+        """
+        with self.recording_lock:
+            if self.session_writer is None:
+                return packet
+            values = {'timestamp': packet.timestamp, 'rep_count': packet.rep_count, 'activity': packet.activity}
+            if packet.landmarks is not None:
+                values['raw_landmarks'] = packet.landmarks.data
+            landmarks = packet.refined_landmarks
+            if landmarks is not None:
+                self.motion_analyzer.update_landmarks(landmarks)
+                velocities, _ = self.motion_analyzer.get_motion_parameters()
+                values['landmarks'] = landmarks.data
+                values['joint_angles'] = self.joint_angles_calculator.calculate_angles(landmarks)
+                values['center_of_mass'] = self.com_estimator.estimate_com(landmarks)
+                values['velocities'] = np.array(list(velocities.values())) if velocities else None
+            self.session_writer.append(**values)
+        return packet
+
+    def _feedback_stage(self, packet):
+        """
+        Feedback based on pose similarity and joint angles.
+        """
+        if packet.form_feedback and self.audio_feedback is not None:
+            self.audio_feedback.provide_correction(packet.form_feedback[0], key='form')
+        if packet.similarity_score is not None:
+            packet.feedback_message = self._handle_pose_feedback(packet.similarity_score, packet.corrections,
+                                                                 packet.joint_angles)
+        elif packet.form_feedback is not None:
+            packet.feedback_message = " ".join(packet.form_feedback) or self.feedback_generator.ok_message
+        return packet
+
+    def _render_stage(self, packet):
+        """
+        Draw feedback overlays.
+        """
+        packet.frame = self._draw_overlays(packet.frame, packet.refined_landmarks, packet.similarity_score,
+                                           packet.corrections, packet.rom_status, packet.rep_count)
+        return packet
+
+    def _needs_refinement(self, landmarks):
+        """Refinement is only worth running when BlazePose is unsure about the landmarks."""
+        return landmarks.visibility.mean() < self.refinement_confidence
+
+    def _refine_landmarks(self, frame, landmarks):
+        """Refine landmark image coordinates with the heatmap-based pose refiner."""
+        refined_points = self.pose_refiner.refine_pose(self._generate_heatmap(frame, landmarks))
+        return landmarks.with_xy(refined_points[:NUM_LANDMARKS])
 
     def _preprocess_lighting(self, frame):
-        """Equalizes histogram of the input frame for better visibility."""
-        frame_yuv = cv2.cvtColor(frame, cv2.COLOR_BGR2YUV)
-        frame_yuv[:, :, 0] = cv2.equalizeHist(frame_yuv[:, :, 0])
-        return cv2.cvtColor(frame_yuv, cv2.COLOR_YUV2BGR)
+        """Refresh the cached equalization curve; it is applied to the model input's luma (see LightingNormalizer)."""
+        self.lighting_normalizer.update(frame)
 
     def _generate_heatmap(self, frame, landmarks):
-        """Generate a simple heatmap from landmarks."""
-        heatmap = np.zeros((frame.shape[0], frame.shape[1]), dtype=np.uint8)
-        for lm in landmarks:
-            x, y = int(lm.x * frame.shape[1]), int(lm.y * frame.shape[0])
-            cv2.circle(heatmap, (x, y), 10, 255, -1)
-        return heatmap
+        """Rasterize the landmark heatmap directly at the refinement network's input resolution."""
+        return landmark_heatmaps(landmarks.xy, (frame.shape[1], frame.shape[0]))
 
     def _recognize_activity(self, landmarks):
-        """Perform activity recognition using keypoints."""
-        keypoints_sequence = np.array([[lm.x, lm.y] for lm in landmarks]).flatten()
-        activity = self.activity_recognizer.predict_activity([keypoints_sequence])
+        """Perform streaming activity recognition: one recurrent LSTM step per frame."""
+        if self.activity_recognizer is None:
+            return None
+        keypoints = self.activity_recognizer.keypoints_from_pose(landmarks)
+        activity = self.activity_recognizer.predict_step(keypoints)
         if activity != self.previous_activity:
             print(f"Activity: {activity}")
             self.previous_activity = activity
@@ -132,12 +572,18 @@ class PoseTracker:
         Provide feedback based on pose similarity and joint angles.
         """
         if similarity_score >= self.similarity_threshold:
-            overuse_joints = self.injury_analyzer.analyze_joint_stress(joint_angles)
-            if overuse_joints:
-                print(f"Warning: Overuse in {overuse_joints}")
+            if self.audio_feedback is not None:
+                self.audio_feedback.cancel('correction')  # Posture is fine now; a queued correction is stale
+            if self.injury_analyzer is not None:
+                overuse_joints = self.injury_analyzer.analyze_joint_stress(joint_angles)
+                if overuse_joints:
+                    print(f"Warning: Overuse in {overuse_joints}")
+            if self.adaptive_coach is None:
+                return self.feedback_generator.ok_message or ""
             return self.adaptive_coach.adjust_workout(similarity_score, self.rep_count)
         elif similarity_score < 70:
-            self.audio_feedback.provide_correction("Adjust your posture!")
+            if self.audio_feedback is not None:
+                self.audio_feedback.provide_correction(POSTURE_CORRECTION)
             return "Posture needs improvement."
         return "Pose accuracy too low for feedback."
 
@@ -145,38 +591,15 @@ class PoseTracker:
         """
         Update the range of motion (ROM) status and repetition count based on joint angles.
         """
-        exercise_logic = {
-            'squat': 'left_knee',
-            'push_up': 'left_elbow'
-        }
-        joint = exercise_logic.get(self.exercise_type)
-        if joint and joint in joint_angles:
-            angle = joint_angles[joint]
-            if angle > 160:
-                self._reset_rep()
-            elif angle <= 90:
-                self._start_rep()
-
-    def _reset_rep(self):
-        if self.rep_started:
-            self.rep_count += 1
-            self.rep_started = False
+        previous_count = self.rep_count
+        self.rep_counter.update(joint_angles, self.exercise_type)
+        if self.rep_count != previous_count:
             print(f"Rep Count: {self.rep_count}")
-        self.rom_status = 'white'
-
-    def _start_rep(self):
-        self.rom_status = 'dark_green'
-        self.rep_started = True
 
-    def _draw_overlays(self, frame, landmarks, similarity_score, corrections):
+    def _draw_overlays(self, frame, landmarks, similarity_score, corrections, rom_status=None, rep_count=None):
         """
-        Draw pose landmarks and auto-corrections on the frame.
+        Draw the skeleton, landmarks, ROM/rep legend and auto-corrections on the frame
+        (at the render size, when one is set).
         """
-        for idx, lm in enumerate(landmarks):
-            x, y = int(lm.x * frame.shape[1]), int(lm.y * frame.shape[0])
-            cv2.circle(frame, (x, y), 5, (0, 255, 0), -1)
-            cv2.putText(frame, str(idx), (x + 5, y - 5), cv2.FONT_HERSHEY_SIMPLEX, 0.4, (255, 0, 0), 1)
-        if corrections:
-            frame = draw_auto_corrections(frame, corrections)
-            frame = draw_pose_accuracy_overlay(frame, similarity_score)
-        return frame
\ No newline at end of file
+        return self.overlay_renderer.render(frame, landmarks, rom_status, rep_count, similarity_score, corrections,
+                                            output_size=self.render_size)
\ No newline at end of file
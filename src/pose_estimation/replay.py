@@ -0,0 +1,184 @@
+import argparse
+import sys
+import time
+import numpy as np
+from biomechanics.joint_angles import JointAnglesCalculator
+from biomechanics.rep_counter import RepCounter
+from biomechanics.symmetry_analysis import SymmetryAnalyzer
+from feedback.feedback_generator import FeedbackGenerator
+from pose_estimation.pose_frame import PoseFrame
+from pose_estimation.temporal_smoothing import TemporalSmoothing
+from utils.session_store import SessionReader
+
+
+class ReplaySource:
+    """
+    Landmark stream read back from a recorded session file, in place of the camera and pose model.
+
+    Iterating yields (timestamp, PoseFrame) pairs, with None for frames in which no pose was detected.
+    """
+    def __init__(self, path, realtime=False, speed=1.0, column=None, start=0, stop=None):
+        """
+        Args:
+            path (str): Session file written by PoseTracker.start_recording().
+            realtime (bool): Pace the stream at the original frame timing instead of full speed.
+            speed (float): Playback speed multiplier in realtime mode.
+            column (str): Landmark column to replay. Defaults to the raw BlazePose landmarks
+                ('raw_landmarks'), falling back to the refined 'landmarks'.
+            start (int): First frame to replay.
+            stop (int): Frame to stop before (default: end of the session).
+        """
+        if speed <= 0:
+            raise ValueError(f"Replay speed must be positive: {speed}")
+        self.path = path
+        self.realtime = realtime
+        self.speed = speed
+        self.start = start
+        self.stop = stop
+        with SessionReader(path) as session:
+            self.metadata = session.metadata
+            self.column = column or ('raw_landmarks' if 'raw_landmarks' in session.columns else 'landmarks')
+            if self.column not in session.columns:
+                raise ValueError(f"Session has no landmark column {self.column}")
+            self.frame_count = len(range(*slice(start, stop).indices(len(session))))
+
+    def __len__(self):
+        return self.frame_count
+
+    def __iter__(self):
+        with SessionReader(self.path) as session:
+            first_timestamp = None
+            wall_start = time.perf_counter()
+            for chunk in session.iter_chunks(['timestamp', self.column]):
+                frames = chunk['frame']
+                keep = (frames >= self.start) & (frames < self.start + self.frame_count)
+                timestamps = chunk['timestamp'][keep]
+                landmarks = chunk[self.column][keep]
+                detected = ~np.isnan(landmarks[:, 0, 0])
+
+                for timestamp, data, has_pose in zip(timestamps.tolist(), landmarks, detected.tolist()):
+                    if self.realtime:
+                        if first_timestamp is None:
+                            first_timestamp = timestamp
+                        delay = (timestamp - first_timestamp) / self.speed - (time.perf_counter() - wall_start)
+                        if delay > 0:
+                            time.sleep(delay)
+                    yield timestamp, PoseFrame(data, timestamp) if has_pose else None
+
+
+class ReplayFrame:
+    """
+    Analysis results of one replayed frame.
+    """
+    __slots__ = ('timestamp', 'landmarks', 'smoothed_landmarks', 'joint_angles', 'rom_status', 'rep_count',
+                 'symmetry', 'feedback_message')
+
+    def __init__(self, timestamp, landmarks):
+        self.timestamp = timestamp
+        self.landmarks = landmarks
+        self.smoothed_landmarks = None
+        self.joint_angles = {}
+        self.rom_status = 'white'
+        self.rep_count = 0
+        self.symmetry = {}
+        self.feedback_message = None
+
+
+class ReplayAnalyzer:
+    """
+    The analysis layer of PoseTracker (temporal smoothing, joint angles, ROM and rep counting,
+    symmetry and feedback) driven from recorded landmarks, without video or model stages.
+    """
+    def __init__(self, exercise_type='all', smoothing_method='kalman'):
+        self.exercise_type = exercise_type
+        self.temporal_smoother = TemporalSmoothing(window_size=10, method=smoothing_method)
+        self.joint_angles_calculator = JointAnglesCalculator()
+        self.rep_counter = RepCounter()
+        self.symmetry_analyzer = SymmetryAnalyzer()
+        self.feedback_generator = FeedbackGenerator(exercise_type, joint_names=self.joint_angles_calculator.joint_names)
+
+    def reset(self):
+        self.temporal_smoother.reset()
+        self.rep_counter.reset()
+        self.feedback_generator.reset()
+
+    def analyze(self, timestamp, landmarks):
+        """
+        Run the analysis layer on one replayed frame.
+
+        Args:
+            timestamp (float): Original capture time of the frame.
+            landmarks (PoseFrame): Recorded landmarks, or None if no pose was detected.
+
+        Returns:
+            ReplayFrame: The analysis results.
+        """
+        result = ReplayFrame(timestamp, landmarks)
+        result.rom_status, result.rep_count = self.rep_counter.rom_status, self.rep_counter.rep_count
+        if landmarks is None:
+            return result
+
+        smoothed_landmarks = self.temporal_smoother.smooth_landmarks(landmarks)
+        angles = self.joint_angles_calculator.calculate_angles(smoothed_landmarks)
+        joint_angles = self.joint_angles_calculator.angles_to_dict(angles)
+
+        result.smoothed_landmarks = smoothed_landmarks
+        result.joint_angles = joint_angles
+        result.rom_status, result.rep_count = self.rep_counter.update(joint_angles, self.exercise_type)
+        result.symmetry = self.symmetry_analyzer.analyze_symmetry(
+            {name: angle for name, angle in joint_angles.items() if angle is not None})
+        result.feedback_message = self.feedback_generator.analyze_joint_angles(angles, self.rep_counter.phase)
+        return result
+
+    def run(self, source):
+        """
+        Analyze every frame of a replay source.
+
+        Yields:
+            ReplayFrame: The analysis results, frame by frame.
+        """
+        for timestamp, landmarks in source:
+            yield self.analyze(timestamp, landmarks)
+
+    def replay(self, source):
+        """
+        Analyze a whole replay source and summarize it.
+
+        Returns:
+            dict: Frame counts, final rep count and analysis throughput.
+        """
+        frames = frames_with_pose = 0
+        start_time = time.perf_counter()
+        for result in self.run(source):
+            frames += 1
+            frames_with_pose += result.landmarks is not None
+        elapsed = time.perf_counter() - start_time
+        return {
+            'frames': frames,
+            'frames_with_pose': frames_with_pose,
+            'rep_count': self.rep_counter.rep_count,
+            'elapsed': elapsed,
+            'fps': frames / elapsed if elapsed > 0 else 0.0,
+        }
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Replay a recorded session through the analysis layer.")
+    parser.add_argument('session', help="Session file written by PoseTracker.start_recording().")
+    parser.add_argument('--realtime', action='store_true', help="Replay at the original frame timing.")
+    parser.add_argument('--speed', type=float, default=1.0, help="Playback speed multiplier with --realtime.")
+    parser.add_argument('--exercise', default=None,
+                        help="Exercise type used for rep counting (default: the recorded one).")
+    parser.add_argument('--smoothing', default='kalman', help="Temporal smoothing method.")
+    args = parser.parse_args(argv)
+
+    source = ReplaySource(args.session, realtime=args.realtime, speed=args.speed)
+    exercise_type = args.exercise or source.metadata.get('exercise_type') or 'all'
+    summary = ReplayAnalyzer(exercise_type, args.smoothing).replay(source)
+    print(f"{summary['frames']} frames ({summary['frames_with_pose']} with pose), {summary['rep_count']} reps, "
+          f"{summary['fps']:.0f} frames/s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
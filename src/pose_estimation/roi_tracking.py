@@ -0,0 +1,204 @@
+import numpy as np
+from collections import deque
+
+
+class RoiTracker:
+    """
+    Region of interest around the tracked person, so pose estimation only has to look at a crop of
+    the frame instead of the whole (wide-angle) image.
+
+    The region is the bounding box of the visible landmarks, padded on every side, shifted by the
+    predicted motion to the next frame and stretched along it. It is sticky: as long as the predicted
+    box with half the padding stays inside the current region and the region is not much larger than
+    needed, the crop does not move, so the model's own frame-to-frame tracking keeps working on a
+    stable image. All boxes are (x0, y0, x1, y1) in normalized frame coordinates.
+    """
+    def __init__(self, padding=0.25, min_size=0.2, min_visibility=0.5, min_landmarks=8, max_area_ratio=2.5,
+                 velocity_smoothing=0.5):
+        """
+        Args:
+            padding (float): Padding added on each side, as a fraction of the landmark box size.
+            min_size (float): Minimum region width and height, as a fraction of the frame.
+            min_visibility (float): Visibility a landmark needs to count towards the box.
+            min_landmarks (int): Visible landmarks needed to keep the track.
+            max_area_ratio (float): Re-fit the region once it is this many times larger than needed.
+            velocity_smoothing (float): Weight of the newest motion estimate (0-1].
+        """
+        if not 0.0 < velocity_smoothing <= 1.0:
+            raise ValueError("velocity_smoothing must be in (0, 1]")
+        self.padding = padding
+        self.min_size = min_size
+        self.min_visibility = min_visibility
+        self.min_landmarks = min_landmarks
+        self.max_area_ratio = max_area_ratio
+        self.velocity_smoothing = velocity_smoothing
+        self.reset()
+
+    def reset(self):
+        """
+        Drop the track; the next frame is processed in full.
+        """
+        self.roi = None
+        self.center = None
+        self.velocity = np.zeros(2, dtype=np.float32)  # Normalized units per second
+        self.timestamp = None
+        self.frame_interval = None
+
+    @property
+    def active(self):
+        return self.roi is not None
+
+    def crop_rect(self, width, height):
+        """
+        Pixel rectangle of the current region.
+
+        Returns:
+            tuple: (x0, y0, x1, y1) in pixels, or None without a track.
+        """
+        if self.roi is None:
+            return None
+        x0, y0, x1, y1 = self.roi
+        left, top = int(x0 * width), int(y0 * height)
+        right, bottom = int(np.ceil(x1 * width)), int(np.ceil(y1 * height))
+        if right - left < 2 or bottom - top < 2:
+            return None
+        return left, top, right, bottom
+
+    def _fit(self, low, high, motion, padding, min_size=0.0):
+        size = (high - low) * (1.0 + 2.0 * padding) + np.abs(motion)
+        size = np.clip(np.maximum(size, min_size), None, 1.0)
+        center = (low + high) * 0.5 + motion
+        # Shift rather than shrink the box where it leaves the frame
+        start = np.clip(center - size * 0.5, 0.0, 1.0 - size)
+        return np.concatenate([start, start + size])
+
+    def update(self, landmarks):
+        """
+        Update the region from the landmarks of the current frame.
+
+        Args:
+            landmarks (PoseFrame): Landmarks in normalized full-frame coordinates, or None when
+                the person was not found.
+
+        Returns:
+            bool: Whether the track is still held.
+        """
+        if landmarks is None:
+            self.reset()
+            return False
+        visible = landmarks.visibility >= self.min_visibility
+        if np.count_nonzero(visible) < self.min_landmarks:
+            self.reset()
+            return False
+
+        points = landmarks.xy[visible]
+        low, high = points.min(axis=0), points.max(axis=0)
+        center = (low + high) * 0.5
+        if self.center is not None and landmarks.timestamp > self.timestamp:
+            interval = landmarks.timestamp - self.timestamp
+            velocity = (center - self.center) / interval
+            self.velocity += self.velocity_smoothing * (velocity - self.velocity)
+            self.frame_interval = interval
+        self.center = center
+        self.timestamp = landmarks.timestamp
+
+        # Expected displacement until the next frame
+        motion = self.velocity * self.frame_interval if self.frame_interval else np.zeros(2, dtype=np.float32)
+        fitted = self._fit(low, high, motion, self.padding, self.min_size)
+        if self.roi is not None:
+            needed = self._fit(low, high, motion, 0.5 * self.padding)
+            inside = np.all(needed[:2] >= self.roi[:2]) and np.all(needed[2:] <= self.roi[2:])
+            roi_area = np.prod(self.roi[2:] - self.roi[:2])
+            if inside and roi_area <= self.max_area_ratio * np.prod(fitted[2:] - fitted[:2]):
+                return True
+        self.roi = fitted
+        return True
+
+
+def crop_to_frame(landmarks, rect, frame_size):
+    """
+    Map landmarks detected on a crop back to normalized full-frame coordinates (in place).
+
+    Args:
+        landmarks (PoseFrame): Landmarks normalized to the crop.
+        rect (tuple): (x0, y0, x1, y1) pixel rectangle of the crop.
+        frame_size (tuple): (width, height) of the full frame.
+
+    Returns:
+        PoseFrame: The same frame, remapped.
+    """
+    x0, y0, x1, y1 = rect
+    width, height = frame_size
+    scale_x = (x1 - x0) / width
+    data = landmarks.data
+    data[:, 0] = data[:, 0] * scale_x + x0 / width
+    data[:, 1] = data[:, 1] * ((y1 - y0) / height) + y0 / height
+    data[:, 2] *= scale_x  # BlazePose depth has the same scale as x
+    return landmarks
+
+
+class ComplexitySelector:
+    """
+    Picks the BlazePose model complexity (0 = lite, 1 = full, 2 = heavy) that fits a per-frame
+    latency budget.
+
+    Decisions use the median latency of the last `window` frames at the current complexity, and
+    are only taken once a full window has been measured since the last switch. The slow first
+    frames of a fresh model (graph initialization) and occasional re-detection spikes therefore
+    do not trigger a switch. The selector steps down when the current complexity goes over budget
+    and steps up when there is clear headroom and the next complexity was not already found too
+    slow (that finding expires after `retry_interval` frames, since load on the machine changes).
+    """
+    def __init__(self, budget_ms, max_complexity=2, min_complexity=0, window=15, headroom=0.6,
+                 retry_interval=300):
+        """
+        Args:
+            budget_ms (float): Per-frame latency budget of pose estimation.
+            max_complexity (int): Highest complexity to use; the selector starts here.
+            min_complexity (int): Lowest complexity to fall back to.
+            window (int): Frames the median latency is taken over.
+            headroom (float): Step up while the median is below this fraction of the budget.
+            retry_interval (int): Frames after which a too-slow complexity may be tried again.
+        """
+        if budget_ms <= 0:
+            raise ValueError("budget_ms must be positive")
+        if not 0 <= min_complexity <= max_complexity <= 2:
+            raise ValueError("Model complexities must satisfy 0 <= min_complexity <= max_complexity <= 2")
+        self.budget_ms = budget_ms
+        self.min_complexity = min_complexity
+        self.max_complexity = max_complexity
+        self.headroom = headroom
+        self.retry_interval = retry_interval
+        self.complexity = max_complexity
+        self.samples = deque(maxlen=window)  # Latencies at the current complexity since the last switch
+        self.latency_ms = {}  # Complexity -> last median latency
+        self.frames_since_switch = 0
+        self.switches = 0
+
+    def _switch(self, complexity):
+        self.complexity = complexity
+        self.samples.clear()
+        self.frames_since_switch = 0
+        self.switches += 1
+
+    def observe(self, latency_ms):
+        """
+        Record the latency of a frame processed at the current complexity.
+
+        Returns:
+            int: Complexity to use for the next frame.
+        """
+        self.samples.append(latency_ms)
+        self.frames_since_switch += 1
+        if len(self.samples) < self.samples.maxlen:
+            return self.complexity
+        median = float(np.median(self.samples))
+        self.latency_ms[self.complexity] = median
+
+        if median > self.budget_ms and self.complexity > self.min_complexity:
+            self._switch(self.complexity - 1)
+        elif median < self.headroom * self.budget_ms and self.complexity < self.max_complexity:
+            higher = self.latency_ms.get(self.complexity + 1)
+            if higher is None or higher <= self.budget_ms or self.frames_since_switch >= self.retry_interval:
+                self._switch(self.complexity + 1)
+        return self.complexity
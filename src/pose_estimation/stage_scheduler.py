@@ -0,0 +1,127 @@
+import cv2
+import numpy as np
+
+
+class ScheduledStage:
+    """
+    Scheduling policy and cached result of one expensive per-frame stage.
+    """
+    def __init__(self, name, every_n=1, condition=None, cache=True, enabled=True):
+        self.name = name
+        self.every_n = every_n
+        self.condition = condition
+        self.cache = cache
+        self.enabled = enabled
+        self.result = None
+        self.last_run = None
+        self.runs = 0
+        self.skips = 0
+
+
+class StageScheduler:
+    """
+    Decides which expensive stages run on the current frame.
+
+    Each stage declares a target rate (run every N-th frame) and/or a condition evaluated on
+    the current frame (e.g. a scene change or a drop in landmark confidence). When a stage is
+    not due, its last result is reused.
+    """
+    def __init__(self):
+        self.stages = {}
+        self.frame_index = 0
+
+    def register(self, name, every_n=1, condition=None, cache=True, enabled=True):
+        """
+        Register a stage.
+
+        Args:
+            name (str): Stage name.
+            every_n (int): Run every N-th frame. 0 or None disables periodic runs.
+            condition (callable): Optional predicate called with the run context; the stage
+                also runs whenever it returns True.
+            cache (bool): Reuse the last result when the stage is skipped. Without caching a
+                skipped stage returns None and the first frame does not force a run.
+            enabled (bool): Disabled stages never run.
+        """
+        self.stages[name] = ScheduledStage(name, every_n, condition, cache, enabled)
+
+    def tick(self):
+        """
+        Advance to the next frame.
+        """
+        self.frame_index += 1
+
+    def due(self, name, context=None):
+        """
+        Check whether a stage should run on the current frame.
+        """
+        stage = self.stages[name]
+        if not stage.enabled:
+            return False
+        # The condition is evaluated on every frame so stateful predicates stay up to date
+        triggered = stage.condition is not None and bool(stage.condition(context))
+        if stage.cache and stage.last_run is None:
+            return True
+        if stage.every_n and (stage.last_run is None or self.frame_index - stage.last_run >= stage.every_n):
+            return True
+        return triggered
+
+    def run(self, name, func, *args, context=None, **kwargs):
+        """
+        Run func(*args, **kwargs) if the stage is due, otherwise reuse its cached result.
+
+        Args:
+            name (str): Registered stage name.
+            func (callable): Stage implementation.
+            context: Value handed to the stage condition.
+
+        Returns:
+            The fresh or cached result (None for skipped stages without caching).
+        """
+        stage = self.stages[name]
+        if self.due(name, context):
+            stage.result = func(*args, **kwargs)
+            stage.last_run = self.frame_index
+            stage.runs += 1
+            return stage.result
+        stage.skips += 1
+        return stage.result if stage.cache else None
+
+    def invalidate(self, name=None):
+        """
+        Drop cached results so the stage(s) run again on the next frame.
+        """
+        stages = self.stages.values() if name is None else [self.stages[name]]
+        for stage in stages:
+            stage.result = None
+            stage.last_run = None
+
+    def stats(self):
+        """
+        Number of runs and skips per stage.
+        """
+        return {name: {'runs': stage.runs, 'skips': stage.skips} for name, stage in self.stages.items()}
+
+
+class SceneChangeDetector:
+    """
+    Detects abrupt scene changes between consecutive frames on a small grayscale thumbnail.
+    """
+    def __init__(self, threshold=25.0, thumbnail_size=(32, 32)):
+        """
+        Args:
+            threshold (float): Mean absolute thumbnail difference (0-255) that counts as a scene change.
+            thumbnail_size (tuple): Size of the thumbnail frames are compared at.
+        """
+        self.threshold = threshold
+        self.thumbnail_size = thumbnail_size
+        self.previous = None
+
+    def __call__(self, frame):
+        thumbnail = cv2.resize(frame, self.thumbnail_size, interpolation=cv2.INTER_AREA)
+        if thumbnail.ndim == 3:
+            thumbnail = cv2.cvtColor(thumbnail, cv2.COLOR_BGR2GRAY)
+        previous, self.previous = self.previous, thumbnail.astype(np.int16)
+        if previous is None:
+            return False
+        return np.abs(self.previous - previous).mean() > self.threshold
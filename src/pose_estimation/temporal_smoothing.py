@@ -1,151 +1,246 @@
 import numpy as np
-from collections import deque, namedtuple
-from pykalman import KalmanFilter  # Install via pip install pykalman
+from pose_estimation.pose_frame import PoseFrame, NUM_LANDMARKS
 
-# Define a simple Landmark class
-Landmark = namedtuple('Landmark', ['x', 'y', 'z', 'visibility'])
+
+SMOOTHING_METHODS = ('kalman', 'weighted_avg', 'ema', 'one_euro')
+
+# Frame interval assumed when timestamps are missing or not increasing
+DEFAULT_FRAME_INTERVAL = 1.0 / 30
 
 
 class TemporalSmoothing:
     """
-    Temporal smoothing of landmarks using Kalman Filter, Weighted Average, or Exponential Moving Average.
+    Temporal smoothing of landmarks using Kalman Filter, Weighted Average, Exponential Moving Average
+    or the One Euro filter.
     """
-    def __init__(self, window_size=10, confidence_threshold=0.5, method='kalman', alpha=0.3):
+    def __init__(self, window_size=10, confidence_threshold=0.5, method='kalman', alpha=0.3,
+                 process_noise=50.0, measurement_noise=1e-4, min_cutoff=1.0, beta=20.0, derivative_cutoff=1.0):
         """
         Initialize TemporalSmoothing class.
 
         Args:
             window_size (int): Number of previous frames to consider for smoothing.
             confidence_threshold (float): Visibility threshold for valid landmarks.
-            method (str): Smoothing method. Options: ['kalman', 'weighted_avg', 'ema'].
+            method (str): Smoothing method. Options: ['kalman', 'weighted_avg', 'ema', 'one_euro'].
             alpha (float): Smoothing factor for EMA. Closer to 1 makes it more reactive.
+            process_noise (float): Kalman acceleration noise density. Higher values follow fast motion more closely.
+            measurement_noise (float): Kalman measurement variance in normalized image units.
+            min_cutoff (float): One Euro cutoff frequency (Hz) at rest. Lower values remove more jitter.
+            beta (float): One Euro speed coefficient. Higher values reduce lag during fast motion.
+            derivative_cutoff (float): One Euro cutoff frequency (Hz) used to smooth the speed estimate.
         """
         self.window_size = window_size
         self.confidence_threshold = confidence_threshold
         self.method = method.lower()
         self.alpha = alpha
+        self.process_noise = process_noise
+        self.measurement_noise = measurement_noise
+        self.min_cutoff = min_cutoff
+        self.beta = beta
+        self.derivative_cutoff = derivative_cutoff
 
-        # Storage for smoothing
-        self.landmark_queues = [deque(maxlen=window_size) for _ in range(33)]  # 33 landmarks assumed
-
-        # Kalman Filters for each landmark index
-        if self.method == 'kalman':
-            self.kalman_filters = [self._initialize_kalman_filter() for _ in range(33)]
+        if self.method not in SMOOTHING_METHODS:
+            raise ValueError(f"Unsupported smoothing method: {self.method}")
+        self.reset()
 
-    def _initialize_kalman_filter(self):
+    def reset(self):
+        """
+        Clear all smoothing history and filter state.
+        """
+        # Preallocated ring buffer of the last `window_size` frames and their confidence weights.
+        # Low-confidence samples are stored with zero weight.
+        self.history = np.zeros((self.window_size, NUM_LANDMARKS, 3))
+        self.history_weights = np.zeros((self.window_size, NUM_LANDMARKS))
+        self.history_index = 0
+
+        # Recursive filter state (EMA and One Euro) and its derivative estimate
+        self.filtered = np.zeros((NUM_LANDMARKS, 3))
+        self.filtered_velocity = np.zeros((NUM_LANDMARKS, 3))
+        self.filter_initialized = np.zeros(NUM_LANDMARKS, dtype=bool)
+
+        # Last valid (x, y, z, visibility) per landmark, used while a landmark is occluded
+        self.last_valid = np.zeros((NUM_LANDMARKS, 4), dtype=np.float32)
+
+        self.last_timestamp = None
+
+        # Constant-velocity Kalman state per landmark and axis. Axes are independent, so the
+        # 2x2 covariance [[p00, p01], [p01, p11]] of (position, velocity) is kept element-wise.
+        self.kf_position = np.zeros((NUM_LANDMARKS, 3))
+        self.kf_velocity = np.zeros((NUM_LANDMARKS, 3))
+        self.kf_p00 = np.zeros((NUM_LANDMARKS, 3))
+        self.kf_p01 = np.zeros((NUM_LANDMARKS, 3))
+        self.kf_p11 = np.zeros((NUM_LANDMARKS, 3))
+        self.kf_initialized = np.zeros(NUM_LANDMARKS, dtype=bool)
+
+    def _frame_interval(self, timestamp):
         """
-        Initialize a Kalman Filter for landmark smoothing.
+        Time elapsed since the previous frame, falling back to the nominal camera interval.
         """
-        kf = KalmanFilter(initial_state_mean=[0, 0, 0],
-                          n_dim_obs=3,
-                          transition_matrices=np.eye(3),  # Simple motion model
-                          observation_matrices=np.eye(3),
-                          observation_covariance=np.eye(3) * 0.1,  # Measurement noise
-                          transition_covariance=np.eye(3) * 0.01)  # Process noise
-        return kf
+        dt = DEFAULT_FRAME_INTERVAL
+        if self.last_timestamp is not None and timestamp > self.last_timestamp:
+            dt = timestamp - self.last_timestamp
+        self.last_timestamp = timestamp
+        return dt
 
     def smooth_landmarks(self, landmarks):
         """
         Apply smoothing to the given landmarks.
 
         Args:
-            landmarks (list of Landmark): List of raw landmarks to be smoothed.
+            landmarks (PoseFrame): Raw landmarks to be smoothed. MediaPipe landmark lists
+                are converted on entry.
 
         Returns:
-            list of Landmark: Smoothed landmarks.
+            PoseFrame: Smoothed landmarks with the same timestamp as the input.
         """
-        smoothed_landmarks = []
+        frame = PoseFrame.from_landmarks(landmarks)
+        smoothed = frame.copy()
 
-        for idx, landmark in enumerate(landmarks):
-            # Handle low-confidence landmarks
-            if landmark.visibility < self.confidence_threshold:
-                smoothed_landmarks.append(self._handle_missing_landmark(idx))
-                continue
+        valid = frame.visibility >= self.confidence_threshold
+        dt = self._frame_interval(frame.timestamp)
 
-            # Add current landmark to the queue
-            self.landmark_queues[idx].append(landmark)
-
-            # Perform smoothing based on method
-            if self.method == 'kalman':
-                smoothed_landmark = self._kalman_smooth(idx, landmark)
-            elif self.method == 'weighted_avg':
-                smoothed_landmark = self._weighted_average_smooth(idx, landmark)
-            elif self.method == 'ema':
-                smoothed_landmark = self._ema_smooth(idx, landmark)
-            else:
-                raise ValueError(f"Unsupported smoothing method: {self.method}")
+        # Every method updates all landmarks in a single vectorized step
+        if self.method == 'kalman':
+            smoothed.data[:, :3] = self._kalman_smooth(frame.xyz, valid, dt)
+        elif self.method == 'weighted_avg':
+            smoothed.data[:, :3] = self._weighted_average_smooth(frame.xyz, frame.visibility, valid)
+        elif self.method == 'ema':
+            smoothed.data[:, :3] = self._ema_smooth(frame.xyz, valid)
+        else:
+            smoothed.data[:, :3] = self._one_euro_smooth(frame.xyz, valid, dt)
+
+        # Low-confidence landmarks hold their last valid position
+        smoothed.data[~valid] = self.last_valid[~valid]
+        self.last_valid[valid] = frame.data[valid]
+        return smoothed
+
+    def _kalman_smooth(self, observations, valid, dt):
+        """
+        Smooth all landmarks with a constant-velocity Kalman Filter.
 
-            smoothed_landmarks.append(smoothed_landmark)
+        Every landmark axis follows a (position, velocity) motion model driven by white
+        acceleration noise. The filter state persists across frames, and prediction and
+        update are closed-form element-wise operations over the whole (33, 3) array.
 
-        return smoothed_landmarks
+        Args:
+            observations (np.ndarray): Observed (33, 3) landmark positions.
+            valid (np.ndarray): (33,) mask of landmarks confident enough to be used as measurements.
+            dt (float): Time since the previous frame in seconds.
 
-    def _handle_missing_landmark(self, idx):
+        Returns:
+            np.ndarray: Filtered (33, 3) landmark positions.
         """
-        Handle missing landmarks by returning the last valid position or default values.
+        q = self.process_noise
+        r = self.measurement_noise
+
+        # Predict: x = F x, P = F P F^T + Q with F = [[1, dt], [0, 1]]
+        self.kf_position += self.kf_velocity * dt
+        self.kf_p00 += dt * (2 * self.kf_p01 + dt * self.kf_p11) + q * dt ** 4 / 4
+        self.kf_p01 += dt * self.kf_p11 + q * dt ** 3 / 2
+        self.kf_p11 += q * dt ** 2
+
+        # Update tracked landmarks that have a measurement; the gain is zero everywhere else
+        update = (valid & self.kf_initialized)[:, None]
+        innovation_var = self.kf_p00 + r
+        k0 = np.where(update, self.kf_p00 / innovation_var, 0.0)
+        k1 = np.where(update, self.kf_p01 / innovation_var, 0.0)
+        residual = observations - self.kf_position
+        self.kf_position += k0 * residual
+        self.kf_velocity += k1 * residual
+        self.kf_p11 -= k1 * self.kf_p01
+        self.kf_p01 *= 1 - k0
+        self.kf_p00 *= 1 - k0
+
+        # Start tracking landmarks seen for the first time at their measured position
+        new = valid & ~self.kf_initialized
+        if new.any():
+            self.kf_position[new] = observations[new]
+            self.kf_velocity[new] = 0.0
+            self.kf_p00[new] = r
+            self.kf_p01[new] = 0.0
+            self.kf_p11[new] = 1.0
+            self.kf_initialized |= new
+
+        return self.kf_position
+
+    def _weighted_average_smooth(self, observations, visibility, valid):
         """
-        if len(self.landmark_queues[idx]) > 0:
-            return self.landmark_queues[idx][-1]
-        return Landmark(0.0, 0.0, 0.0, 0.0)  # Default to zero position if no history
-
-    def _kalman_smooth(self, idx, landmark):
-        """
-        Smooth landmarks using the Kalman Filter.
+        Smooth landmarks using weighted average, considering visibility as confidence.
 
         Args:
-            idx (int): Index of the landmark.
-            landmark (Landmark): Current landmark.
+            observations (np.ndarray): Observed (33, 3) landmark positions.
+            visibility (np.ndarray): (33,) landmark visibility scores used as weights.
+            valid (np.ndarray): (33,) mask of landmarks above the confidence threshold.
 
         Returns:
-            Landmark: Smoothed landmark.
+            np.ndarray: Smoothed (33, 3) landmark positions.
         """
-        kalman_filter = self.kalman_filters[idx]
-        observations = np.array([landmark.x, landmark.y, landmark.z])
-        kalman_filter = kalman_filter.em(observations, n_iter=1)
-        filtered_state_means, _ = kalman_filter.filter(observations)
+        self.history[self.history_index] = observations
+        self.history_weights[self.history_index] = np.where(valid, visibility, 0.0)
+        self.history_index = (self.history_index + 1) % self.window_size
+
+        total_weight = self.history_weights.sum(axis=0)
+        weighted_sum = np.einsum('wl,wlc->lc', self.history_weights, self.history)
+        with np.errstate(invalid='ignore', divide='ignore'):
+            average = weighted_sum / total_weight[:, None]
 
-        smoothed_x, smoothed_y, smoothed_z = filtered_state_means[-1]
-        return Landmark(smoothed_x, smoothed_y, smoothed_z, landmark.visibility)
+        # Fallback to the current position when there is no weighted history
+        return np.where(total_weight[:, None] > 0, average, observations)
 
-    def _weighted_average_smooth(self, idx, landmark):
+    def _ema_smooth(self, observations, valid):
         """
-        Smooth landmarks using weighted average, considering visibility as confidence.
+        Smooth landmarks using a recursive Exponential Moving Average (EMA).
+
+        The new sample is blended with the previous smoothed output, not the previous raw sample.
 
         Args:
-            idx (int): Index of the landmark.
-            landmark (Landmark): Current landmark.
+            observations (np.ndarray): Observed (33, 3) landmark positions.
+            valid (np.ndarray): (33,) mask of landmarks above the confidence threshold.
 
         Returns:
-            Landmark: Smoothed landmark.
+            np.ndarray: Smoothed (33, 3) landmark positions.
         """
-        landmarks = self.landmark_queues[idx]
-        weights = [lm.visibility for lm in landmarks]  # Confidence as weight
-
-        if not weights:  # Fallback to the current position
-            return landmark
-
-        avg_x = np.average([lm.x for lm in landmarks], weights=weights)
-        avg_y = np.average([lm.y for lm in landmarks], weights=weights)
-        avg_z = np.average([lm.z for lm in landmarks], weights=weights)
-        return Landmark(avg_x, avg_y, avg_z, landmark.visibility)
+        alpha = np.where(self.filter_initialized, self.alpha, 1.0)[:, None]
+        blended = alpha * observations + (1 - alpha) * self.filtered
+        self.filtered = np.where(valid[:, None], blended, self.filtered)
+        self.filter_initialized |= valid
+        return self.filtered
+
+    @staticmethod
+    def _smoothing_factor(cutoff, dt):
+        """
+        Exponential smoothing factor of a first-order low-pass filter with the given cutoff (Hz).
+        """
+        tau = 1.0 / (2 * np.pi * cutoff)
+        return 1.0 / (1.0 + tau / dt)
 
-    def _ema_smooth(self, idx, landmark):
+    def _one_euro_smooth(self, observations, valid, dt):
         """
-        Smooth landmarks using an Exponential Moving Average (EMA).
+        Smooth landmarks using the One Euro filter.
+
+        A low-pass filter whose cutoff frequency rises with the landmark speed: jitter is
+        removed while the landmark is still, and lag stays low during fast movements.
 
         Args:
-            idx (int): Index of the landmark.
-            landmark (Landmark): Current landmark.
+            observations (np.ndarray): Observed (33, 3) landmark positions.
+            valid (np.ndarray): (33,) mask of landmarks above the confidence threshold.
+            dt (float): Time since the previous frame in seconds.
 
         Returns:
-            Landmark: Smoothed landmark.
+            np.ndarray: Smoothed (33, 3) landmark positions.
         """
-        landmarks = self.landmark_queues[idx]
-        if len(landmarks) < 2:
-            return landmark  # Not enough history for EMA
+        initialized = self.filter_initialized[:, None]
+        update = valid[:, None]
+
+        velocity = np.where(initialized, (observations - self.filtered) / dt, 0.0)
+        alpha_d = self._smoothing_factor(self.derivative_cutoff, dt)
+        velocity = alpha_d * velocity + (1 - alpha_d) * self.filtered_velocity
 
-        prev_landmark = landmarks[-2]  # Previous smoothed landmark
-        smoothed_x = self.alpha * landmark.x + (1 - self.alpha) * prev_landmark.x
-        smoothed_y = self.alpha * landmark.y + (1 - self.alpha) * prev_landmark.y
-        smoothed_z = self.alpha * landmark.z + (1 - self.alpha) * prev_landmark.z
+        cutoff = self.min_cutoff + self.beta * np.abs(velocity)
+        alpha = np.where(initialized, self._smoothing_factor(cutoff, dt), 1.0)
+        filtered = alpha * observations + (1 - alpha) * self.filtered
 
-        return Landmark(smoothed_x, smoothed_y, smoothed_z, landmark.visibility)
\ No newline at end of file
+        self.filtered_velocity = np.where(update, velocity, self.filtered_velocity)
+        self.filtered = np.where(update, filtered, self.filtered)
+        self.filter_initialized |= valid
+        return self.filtered
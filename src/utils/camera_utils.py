@@ -1,3 +1,5 @@
+import threading
+import time
 import cv2
 
 def list_available_cameras():
@@ -17,13 +19,179 @@ def list_available_cameras():
         index += 1
     return cameras
 
-def set_camera_resolution(capture, width, height):
+def set_camera_resolution(capture, width, height, fps=None, fourcc=None):
     """
     Set the resolution of the camera capture.
     Parameters:
     - capture: The cv2.VideoCapture object.
     - width: Desired width of the frame.
     - height: Desired height of the frame.
+    - fps: Desired frame rate (optional).
+    - fourcc: Pixel format code such as 'MJPG' (optional). Compressed formats let USB cameras deliver
+      high resolutions at full frame rate; it is set first, as some backends reset it on resolution changes.
+    Returns:
+    - (width, height, fps): The settings the camera actually accepted.
     """
+    if fourcc:
+        capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*fourcc))
     capture.set(cv2.CAP_PROP_FRAME_WIDTH, width)
-    capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
\ No newline at end of file
+    capture.set(cv2.CAP_PROP_FRAME_HEIGHT, height)
+    if fps:
+        capture.set(cv2.CAP_PROP_FPS, fps)
+    return (int(capture.get(cv2.CAP_PROP_FRAME_WIDTH)), int(capture.get(cv2.CAP_PROP_FRAME_HEIGHT)),
+            capture.get(cv2.CAP_PROP_FPS))
+
+
+class CapturedFrame:
+    """
+    A camera frame with its capture times.
+    - timestamp: Wall-clock capture time (time.time()), used as the frame timestamp downstream.
+    - captured: time.perf_counter() at capture, for latency accounting.
+    - index: Sequence number of the frame since the capture started.
+    """
+    __slots__ = ('frame', 'timestamp', 'captured', 'index')
+
+    def __init__(self, frame, timestamp, captured, index):
+        self.frame = frame
+        self.timestamp = timestamp
+        self.captured = captured
+        self.index = index
+
+
+class CameraCapture:
+    """
+    Reads a camera on its own thread into a single-slot latest-frame buffer.
+
+    Each new frame replaces the previous one whether or not it was consumed, so a slow consumer
+    always processes the freshest frame instead of working through the camera's buffered backlog.
+    """
+    def __init__(self, source=0, width=None, height=None, fps=None, fourcc=None, backend=cv2.CAP_ANY,
+                 max_failures=30):
+        """
+        Parameters:
+        - source: Camera index or video path/URL.
+        - width, height: Requested resolution (camera default when None).
+        - fps: Requested frame rate.
+        - fourcc: Requested pixel format, e.g. 'MJPG'.
+        - backend: OpenCV capture backend (cv2.CAP_ANY, cv2.CAP_V4L2, cv2.CAP_DSHOW, ...).
+        - max_failures: Consecutive failed reads after which the capture stops.
+        """
+        self.source = source
+        self.width = width
+        self.height = height
+        self.fps = fps
+        self.fourcc = fourcc
+        self.backend = backend
+        self.max_failures = max_failures
+        self.capture = None
+        self.thread = None
+        self.running = False
+        self.condition = threading.Condition()
+        self.latest = None
+        self.last_read_index = -1
+        self.frames_captured = 0
+        self.frames_dropped = 0  # Frames replaced before anyone read them
+
+    def start(self):
+        """
+        Open the camera and start the capture thread.
+        Returns:
+        - (width, height, fps): The settings the camera actually uses.
+        """
+        if self.running:
+            raise RuntimeError("Camera capture is already running")
+        self.capture = cv2.VideoCapture(self.source, self.backend)
+        if not self.capture.isOpened():
+            raise RuntimeError(f"Could not open camera {self.source}")
+        # Keep the driver queue as short as possible; the latest-frame slot does the buffering
+        self.capture.set(cv2.CAP_PROP_BUFFERSIZE, 1)
+        if self.width and self.height:
+            settings = set_camera_resolution(self.capture, self.width, self.height, self.fps, self.fourcc)
+        else:
+            if self.fourcc:
+                self.capture.set(cv2.CAP_PROP_FOURCC, cv2.VideoWriter_fourcc(*self.fourcc))
+            if self.fps:
+                self.capture.set(cv2.CAP_PROP_FPS, self.fps)
+            settings = (int(self.capture.get(cv2.CAP_PROP_FRAME_WIDTH)),
+                        int(self.capture.get(cv2.CAP_PROP_FRAME_HEIGHT)), self.capture.get(cv2.CAP_PROP_FPS))
+
+        self.latest = None
+        self.last_read_index = -1
+        self.frames_captured = self.frames_dropped = 0
+        self.running = True
+        self.thread = threading.Thread(target=self._run, name='camera-capture', daemon=True)
+        self.thread.start()
+        return settings
+
+    def _run(self):
+        # Local reference: stop() may release the capture while a grab() is still blocked
+        capture = self.capture
+        failures = 0
+        while self.running:
+            # Timestamp at grab() (closest to exposure); decoding happens in retrieve()
+            grabbed = capture.grab()
+            timestamp, captured = time.time(), time.perf_counter()
+            ok, frame = capture.retrieve() if grabbed else (False, None)
+            if not ok:
+                failures += 1
+                if failures >= self.max_failures:
+                    print(f"Camera {self.source} stopped delivering frames")
+                    break
+                time.sleep(0.01)
+                continue
+            failures = 0
+
+            with self.condition:
+                if self.latest is not None and self.latest.index > self.last_read_index:
+                    self.frames_dropped += 1
+                self.latest = CapturedFrame(frame, timestamp, captured, self.frames_captured)
+                self.frames_captured += 1
+                self.condition.notify_all()
+
+        with self.condition:
+            if self.capture is capture:  # Not restarted on a new capture in the meantime
+                self.running = False
+            self.condition.notify_all()
+
+    def read(self, timeout=1.0):
+        """
+        Return the latest frame not returned before, waiting for the next one if needed.
+        Parameters:
+        - timeout: Maximum wait in seconds (None waits indefinitely).
+        Returns:
+        - CapturedFrame, or None on timeout or when the capture has stopped.
+        """
+        with self.condition:
+            ready = self.condition.wait_for(
+                lambda: not self.running or (self.latest is not None and self.latest.index > self.last_read_index),
+                timeout)
+            if not ready or self.latest is None or self.latest.index <= self.last_read_index:
+                return None
+            self.last_read_index = self.latest.index
+            return self.latest
+
+    def stop(self, timeout=1.0):
+        """
+        Stop the capture thread and release the camera.
+        Parameters:
+        - timeout: Maximum wait in seconds for the capture thread; a driver stuck in grab() does not
+          hang the caller, the camera is released anyway.
+        """
+        self.running = False
+        with self.condition:
+            self.condition.notify_all()
+        if self.thread is not None:
+            self.thread.join(timeout)
+            if self.thread.is_alive():
+                print(f"Camera {self.source} capture thread did not stop within {timeout} s")
+            self.thread = None
+        if self.capture is not None:
+            self.capture.release()
+            self.capture = None
+
+    def __enter__(self):
+        self.start()
+        return self
+
+    def __exit__(self, exc_type, exc, traceback):
+        self.stop()
@@ -0,0 +1,133 @@
+import threading
+import time
+
+# Component load states
+PENDING = 'pending'
+LOADING = 'loading'
+READY = 'ready'
+FAILED = 'failed'
+
+
+class _Component:
+    __slots__ = ('name', 'factory', 'on_ready', 'state', 'value', 'error', 'seconds')
+
+    def __init__(self, name, factory, on_ready):
+        self.name = name
+        self.factory = factory
+        self.on_ready = on_ready
+        self.state = PENDING
+        self.value = None
+        self.error = None
+        self.seconds = None
+
+
+class ComponentLoader:
+    """
+    Builds expensive components (model weights, heavy imports) in registration order, either in the
+    calling thread or on a background thread so the application can start before they are ready.
+
+    Each component reports a state (pending, loading, ready, failed) and its load time. Listeners are
+    called as listener(name, state) from the loading thread on every state change.
+    """
+    def __init__(self):
+        self.components = {}
+        self.listeners = []
+        self.lock = threading.Lock()
+        self.done = threading.Event()
+        self.thread = None
+
+    def register(self, name, factory, on_ready=None):
+        """
+        Args:
+            name (str): Component name.
+            factory (callable): Builds and returns the component (imports belong inside it).
+            on_ready (callable): Called with the built component, e.g. to install it on its owner.
+        """
+        if name in self.components:
+            raise ValueError(f"Component already registered: {name}")
+        self.components[name] = _Component(name, factory, on_ready)
+        self.done.clear()
+
+    def add_listener(self, listener):
+        self.listeners.append(listener)
+
+    def _set_state(self, component, state):
+        with self.lock:
+            component.state = state
+        for listener in self.listeners:
+            listener(component.name, state)
+
+    def _load(self, component):
+        self._set_state(component, LOADING)
+        start = time.perf_counter()
+        try:
+            component.value = component.factory()
+            if component.on_ready is not None:
+                component.on_ready(component.value)
+        except Exception as e:
+            component.error = f"{type(e).__name__}: {e}"
+            component.seconds = time.perf_counter() - start
+            print(f"Failed to load {component.name}: {component.error}")
+            self._set_state(component, FAILED)
+            return e
+        component.seconds = time.perf_counter() - start
+        self._set_state(component, READY)
+        return None
+
+    def load_all(self, raise_errors=False):
+        """
+        Load all pending components in the calling thread.
+
+        Args:
+            raise_errors (bool): Re-raise the first load error instead of carrying on without the component.
+        """
+        try:
+            for component in list(self.components.values()):
+                if component.state == PENDING:
+                    error = self._load(component)
+                    if error is not None and raise_errors:
+                        raise error
+        finally:
+            self.done.set()
+
+    def start(self):
+        """
+        Load all pending components on a background thread.
+        """
+        if self.thread is None or not self.thread.is_alive():
+            self.done.clear()
+            self.thread = threading.Thread(target=self.load_all, name='component-loader', daemon=True)
+            self.thread.start()
+
+    def wait(self, timeout=None):
+        """
+        Block until every component has finished loading (or failed).
+
+        Returns:
+            bool: False on timeout.
+        """
+        return self.done.wait(timeout)
+
+    def state(self, name):
+        return self.components[name].state
+
+    def is_ready(self, name):
+        return self.components[name].state == READY
+
+    def progress(self):
+        """
+        Fraction of the components that finished loading (ready or failed).
+        """
+        if not self.components:
+            return 1.0
+        finished = sum(c.state in (READY, FAILED) for c in self.components.values())
+        return finished / len(self.components)
+
+    def status(self):
+        """
+        Returns:
+            dict: Component name -> {'state', 'seconds', 'error'}.
+        """
+        with self.lock:
+            return {c.name: {'state': c.state, 'seconds': c.seconds, 'error': c.error}
+                    for c in self.components.values()}
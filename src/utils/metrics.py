@@ -0,0 +1,273 @@
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import numpy as np
+
+# Quantiles reported for every latency histogram
+QUANTILES = (0.5, 0.95, 0.99)
+DEFAULT_EXPORTER_PORT = 9108
+
+
+class RollingHistogram:
+    """
+    Latency distribution over the most recent `window` samples.
+
+    Samples go into a preallocated ring buffer; quantiles are computed on demand, so
+    recording a sample is O(1) on the frame path. Lifetime count and sum are kept as well.
+    """
+    def __init__(self, window=300):
+        self.window = window
+        self.samples = np.zeros(window)
+        self.index = 0
+        self.total_count = 0
+        self.total_sum = 0.0
+
+    def add(self, value):
+        self.samples[self.index] = value
+        self.index = (self.index + 1) % self.window
+        self.total_count += 1
+        self.total_sum += value
+
+    def values(self):
+        return self.samples[:min(self.total_count, self.window)]
+
+    def snapshot(self):
+        """
+        Returns:
+            dict: count, mean, max and the QUANTILES of the rolling window (None when empty).
+        """
+        values = self.values()
+        if not len(values):
+            return {'count': 0, 'mean': None, 'max': None, **{f"p{int(q * 100)}": None for q in QUANTILES}}
+        quantiles = np.quantile(values, QUANTILES)
+        snapshot = {'count': self.total_count, 'mean': float(values.mean()), 'max': float(values.max())}
+        snapshot.update({f"p{int(q * 100)}": float(v) for q, v in zip(QUANTILES, quantiles)})
+        return snapshot
+
+
+class RateMeter:
+    """
+    Event rate (e.g. frames per second) over a sliding time window.
+    """
+    def __init__(self, window_seconds=5.0):
+        self.window_seconds = window_seconds
+        self.events = deque()
+
+    def mark(self, now=None):
+        now = time.monotonic() if now is None else now
+        self.events.append(now)
+        while self.events and now - self.events[0] > self.window_seconds:
+            self.events.popleft()
+
+    def rate(self):
+        if len(self.events) < 2:
+            return 0.0
+        span = self.events[-1] - self.events[0]
+        return (len(self.events) - 1) / span if span > 0 else 0.0
+
+
+class _StageTimer:
+    __slots__ = ('metrics', 'name', 'start')
+
+    def __init__(self, metrics, name):
+        self.metrics = metrics
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.metrics.observe(self.name, time.perf_counter() - self.start)
+
+
+class PipelineMetrics:
+    """
+    Live performance metrics of the frame pipeline: rolling per-stage latency histograms,
+    end-to-end frame latency, effective fps, dropped frames and queue depths.
+
+    Dropped frames and queue depths are pulled from `pipeline_source`, a callable returning the
+    running FramePipeline (or None), whenever a snapshot is taken.
+    """
+    def __init__(self, window=300, log_interval=None, pipeline_source=None):
+        """
+        Args:
+            window (int): Samples kept per latency histogram.
+            log_interval (float): Print a summary line every N seconds. None disables logging.
+            pipeline_source (callable): Returns the running FramePipeline, if any.
+        """
+        self.window = window
+        self.log_interval = log_interval
+        self.pipeline_source = pipeline_source
+        self.stage_latency = {}
+        self.frame_latency = RollingHistogram(window)
+        self.frame_rate = RateMeter()
+        self.frames = 0
+        self.last_log = time.monotonic()
+        self._lock = threading.Lock()
+
+    def timer(self, name):
+        """
+        Context manager timing one step of the pipeline into the histogram of `name`.
+        """
+        return _StageTimer(self, name)
+
+    def timed(self, name, func):
+        """
+        Wrap a stage function so every call is timed into the histogram of `name`.
+        """
+        def timed_stage(item):
+            start = time.perf_counter()
+            try:
+                return func(item)
+            finally:
+                self.observe(name, time.perf_counter() - start)
+        return timed_stage
+
+    def observe(self, name, seconds):
+        """
+        Record one latency sample (in seconds) for a stage.
+        """
+        with self._lock:
+            histogram = self.stage_latency.get(name)
+            if histogram is None:
+                histogram = self.stage_latency[name] = RollingHistogram(self.window)
+            histogram.add(seconds * 1000.0)
+
+    def frame_done(self, latency):
+        """
+        Record a finished frame and its end-to-end latency (in seconds).
+        """
+        with self._lock:
+            self.frames += 1
+            self.frame_latency.add(latency * 1000.0)
+            self.frame_rate.mark()
+        if self.log_interval is not None and time.monotonic() - self.last_log >= self.log_interval:
+            self.last_log = time.monotonic()
+            print(self.log_line())
+
+    def reset(self):
+        with self._lock:
+            self.stage_latency = {}
+            self.frame_latency = RollingHistogram(self.window)
+            self.frame_rate = RateMeter()
+            self.frames = 0
+
+    def snapshot(self):
+        """
+        Current metrics.
+
+        Returns:
+            dict: fps, frames, frame_latency_ms and stage_latency_ms histograms (ms),
+            dropped_frames and queue_depths per pipeline queue.
+        """
+        pipeline = self.pipeline_source() if self.pipeline_source is not None else None
+        with self._lock:
+            return {
+                'fps': self.frame_rate.rate(),
+                'frames': self.frames,
+                'frame_latency_ms': self.frame_latency.snapshot(),
+                'stage_latency_ms': {name: histogram.snapshot() for name, histogram in self.stage_latency.items()},
+                'dropped_frames': pipeline.dropped_frames() if pipeline is not None else {},
+                'queue_depths': pipeline.queue_depths() if pipeline is not None else {},
+            }
+
+    def log_line(self, snapshot=None):
+        """
+        One-line summary, e.g. "fps 29.8 | frame p50 31.2ms p95 40.1ms | pose 12.0/15.3ms | ... | dropped 2".
+        """
+        snapshot = snapshot or self.snapshot()
+        frame = snapshot['frame_latency_ms']
+        parts = [f"fps {snapshot['fps']:.1f}"]
+        if frame['count']:
+            parts.append(f"frame p50 {frame['p50']:.1f}ms p95 {frame['p95']:.1f}ms")
+        for name, stage in snapshot['stage_latency_ms'].items():
+            if stage['count']:
+                parts.append(f"{name} {stage['p50']:.1f}/{stage['p95']:.1f}ms")
+        if snapshot['dropped_frames']:
+            parts.append(f"dropped {sum(snapshot['dropped_frames'].values())}")
+        if snapshot['queue_depths']:
+            parts.append("queues " + " ".join(f"{name}={depth}" for name, depth in snapshot['queue_depths'].items()))
+        return " | ".join(parts)
+
+    def prometheus_text(self, prefix='robiq'):
+        """
+        Metrics in the Prometheus text exposition format.
+        """
+        snapshot = self.snapshot()
+        lines = [
+            f"# TYPE {prefix}_fps gauge",
+            f"{prefix}_fps {snapshot['fps']:.3f}",
+            f"# TYPE {prefix}_frames_total counter",
+            f"{prefix}_frames_total {snapshot['frames']}",
+        ]
+        lines += _summary_lines(f"{prefix}_frame_latency_ms", [('', self.frame_latency)])
+        with self._lock:
+            stages = [(f'stage="{name}"', histogram) for name, histogram in self.stage_latency.items()]
+        lines += _summary_lines(f"{prefix}_stage_latency_ms", stages)
+        lines.append(f"# TYPE {prefix}_dropped_frames_total counter")
+        lines += [f'{prefix}_dropped_frames_total{{queue="{name}"}} {count}'
+                  for name, count in snapshot['dropped_frames'].items()]
+        lines.append(f"# TYPE {prefix}_queue_depth gauge")
+        lines += [f'{prefix}_queue_depth{{queue="{name}"}} {depth}' for name, depth in snapshot['queue_depths'].items()]
+        return "\n".join(lines) + "\n"
+
+
+def _summary_lines(metric, histograms):
+    lines = [f"# TYPE {metric} summary"]
+    for labels, histogram in histograms:
+        values = histogram.values()
+        if len(values):
+            for q, value in zip(QUANTILES, np.quantile(values, QUANTILES)):
+                quantile_labels = ",".join(filter(None, [labels, f'quantile="{q}"']))
+                lines.append(f"{metric}{{{quantile_labels}}} {value:.4f}")
+        suffix = f"{{{labels}}}" if labels else ""
+        lines.append(f"{metric}_sum{suffix} {histogram.total_sum:.4f}")
+        lines.append(f"{metric}_count{suffix} {histogram.total_count}")
+    return lines
+
+
+class MetricsExporter:
+    """
+    Serves PipelineMetrics as Prometheus text on http://host:port/metrics from a background thread.
+    """
+    def __init__(self, metrics, host='127.0.0.1', port=DEFAULT_EXPORTER_PORT):
+        self.metrics = metrics
+        self.host = host
+        self.port = port
+        self.server = None
+        self.thread = None
+
+    def start(self):
+        if self.server is not None:
+            return
+        metrics = self.metrics
+
+        class MetricsHandler(BaseHTTPRequestHandler):
+            def do_GET(self):
+                if self.path.split('?')[0] not in ('/', '/metrics'):
+                    self.send_error(404)
+                    return
+                body = metrics.prometheus_text().encode('utf-8')
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/plain; version=0.0.4')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass  # Scrapes are not worth a console line each
+
+        self.server = ThreadingHTTPServer((self.host, self.port), MetricsHandler)
+        self.port = self.server.server_address[1]
+        self.thread = threading.Thread(target=self.server.serve_forever, name='metrics-exporter', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        if self.server is not None:
+            self.server.shutdown()
+            self.server.server_close()
+            self.thread.join()
+            self.server = None
+            self.thread = None
@@ -0,0 +1,302 @@
+import json
+import mmap
+import struct
+import zlib
+import numpy as np
+from pose_estimation.pose_frame import NUM_LANDMARKS
+
+# File layout
+#   header: FILE_MAGIC | uint32 length | JSON (format version, columns, chunk size, metadata)
+#   chunks: CHUNK_MAGIC | uint16 column | uint32 first frame | uint32 frame count | uint32 size | zlib payload
+#   footer: JSON chunk index | uint64 length | FOOTER_MAGIC  (written on close)
+# Chunks are self-describing, so a session whose writer never closed (e.g. a crash) is recovered by scanning them.
+FILE_MAGIC = b'RBQSESS1'
+FOOTER_MAGIC = b'RBQSEND1'
+CHUNK_MAGIC = b'CHNK'
+FORMAT_VERSION = 1
+SESSION_EXTENSION = '.session'
+
+_HEADER_LENGTH = struct.Struct('<I')
+_CHUNK_HEADER = struct.Struct('<4sHIII')
+_FOOTER_TRAILER = struct.Struct('<Q8s')
+
+
+def session_columns(num_joints):
+    """
+    Column schema of a recorded PoseTracker session.
+
+    Args:
+        num_joints (int): Number of joint angles per frame (len(JointAnglesCalculator.joint_names)).
+
+    Returns:
+        dict: Column name -> (dtype, per-frame shape).
+    """
+    return {
+        'timestamp': ('float64', ()),
+        'raw_landmarks': ('float32', (NUM_LANDMARKS, 4)),
+        'landmarks': ('float32', (NUM_LANDMARKS, 4)),
+        'joint_angles': ('float32', (num_joints,)),
+        'center_of_mass': ('float32', (3,)),
+        'velocities': ('float32', (NUM_LANDMARKS, 3)),
+        'rep_count': ('int32', ()),
+        'activity': ('int32', ()),
+    }
+
+
+def _missing_value(dtype):
+    return np.nan if np.issubdtype(dtype, np.floating) else -1
+
+
+class SessionWriter:
+    """
+    Append-only writer of a columnar session file.
+
+    Frames are buffered per column and written as one zlib-compressed chunk per column every
+    `chunk_size` frames, so a live session only ever holds one chunk in memory.
+    """
+    def __init__(self, path, columns, chunk_size=256, compression_level=1, metadata=None):
+        """
+        Args:
+            path (str): Output file; overwritten if it exists.
+            columns (dict): Column name -> (dtype, per-frame shape), e.g. session_columns(num_joints).
+            chunk_size (int): Frames per compressed chunk.
+            compression_level (int): zlib level; 1 favours speed for live recording.
+            metadata (dict): JSON-serializable session metadata (exercise, joint names, ...).
+        """
+        if chunk_size < 1:
+            raise ValueError(f"chunk_size must be positive: {chunk_size}")
+        if not columns:
+            raise ValueError("A session needs at least one column")
+        self.path = path
+        self.chunk_size = chunk_size
+        self.compression_level = compression_level
+        self.column_names = list(columns)
+        self.dtypes = {name: np.dtype(dtype) for name, (dtype, _) in columns.items()}
+        self.shapes = {name: tuple(shape) for name, (_, shape) in columns.items()}
+        self.buffers = {name: np.empty((chunk_size,) + self.shapes[name], dtype=self.dtypes[name])
+                        for name in self.column_names}
+        self.pending = 0
+        self.frame_count = 0
+        self.index = {name: [] for name in self.column_names}
+
+        self.file = open(path, 'wb')
+        header = json.dumps({
+            'version': FORMAT_VERSION,
+            'chunk_size': chunk_size,
+            'columns': {name: [self.dtypes[name].str, list(self.shapes[name])] for name in self.column_names},
+            'metadata': metadata or {},
+        }).encode('utf-8')
+        self.file.write(FILE_MAGIC + _HEADER_LENGTH.pack(len(header)) + header)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.frame_count + self.pending
+
+    @property
+    def closed(self):
+        return self.file is None
+
+    def append(self, **values):
+        """
+        Append one frame. Columns that are not given (or None) are stored as NaN (-1 for integer columns).
+        """
+        if self.file is None:
+            raise ValueError("Session writer is closed")
+        unknown = set(values) - set(self.buffers)
+        if unknown:
+            raise ValueError(f"Unknown session columns: {sorted(unknown)}")
+        row = self.pending
+        for name, buffer in self.buffers.items():
+            value = values.get(name)
+            buffer[row] = _missing_value(buffer.dtype) if value is None else value
+        self.pending += 1
+        if self.pending == self.chunk_size:
+            self._write_chunks()
+
+    def flush(self):
+        """
+        Write the buffered frames as a (possibly partial) chunk and flush the file.
+        """
+        if self.file is None:
+            return
+        self._write_chunks()
+        self.file.flush()
+
+    def close(self):
+        """
+        Write the remaining frames and the chunk index footer.
+        """
+        if self.file is None:
+            return
+        self._write_chunks()
+        footer = json.dumps({'frames': self.frame_count, 'index': self.index}).encode('utf-8')
+        self.file.write(footer + _FOOTER_TRAILER.pack(len(footer), FOOTER_MAGIC))
+        self.file.close()
+        self.file = None
+
+    def _write_chunks(self):
+        if not self.pending:
+            return
+        for column, name in enumerate(self.column_names):
+            payload = zlib.compress(self.buffers[name][:self.pending].tobytes(), self.compression_level)
+            offset = self.file.tell() + _CHUNK_HEADER.size
+            self.file.write(_CHUNK_HEADER.pack(CHUNK_MAGIC, column, self.frame_count, self.pending, len(payload)))
+            self.file.write(payload)
+            self.index[name].append([offset, self.frame_count, self.pending, len(payload)])
+        self.frame_count += self.pending
+        self.pending = 0
+
+
+class SessionReader:
+    """
+    Memory-mapped reader of a session file.
+
+    Only the chunks overlapping a requested frame range are decompressed, so hours of
+    recordings can be analyzed without loading whole files into RAM.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.file = open(path, 'rb')
+        try:
+            self.mm = mmap.mmap(self.file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            self.file.close()
+            raise ValueError(f"Not a session file: {path}")
+        try:
+            self._read_header()
+            self._read_index()
+        except ValueError:
+            self.close()
+            raise
+        self._cache = {}  # column -> (chunk number, decoded array), speeds up sequential access
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __len__(self):
+        return self.frame_count
+
+    def close(self):
+        if self.mm is not None:
+            self.mm.close()
+            self.mm = None
+            self.file.close()
+
+    @property
+    def columns(self):
+        return list(self.dtypes)
+
+    def _read_header(self):
+        magic_end = len(FILE_MAGIC)
+        if self.mm[:magic_end] != FILE_MAGIC:
+            raise ValueError(f"Not a session file: {self.path}")
+        (length,) = _HEADER_LENGTH.unpack_from(self.mm, magic_end)
+        self.data_start = magic_end + _HEADER_LENGTH.size + length
+        header = json.loads(self.mm[magic_end + _HEADER_LENGTH.size:self.data_start].decode('utf-8'))
+        if header['version'] > FORMAT_VERSION:
+            raise ValueError(f"Unsupported session format version: {header['version']}")
+        self.chunk_size = header['chunk_size']
+        self.metadata = header['metadata']
+        self.dtypes = {name: np.dtype(dtype) for name, (dtype, _) in header['columns'].items()}
+        self.shapes = {name: tuple(shape) for name, (_, shape) in header['columns'].items()}
+
+    def _read_index(self):
+        """
+        Load the chunk index from the footer, or rebuild it by scanning the chunks if the writer never closed.
+        """
+        size = len(self.mm)
+        self.complete = (size >= self.data_start + _FOOTER_TRAILER.size and
+                         self.mm[size - len(FOOTER_MAGIC):] == FOOTER_MAGIC)
+        if self.complete:
+            length, _ = _FOOTER_TRAILER.unpack_from(self.mm, size - _FOOTER_TRAILER.size)
+            footer_start = size - _FOOTER_TRAILER.size - length
+            footer = json.loads(self.mm[footer_start:size - _FOOTER_TRAILER.size].decode('utf-8'))
+            index = footer['index']
+        else:
+            index = self._scan_chunks()
+
+        self.chunks = {name: np.array(index[name], dtype=np.int64).reshape(-1, 4) for name in self.dtypes}
+        # Columns are written in lockstep; a truncated file is cut back to the frames every column has
+        self.frame_count = min(int(chunks[:, 2].sum()) for chunks in self.chunks.values())
+
+    def _scan_chunks(self):
+        names = list(self.dtypes)
+        index = {name: [] for name in names}
+        position, size = self.data_start, len(self.mm)
+        while position + _CHUNK_HEADER.size <= size:
+            magic, column, first, count, length = _CHUNK_HEADER.unpack_from(self.mm, position)
+            offset = position + _CHUNK_HEADER.size
+            if magic != CHUNK_MAGIC or column >= len(names) or offset + length > size:
+                break
+            index[names[column]].append([offset, first, count, length])
+            position = offset + length
+        return index
+
+    def _chunk(self, name, number):
+        cached = self._cache.get(name)
+        if cached is not None and cached[0] == number:
+            return cached[1]
+        offset, _, count, length = self.chunks[name][number]
+        data = np.frombuffer(zlib.decompress(self.mm[offset:offset + length]), dtype=self.dtypes[name])
+        data = data.reshape((int(count),) + self.shapes[name])
+        self._cache[name] = (number, data)
+        return data
+
+    def read(self, name, start=0, stop=None):
+        """
+        Read frames [start, stop) of one column, decompressing only the chunks that overlap the range.
+
+        Returns:
+            np.ndarray: Array of shape (stop - start, *column shape).
+        """
+        if name not in self.dtypes:
+            raise ValueError(f"Unknown session column: {name}")
+        start, stop, _ = slice(start, stop).indices(self.frame_count)
+        stop = max(start, stop)
+        chunks = self.chunks[name]
+        first, last = chunks[:, 1], chunks[:, 1] + chunks[:, 2]
+        overlapping = np.flatnonzero((first < stop) & (last > start))
+
+        out = np.empty((stop - start,) + self.shapes[name], dtype=self.dtypes[name])
+        for number in overlapping:
+            data = self._chunk(name, number)
+            lo, hi = max(start, first[number]), min(stop, last[number])
+            out[lo - start:hi - start] = data[lo - first[number]:hi - first[number]]
+        return out
+
+    def iter_chunks(self, columns=None):
+        """
+        Iterate over the session one chunk at a time.
+
+        Yields:
+            dict: Column name -> array of the chunk's frames, plus 'frame' with their indices.
+        """
+        columns = columns or self.columns
+        boundaries = self.chunks[columns[0]][:, 1:3]
+        for first, count in boundaries:
+            stop = min(first + count, self.frame_count)
+            if stop <= first:
+                break
+            chunk = {name: self.read(name, first, stop) for name in columns}
+            chunk['frame'] = np.arange(first, stop)
+            yield chunk
+
+    def iter_frames(self, columns=None):
+        """
+        Iterate over the session frame by frame; each chunk is decompressed once.
+
+        Yields:
+            dict: Column name -> value for one frame.
+        """
+        columns = columns or self.columns
+        for chunk in self.iter_chunks(columns):
+            for i in range(len(chunk['frame'])):
+                yield {name: chunk[name][i] for name in columns}
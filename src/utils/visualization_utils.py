@@ -1,4 +1,52 @@
 import cv2
+import numpy as np
+
+# BlazePose skeleton (the 33-landmark topology of MediaPipe's POSE_CONNECTIONS)
+POSE_CONNECTIONS = [
+    (0, 1), (1, 2), (2, 3), (3, 7), (0, 4), (4, 5), (5, 6), (6, 8), (9, 10),
+    (11, 12), (11, 13), (13, 15), (15, 17), (15, 19), (15, 21), (17, 19),
+    (12, 14), (14, 16), (16, 18), (16, 20), (16, 22), (18, 20),
+    (11, 23), (12, 24), (23, 24), (23, 25), (24, 26), (25, 27), (26, 28),
+    (27, 29), (28, 30), (29, 31), (30, 32), (27, 31), (28, 32),
+]
+
+# ROM status colors (BGR), matching the GUI's ROM indicator
+ROM_COLORS = {
+    'white': (255, 255, 255),
+    'yellow': (0, 255, 255),
+    'light_green': (144, 238, 144),
+    'dark_green': (0, 100, 0),
+}
+
+FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+
+def resize_interpolation(scale):
+    """
+    Interpolation for resizing by `scale`: area averaging only for strong downscaling, where it
+    prevents aliasing; it is several times slower than bilinear at fractional ratios.
+    """
+    return cv2.INTER_AREA if scale < 0.5 else cv2.INTER_LINEAR
+
+
+def draw_dots(frame, points, color, radius):
+    """
+    Draw filled dots at integer pixel points (N x 2) with a single cv2.polylines call.
+    Zero-length thick segments render as round dots.
+    """
+    if len(points):
+        cv2.polylines(frame, np.repeat(points[:, None, :], 2, axis=1), False, color, 2 * radius)
+    return frame
+
+
+def draw_segments(frame, points, connections, color, thickness=2):
+    """
+    Draw all connections between integer pixel points (N x 2) with a single cv2.polylines call.
+    """
+    if len(connections):
+        cv2.polylines(frame, np.ascontiguousarray(points[np.asarray(connections)]), False, color, thickness)
+    return frame
+
 
 def draw_pose_landmarks(frame, landmarks, connections, color=(0, 255, 0), radius=3):
     """
@@ -12,13 +60,257 @@ def draw_pose_landmarks(frame, landmarks, connections, color=(0, 255, 0), radius
     Returns:
     - frame: The frame with landmarks and connections drawn.
     """
-    for landmark in landmarks:
-        x, y = int(landmark[0]), int(landmark[1])
-        cv2.circle(frame, (x, y), radius, color, thickness=-1)
+    points = np.asarray(landmarks, dtype=np.float64)[:, :2].astype(np.int32)
+    draw_dots(frame, points, color, radius)
+    draw_segments(frame, points, connections, color, thickness=2)
+    return frame
+
+
+def paste(frame, patch, x, y):
+    """
+    Copy a pre-rendered patch onto the frame with its top-left corner at (x, y), clipped to the frame.
+    """
+    height, width = frame.shape[:2]
+    x0, y0 = max(x, 0), max(y, 0)
+    x1, y1 = min(x + patch.shape[1], width), min(y + patch.shape[0], height)
+    if x1 > x0 and y1 > y0:
+        frame[y0:y1, x0:x1] = patch[y0 - y:y1 - y, x0 - x:x1 - x]
+    return frame
+
+
+class OverlayRenderer:
+    """
+    Draws the pose overlay (skeleton, landmarks, landmark labels, ROM/rep legend, accuracy and
+    corrections) with as few OpenCV calls per frame as possible.
+
+    The skeleton and the landmark dots are one cv2.polylines batch each. Everything textual is
+    rendered once and cached: label glyphs are stored as pixel offsets and stamped for all landmarks
+    with one vectorized write, and legend, accuracy and correction banners are cached as patches.
+    With an output size, the frame is first scaled to the display resolution and the overlay is drawn
+    there, so drawing cost follows the display size and text stays crisp.
+    """
+    def __init__(self, connections=None, landmark_color=(0, 255, 0), skeleton_color=(255, 255, 255),
+                 label_color=(255, 0, 0), landmark_radius=4, line_thickness=2, show_labels=True,
+                 show_legend=True, min_visibility=0.5, text_scale=0.5, max_cached_patches=256):
+        """
+        Args:
+            connections (list): Landmark index pairs of the skeleton; defaults to POSE_CONNECTIONS.
+            landmark_color, skeleton_color, label_color (tuple): BGR colors.
+            landmark_radius (int): Landmark dot radius in output pixels.
+            line_thickness (int): Skeleton line thickness in output pixels.
+            show_labels (bool): Draw the landmark index next to each landmark.
+            show_legend (bool): Draw the ROM swatch and rep count legend when they are given.
+            min_visibility (float): Landmarks below this visibility (and their connections) are not drawn.
+            text_scale (float): Font scale of the legend and banners.
+            max_cached_patches (int): Cached text patches before the cache is cleared.
+        """
+        self.connections = np.asarray(POSE_CONNECTIONS if connections is None else connections, dtype=np.intp)
+        self.landmark_color = landmark_color
+        self.skeleton_color = skeleton_color
+        self.label_color = label_color
+        self.landmark_radius = landmark_radius
+        self.line_thickness = line_thickness
+        self.show_labels = show_labels
+        self.show_legend = show_legend
+        self.min_visibility = min_visibility
+        self.text_scale = text_scale
+        self.max_cached_patches = max_cached_patches
+        self.patches = {}
+        self.label_glyphs = None  # (owner landmark, dy, dx) of every label pixel, and per-label bounds
+        self.label_offsets = None  # (frame width, flat offsets of the label pixels)
+
+    def text_patch(self, text, color=(255, 255, 255), background=(0, 0, 0), scale=None, padding=4):
+        """
+        Pre-rendered opaque text patch, cached by its content and style.
+        """
+        scale = self.text_scale if scale is None else scale
+        key = (text, color, background, scale, padding)
+        patch = self.patches.get(key)
+        if patch is None:
+            if len(self.patches) >= self.max_cached_patches:
+                self.patches.clear()
+            (width, height), baseline = cv2.getTextSize(text, FONT, scale, 1)
+            patch = np.empty((height + baseline + 2 * padding, width + 2 * padding, 3), dtype=np.uint8)
+            patch[:] = background
+            cv2.putText(patch, text, (padding, padding + height), FONT, scale, color, 1, cv2.LINE_AA)
+            self.patches[key] = patch
+        return patch
+
+    def _legend_patch(self, rom_status, rep_count):
+        key = ('legend', rom_status, rep_count)
+        patch = self.patches.get(key)
+        if patch is None:
+            text = self.text_patch(f"Reps: {rep_count}")
+            swatch_size = text.shape[0]
+            patch = np.zeros((swatch_size, swatch_size + text.shape[1], 3), dtype=np.uint8)
+            patch[2:-2, 2:swatch_size - 2] = ROM_COLORS.get(rom_status, ROM_COLORS['white'])
+            patch[:, swatch_size:] = text
+            self.patches[key] = patch
+        return patch
+
+    def _build_label_glyphs(self, count):
+        # Rasterize each index label once and keep the offsets of its pixels from the label anchor
+        owners, offsets_y, offsets_x, bounds = [], [], [], []
+        for idx in range(count):
+            (width, height), baseline = cv2.getTextSize(str(idx), FONT, 0.4, 1)
+            mask = np.zeros((height + baseline + 2, width + 2), dtype=np.uint8)
+            cv2.putText(mask, str(idx), (1, height + 1), FONT, 0.4, 255, 1)
+            ys, xs = np.nonzero(mask)
+            # Anchored like cv2.putText at (x + 5, y - 5): the text baseline sits 5 px above the landmark
+            ys = ys - (height + 1) - 5
+            xs = xs - 1 + 5
+            owners.append(np.full(len(ys), idx, dtype=np.intp))
+            offsets_y.append(ys)
+            offsets_x.append(xs)
+            bounds.append((ys.min(), ys.max(), xs.min(), xs.max()))
+        self.label_glyphs = (np.concatenate(owners), np.concatenate(offsets_y), np.concatenate(offsets_x),
+                             np.array(bounds, dtype=np.intp).T)
+        self.label_offsets = None
 
-    for start_idx, end_idx in connections:
-        start_point = (int(landmarks[start_idx][0]), int(landmarks[start_idx][1]))
-        end_point = (int(landmarks[end_idx][0]), int(landmarks[end_idx][1]))
-        cv2.line(frame, start_point, end_point, color, thickness=2)
+    def draw_labels(self, frame, points, visible):
+        """
+        Stamp the index label of every visible landmark with one vectorized write.
+        Labels that would not fit entirely inside the frame are skipped.
+        """
+        if self.label_glyphs is None or len(self.label_glyphs[3][0]) < len(points):
+            self._build_label_glyphs(len(points))
+        owners, offsets_y, offsets_x, (min_y, max_y, min_x, max_x) = self.label_glyphs
+        height, width = frame.shape[:2]
+        count = len(points)
+        x, y = points[:, 0].astype(np.intp), points[:, 1].astype(np.intp)
+        fits = visible & (y + min_y[:count] >= 0) & (y + max_y[:count] < height) & \
+            (x + min_x[:count] >= 0) & (x + max_x[:count] < width)
+        if not frame.flags.c_contiguous:
+            # Views (e.g. a region of a larger image) have no flat buffer to index into
+            keep = fits[owners]
+            frame[y[owners[keep]] + offsets_y[keep], x[owners[keep]] + offsets_x[keep]] = self.label_color
+            return frame
 
-    return frame
\ No newline at end of file
+        if self.label_offsets is None or self.label_offsets[0] != width:
+            self.label_offsets = (width, offsets_y * width + offsets_x)
+
+        # Flat channel indices into the frame buffer; writing the channels separately is much
+        # faster than assigning a color through 2-D fancy indexing
+        pixels = (y * width + x)[owners] + self.label_offsets[1]
+        if not fits.all():
+            pixels = pixels[fits[owners]]
+        pixels *= 3
+        flat = frame.reshape(-1)
+        for channel, value in enumerate(self.label_color):
+            flat[pixels + channel] = value
+        return frame
+
+    def draw_skeleton(self, frame, points, visible):
+        connections = self.connections[visible[self.connections].all(axis=1)]
+        draw_segments(frame, points, connections, self.skeleton_color, self.line_thickness)
+        draw_dots(frame, points[visible], self.landmark_color, self.landmark_radius)
+        return frame
+
+    def draw_corrections(self, frame, corrections, origin=(0, 0)):
+        """
+        Correction messages as stacked banners in the top-left corner.
+        corrections: Messages (strings), or a dict of joint -> message.
+        """
+        if isinstance(corrections, dict):
+            corrections = [f"{joint.replace('_', ' ')}: {message}" for joint, message in corrections.items()]
+        x, y = origin[0] + 10, origin[1] + 10
+        for message in corrections:
+            patch = self.text_patch(str(message), color=(255, 255, 255), background=(0, 0, 160))
+            paste(frame, patch, x, y)
+            y += patch.shape[0] + 2
+        return frame
+
+    def draw_accuracy(self, frame, similarity_score, origin=None):
+        """
+        Pose accuracy banner in the bottom-left corner, colored by score.
+        """
+        if similarity_score is None:
+            return frame
+        if similarity_score >= 80:
+            background = (0, 120, 0)
+        elif similarity_score >= 70:
+            background = (0, 140, 200)
+        else:
+            background = (0, 0, 160)
+        # Scores are shown as whole percent, which also bounds the number of cached patches
+        patch = self.text_patch(f"Pose accuracy: {similarity_score:.0f}%", background=background)
+        x, y = origin if origin is not None else (0, frame.shape[0])
+        paste(frame, patch, x + 10, y - patch.shape[0] - 10)
+        return frame
+
+    def render(self, frame, landmarks, rom_status=None, rep_count=None, similarity_score=None, corrections=None,
+               output_size=None):
+        """
+        Draw the overlay.
+
+        Args:
+            frame (np.ndarray): BGR frame; drawn on in place unless it is rescaled.
+            landmarks (PoseFrame): Landmarks in normalized image coordinates, or None.
+            rom_status (str), rep_count (int): Legend contents; no legend when None.
+            similarity_score (float): Pose accuracy in percent; no banner when None.
+            corrections: Correction messages (see draw_corrections).
+            output_size (tuple): (width, height) of the display. The frame is scaled to cover it
+                (the display crops the overflow) and the overlay is placed inside the visible area.
+
+        Returns:
+            np.ndarray: The annotated frame.
+        """
+        height, width = frame.shape[:2]
+        visible_x = visible_y = 0
+        visible_width, visible_height = width, height
+        if output_size is not None:
+            scale = max(output_size[0] / width, output_size[1] / height)
+            if abs(scale - 1.0) > 1e-3:
+                width, height = max(1, round(width * scale)), max(1, round(height * scale))
+                frame = cv2.resize(frame, (width, height), interpolation=resize_interpolation(scale))
+            visible_width, visible_height = min(width, output_size[0]), min(height, output_size[1])
+            visible_x, visible_y = (width - visible_width) // 2, (height - visible_height) // 2
+
+        if landmarks is not None:
+            points = (landmarks.xy * (width, height)).astype(np.int32)
+            visible = landmarks.visibility >= self.min_visibility
+            self.draw_skeleton(frame, points, visible)
+            if self.show_labels:
+                self.draw_labels(frame, points, visible)
+
+        if self.show_legend and rep_count is not None:
+            patch = self._legend_patch(rom_status, rep_count)
+            paste(frame, patch, visible_x + visible_width - patch.shape[1] - 10, visible_y + 10)
+        if corrections:
+            self.draw_corrections(frame, corrections, origin=(visible_x, visible_y))
+            self.draw_accuracy(frame, similarity_score, origin=(visible_x, visible_y + visible_height))
+        return frame
+
+
+_default_renderer = None
+
+
+def _renderer():
+    global _default_renderer
+    if _default_renderer is None:
+        _default_renderer = OverlayRenderer()
+    return _default_renderer
+
+
+def draw_auto_corrections(frame, corrections):
+    """
+    Draw correction messages on the frame.
+    Parameters:
+    - frame: The video frame to draw on.
+    - corrections: Correction messages, or a dict of joint -> message.
+    Returns:
+    - frame: The frame with the corrections drawn.
+    """
+    return _renderer().draw_corrections(frame, corrections)
+
+
+def draw_pose_accuracy_overlay(frame, similarity_score):
+    """
+    Draw the pose accuracy (similarity to the reference pose, in percent) on the frame.
+    Parameters:
+    - frame: The video frame to draw on.
+    - similarity_score: Pose accuracy in percent.
+    Returns:
+    - frame: The frame with the accuracy banner drawn.
+    """
+    return _renderer().draw_accuracy(frame, similarity_score)
@@ -0,0 +1,153 @@
+import json
+import os
+import subprocess
+import sys
+import cv2
+import numpy as np
+import pytest
+
+
+def _write_video(path, frames=5, size=(160, 120), fps=30):
+    writer = cv2.VideoWriter(str(path), cv2.VideoWriter_fourcc(*'mp4v'), fps, size)
+    assert writer.isOpened()
+    for i in range(frames):
+        writer.write(np.full((size[1], size[0], 3), 40 * i, dtype=np.uint8))
+    writer.release()
+
+
+def test_batch_process_reports_tracker_failure_per_video():
+    import batch_process
+    batch_process._init_worker({'depth_interval': None, 'backend': 'unknown'})
+    try:
+        with pytest.raises(RuntimeError, match="pose tracker could not be built"):
+            batch_process.process_video('missing.mp4', '.')
+    finally:
+        batch_process._tracker = None
+        batch_process._init_error = None
+
+
+def test_batch_process_output_names_do_not_collide():
+    import batch_process
+    videos = ['in/a.mp4', 'in/squat.avi', 'in/squat.mp4']
+    assert batch_process.output_names(videos) == {'in/a.mp4': 'a', 'in/squat.avi': 'squat.avi',
+                                                  'in/squat.mp4': 'squat.mp4'}
+    videos.append('in/squat.mp4.mkv')  # Its stem is another video's full file name
+    assert sorted(batch_process.output_names(videos).values()) == ['a.mp4', 'squat.avi', 'squat.mp4',
+                                                                   'squat.mp4.mkv']
+
+
+def test_batch_process_end_to_end(tmp_path):
+    pytest.importorskip('mediapipe')
+    pytest.importorskip('torch')
+    import batch_process
+    videos = tmp_path / 'videos'
+    videos.mkdir()
+    _write_video(videos / 'a.mp4')
+
+    output = tmp_path / 'results'
+    assert batch_process.main([str(videos), str(output), '--workers', '1']) == 0
+
+    with open(output / 'a.json') as f:
+        summary = json.load(f)
+    assert summary['frames'] == 5
+    assert summary['frames_with_pose'] == 0  # Blank frames
+    assert os.path.exists(summary['session'])
+
+
+def test_model_modules_import_without_torch_or_onnxruntime():
+    # Fresh interpreter: the import must not pull in the heavy inference libraries
+    code = ("import sys; import pose_estimation.pose_refinement, pose_estimation.activity_recognition, "
+            "pose_estimation.depth_estimator, pose_estimation.inference_server; "
+            "print(','.join(m for m in ('torch', 'torchvision', 'onnxruntime') if m in sys.modules))")
+    src = os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src')
+    output = subprocess.run([sys.executable, '-c', code], cwd=src, capture_output=True, text=True, check=True)
+    assert output.stdout.strip() == ''
+
+
+def test_cached_onnx_path_depends_on_weights_and_config(tmp_path):
+    from pose_estimation.onnx_backend import cached_onnx_path
+    first, second = tmp_path / 'first.pth', tmp_path / 'second.pth'
+    first.write_bytes(b'weights-1')
+    second.write_bytes(b'weights-2')
+
+    path = cached_onnx_path('model', str(first), num_classes=5)
+    assert path == cached_onnx_path('model', str(first), num_classes=5)
+    assert path != cached_onnx_path('model', str(second), num_classes=5)
+    assert path != cached_onnx_path('model', str(first), num_classes=6)
+
+
+def test_pose_refiner_onnx_parity(tmp_path):
+    torch = pytest.importorskip('torch')
+    pytest.importorskip('onnxruntime')
+    from pose_estimation.heatmaps import landmark_heatmaps
+    from pose_estimation.pose_refinement import PoseRefiner
+    from pose_estimation.pose_refinement_model import PoseRefinementModel
+    torch.manual_seed(0)
+    weights = tmp_path / 'refiner.pth'
+    torch.save(PoseRefinementModel(pretrained_backbone=False).state_dict(), weights)
+
+    reference = PoseRefiner(str(weights), backend='torch')
+    exported = PoseRefiner(str(weights), backend='onnx', onnx_path=str(tmp_path / 'refiner.onnx'), num_threads=1)
+    points = np.random.default_rng(0).uniform(0.1, 0.9, size=(3, 33, 2))
+    heatmaps = landmark_heatmaps(points, (640, 480))
+
+    np.testing.assert_allclose(exported.infer_batch(heatmaps), reference.infer_batch(heatmaps), rtol=1e-3, atol=1e-4)
+
+
+def test_activity_recognizer_onnx_parity_with_carried_state(tmp_path):
+    torch = pytest.importorskip('torch')
+    pytest.importorskip('onnxruntime')
+    from pose_estimation.activity_recognition import ActivityRecognizer, INPUT_SIZE
+    from pose_estimation.activity_recognition_model import ActivityRecognitionModel
+    torch.manual_seed(0)
+    weights = tmp_path / 'activity.pth'
+    torch.save(ActivityRecognitionModel(num_classes=5).state_dict(), weights)
+
+    reference = ActivityRecognizer(str(weights), backend='torch')
+    exported = ActivityRecognizer(str(weights), backend='onnx', onnx_path=str(tmp_path / 'activity.onnx'),
+                                  num_threads=1)
+    sequences = np.random.default_rng(0).normal(size=(2, 12, INPUT_SIZE)).astype(np.float32)
+
+    # Windowed inference from a zero state
+    expected, _ = reference.infer(sequences)
+    actual, _ = exported.infer(sequences)
+    np.testing.assert_allclose(actual, expected, rtol=1e-3, atol=1e-4)
+
+    # Streaming: one step at a time, feeding each backend's (h, c) back in
+    expected_state = actual_state = None
+    for step in range(sequences.shape[1]):
+        expected, expected_state = reference.infer(sequences[:, step:step + 1], expected_state)
+        actual, actual_state = exported.infer(sequences[:, step:step + 1], actual_state)
+        np.testing.assert_allclose(actual, expected, rtol=1e-3, atol=1e-4)
+        for actual_tensor, expected_tensor in zip(actual_state, expected_state):
+            np.testing.assert_allclose(actual_tensor, expected_tensor, rtol=1e-3, atol=1e-4)
+
+
+def test_inference_clients_share_the_component_smoothing():
+    from collections import deque
+    from types import SimpleNamespace
+    from pose_estimation.activity_recognition import smoothed_label, softmax
+    from pose_estimation.inference_server import ActivityClient, MicroBatcher, RefinerClient
+    from pose_estimation.pose_refinement import ema
+
+    assert ema(None, 2.0, 0.9) == 2.0
+    assert ema(2.0, 4.0, 0.75) == 3.5
+    history = deque(maxlen=2)
+    assert [smoothed_label(history, p) for p in ([0.9, 0.1], [0.2, 0.8], [0.3, 0.7])] == [0, 0, 1]
+
+    logits = [np.array([2.0, 0.0]), np.array([0.0, 1.0]), np.array([0.0, 3.0])]
+    server = SimpleNamespace(activity_batcher=MicroBatcher(lambda items: [(logits.pop(0), 'state') for _ in items]),
+                             refinement_batcher=MicroBatcher(lambda items: items))
+    server.activity_batcher.start()
+    server.refinement_batcher.start()
+    try:
+        activity = ActivityClient(server, smoothing_window=2)
+        assert [activity.predict_step(np.zeros(4)) for _ in range(3)] == [0, 0, 1]
+        assert activity.stream_state == 'state'
+        np.testing.assert_allclose(activity.recent_probabilities[-1], softmax(np.array([0.0, 3.0])))
+        refiner = RefinerClient(server, alpha=0.5)
+        assert refiner.refine_pose(np.float32(2.0)) == 2.0
+        assert refiner.refine_pose(np.float32(4.0)) == 3.0
+    finally:
+        server.activity_batcher.stop()
+        server.refinement_batcher.stop()
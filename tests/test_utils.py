@@ -0,0 +1,369 @@
+import os
+import queue
+import threading
+import time
+import numpy as np
+import pytest
+from pose_estimation.frame_pipeline import BLOCK, DROP_OLDEST, FramePipeline, FrameQueue
+from pose_estimation.inference_server import MicroBatcher
+from pose_estimation.pose_frame import NUM_LANDMARKS, PoseFrame
+from pose_estimation.roi_tracking import ComplexitySelector, RoiTracker, crop_to_frame
+from utils import camera_utils
+from utils.session_store import SessionReader, SessionWriter
+
+COLUMNS = {'timestamp': ('float64', ()), 'points': ('float32', (3, 2)), 'rep_count': ('int32', ())}
+
+
+def _write_session(path, frames, chunk_size=4, close=True):
+    """
+    Write `frames` frames with values derived from the frame number; returns the writer.
+    """
+    writer = SessionWriter(str(path), COLUMNS, chunk_size=chunk_size, metadata={'exercise': 'squat'})
+    for i in range(frames):
+        writer.append(timestamp=i * 0.5, points=np.full((3, 2), i, dtype=np.float32), rep_count=i // 3)
+    if close:
+        writer.close()
+    return writer
+
+
+def _expected(name, start, stop):
+    frames = np.arange(start, stop)
+    if name == 'timestamp':
+        return frames * 0.5
+    if name == 'points':
+        return np.broadcast_to(frames[:, None, None], (len(frames), 3, 2)).astype(np.float32)
+    return (frames // 3).astype(np.int32)
+
+
+def _strip_footer(path):
+    # Cut the file back to the end of the last chunk, as if the writer had crashed before close()
+    writer = _write_session(path, 10, close=False)
+    writer.flush()
+    data_end = os.path.getsize(path)
+    writer.close()
+    with open(path, 'r+b') as f:
+        f.truncate(data_end)
+    return data_end
+
+
+def test_session_round_trip_across_chunk_boundaries(tmp_path):
+    path = tmp_path / 'a.session'
+    _write_session(path, 10)
+    with SessionReader(str(path)) as reader:
+        assert reader.complete
+        assert len(reader) == 10
+        assert reader.metadata == {'exercise': 'squat'}
+        assert len(reader.chunks['points']) == 3  # 4 + 4 + 2 frames
+        for name in COLUMNS:
+            np.testing.assert_array_equal(reader.read(name), _expected(name, 0, 10))
+        assert [len(chunk['frame']) for chunk in reader.iter_chunks()] == [4, 4, 2]
+        assert [int(frame['rep_count']) for frame in reader.iter_frames()] == list(_expected('rep_count', 0, 10))
+
+
+def test_session_missing_columns_are_stored_as_missing_values(tmp_path):
+    path = tmp_path / 'a.session'
+    with SessionWriter(str(path), COLUMNS, chunk_size=4) as writer:
+        writer.append(timestamp=1.0)
+    with SessionReader(str(path)) as reader:
+        assert np.isnan(reader.read('points')).all()
+        assert reader.read('rep_count')[0] == -1
+
+
+def test_session_without_footer_is_recovered_by_scanning(tmp_path):
+    path = tmp_path / 'a.session'
+    _strip_footer(path)
+    with SessionReader(str(path)) as reader:
+        assert not reader.complete
+        assert len(reader) == 10
+        for name in COLUMNS:
+            np.testing.assert_array_equal(reader.read(name), _expected(name, 0, 10))
+
+
+def test_session_truncated_last_chunk_is_dropped(tmp_path):
+    path = tmp_path / 'a.session'
+    data_end = _strip_footer(path)
+    with open(path, 'r+b') as f:
+        f.truncate(data_end - 3)  # Inside the payload of the last column's final chunk
+    with SessionReader(str(path)) as reader:
+        assert not reader.complete
+        # Only frames every column holds completely are kept
+        assert len(reader) == 8
+        for name in COLUMNS:
+            np.testing.assert_array_equal(reader.read(name), _expected(name, 0, 8))
+
+
+@pytest.mark.parametrize('start,stop', [(0, 4), (3, 5), (2, 9), (5, 6), (7, 10), (6, None), (-3, None), (5, 5)])
+def test_session_read_ranges(tmp_path, start, stop):
+    path = tmp_path / 'a.session'
+    _write_session(path, 10)
+    expected_range = range(10)[slice(start, stop)]
+    with SessionReader(str(path)) as reader:
+        for name in COLUMNS:
+            values = reader.read(name, start, stop)
+            assert values.shape == (len(expected_range),) + tuple(COLUMNS[name][1])
+            np.testing.assert_array_equal(values, _expected(name, expected_range.start, expected_range.stop))
+
+
+def test_session_reader_rejects_other_files(tmp_path):
+    path = tmp_path / 'a.session'
+    path.write_bytes(b'not a session file')
+    with pytest.raises(ValueError, match="Not a session file"):
+        SessionReader(str(path))
+
+
+def test_frame_pipeline_stop_unblocks_full_block_queues():
+    pipeline = FramePipeline([('a', lambda x: x), ('b', lambda x: x)], queue_size=1, drop_policy=BLOCK)
+    pipeline.start()
+    for i in range(6):
+        pipeline.submit(i, timeout=0.05)  # Nothing reads the results, so every queue fills up
+    time.sleep(0.1)
+    threads = list(pipeline.threads)
+
+    started = time.monotonic()
+    pipeline.stop(timeout=1.0)
+    assert time.monotonic() - started < 0.5
+    assert not any(thread.is_alive() for thread in threads)
+    assert all(len(frame_queue) == 0 for frame_queue in pipeline.queues)
+
+
+def test_frame_queue_drop_oldest_keeps_newest_items():
+    frame_queue = FrameQueue(maxsize=2, policy=DROP_OLDEST)
+    for i in range(5):
+        assert frame_queue.put(i)
+    assert frame_queue.dropped == 3
+    assert [frame_queue.get(0), frame_queue.get(0)] == [3, 4]
+    with pytest.raises(queue.Empty):
+        frame_queue.get(timeout=0.01)
+
+
+def test_frame_queue_block_waits_for_space():
+    frame_queue = FrameQueue(maxsize=1, policy=BLOCK)
+    assert frame_queue.put('a')
+    assert not frame_queue.put('b', timeout=0.01)
+    assert frame_queue.dropped == 0
+
+    consumer = threading.Timer(0.05, frame_queue.get)
+    consumer.start()
+    assert frame_queue.put('c', timeout=1.0)  # Space is made by the consumer
+    consumer.join()
+    assert frame_queue.get(0) == 'c'
+
+
+def test_frame_queue_control_items_ignore_the_size_limit():
+    frame_queue = FrameQueue(maxsize=1, policy=BLOCK)
+    frame_queue.put('a')
+    frame_queue.put_control('stop')
+    assert len(frame_queue) == 2
+    frame_queue.clear()
+    assert len(frame_queue) == 0
+    with pytest.raises(ValueError):
+        FrameQueue(policy='unknown')
+
+
+def test_frame_pipeline_runs_stages_in_order_and_stops():
+    pipeline = FramePipeline([('double', lambda x: 2 * x), ('odd', lambda x: x + 1 if x % 4 else None)],
+                             queue_size=8, drop_policy=BLOCK)
+    pipeline.start()
+    for i in range(4):
+        assert pipeline.submit(i, timeout=1.0)
+    # 0 and 2 double to multiples of 4 and are dropped by the second stage
+    assert [pipeline.get_result(timeout=1.0) for _ in range(2)] == [3, 7]
+    assert pipeline.get_result(timeout=0.05) is None
+
+    pipeline.stop()
+    assert not pipeline.threads
+    assert not pipeline.submit(5)
+
+
+def test_frame_pipeline_discards_results_that_finish_out_of_order():
+    release_first = threading.Event()
+
+    def stage(item):
+        if item == 0:
+            release_first.wait(1.0)
+        return item
+
+    pipeline = FramePipeline([('slow', stage, 2)], queue_size=4, drop_policy=BLOCK)
+    pipeline.start()
+    pipeline.submit(0)
+    pipeline.submit(1)
+    assert pipeline.get_result(timeout=1.0) == 1
+    release_first.set()
+    assert pipeline.get_result(timeout=0.2) is None  # Item 0 finished after item 1
+    pipeline.stop()
+
+
+def test_micro_batcher_dispatches_full_batches_immediately():
+    batches = []
+    batcher = MicroBatcher(lambda items: batches.append(list(items)) or [2 * item for item in items],
+                           max_batch_size=3, max_latency_ms=10000.0)
+    batcher.start()
+    # The worker is parked until the first request arrives; queue the rest with it
+    futures = [batcher.submit(i) for i in range(3)]
+    assert [future.result(timeout=1.0) for future in futures] == [0, 2, 4]
+    assert batches == [[0, 1, 2]]
+    batcher.stop()
+
+
+def test_micro_batcher_dispatches_partial_batch_at_deadline():
+    batcher = MicroBatcher(lambda items: [item + 1 for item in items], max_batch_size=16, max_latency_ms=20.0)
+    batcher.start()
+    started = time.monotonic()
+    assert batcher.submit(1).result(timeout=1.0) == 2
+    assert time.monotonic() - started < 0.5
+    assert batcher.batches == 1 and batcher.mean_batch_size() == 1.0
+    batcher.stop()
+
+
+def test_micro_batcher_batch_failure_fails_every_request():
+
+    def fail(items):
+        raise ValueError("bad batch")
+
+    batcher = MicroBatcher(fail, max_batch_size=2, max_latency_ms=10000.0)
+    batcher.start()
+    futures = [batcher.submit(i) for i in range(2)]
+    for future in futures:
+        with pytest.raises(ValueError, match="bad batch"):
+            future.result(timeout=1.0)
+    assert batcher.batches == 0
+    batcher.stop()
+
+
+def test_micro_batcher_stop_fails_pending_and_new_requests():
+    # Never started: requests stay queued until stop() fails them
+    batcher = MicroBatcher(lambda items: items, name='test-batcher')
+    future = batcher.submit(1)
+    batcher.stop()
+    with pytest.raises(RuntimeError, match="test-batcher is stopped"):
+        future.result(timeout=1.0)
+    with pytest.raises(RuntimeError, match="test-batcher is stopped"):
+        batcher.submit(2)
+
+    # Requests queued before stop() are still served by a running worker
+    batcher.start()
+    future = batcher.submit(3)
+    batcher.stop()
+    assert future.result(timeout=1.0) == 3
+
+
+def _pose_in_box(x0, y0, x1, y1, timestamp, visibility=1.0):
+    data = np.empty((NUM_LANDMARKS, 4), dtype=np.float32)
+    data[:, 0] = np.linspace(x0, x1, NUM_LANDMARKS)
+    data[:, 1] = np.linspace(y1, y0, NUM_LANDMARKS)
+    data[:, 2] = 0.0
+    data[:, 3] = visibility
+    return PoseFrame(data, timestamp)
+
+
+def test_roi_tracker_fits_padded_box_and_holds_it_while_the_pose_fits():
+    tracker = RoiTracker(padding=0.25, min_size=0.2)
+    assert tracker.crop_rect(640, 480) is None
+    assert tracker.update(_pose_in_box(0.4, 0.3, 0.6, 0.7, timestamp=0.0))
+    np.testing.assert_allclose(tracker.roi, [0.35, 0.2, 0.65, 0.8], atol=1e-6)
+    assert tracker.crop_rect(100, 100) == (35, 20, 65, 80)
+
+    roi = tracker.roi.copy()
+    assert tracker.update(_pose_in_box(0.405, 0.3, 0.605, 0.7, timestamp=0.033))
+    np.testing.assert_array_equal(tracker.roi, roi)  # Small motion: the crop does not move
+
+
+def test_roi_tracker_refits_ahead_of_the_motion():
+    tracker = RoiTracker(padding=0.25, min_size=0.2, velocity_smoothing=1.0)
+    tracker.update(_pose_in_box(0.2, 0.3, 0.4, 0.7, timestamp=0.0))
+    tracker.update(_pose_in_box(0.3, 0.3, 0.5, 0.7, timestamp=0.1))
+    # Moving right by 0.1 per frame: the box is shifted by 0.1 and stretched by it
+    np.testing.assert_allclose(tracker.velocity, [1.0, 0.0], atol=1e-5)
+    np.testing.assert_allclose(tracker.roi, [0.3, 0.2, 0.7, 0.8], atol=1e-5)
+
+
+def test_roi_tracker_shifts_boxes_at_the_frame_edge_and_drops_lost_tracks():
+    tracker = RoiTracker(padding=0.25, min_size=0.2)
+    tracker.update(_pose_in_box(0.9, 0.3, 1.0, 0.7, timestamp=0.0))
+    np.testing.assert_allclose(tracker.roi[[0, 2]], [0.8, 1.0], atol=1e-6)
+
+    assert not tracker.update(_pose_in_box(0.4, 0.3, 0.6, 0.7, timestamp=0.1, visibility=0.1))
+    assert not tracker.active
+    tracker.update(_pose_in_box(0.4, 0.3, 0.6, 0.7, timestamp=0.2))
+    assert not tracker.update(None)
+    assert tracker.roi is None
+    with pytest.raises(ValueError):
+        RoiTracker(velocity_smoothing=0.0)
+
+
+def test_crop_to_frame_maps_crop_coordinates_to_the_full_frame():
+    pose = _pose_in_box(0.0, 0.0, 1.0, 1.0, timestamp=0.0)
+    pose.data[:, 2] = 0.4
+    crop_to_frame(pose, (100, 50, 300, 250), (400, 300))
+    np.testing.assert_allclose(pose.data[[0, -1], :2], [[0.25, 250 / 300], [0.75, 50 / 300]], atol=1e-6)
+    np.testing.assert_allclose(pose.data[:, 2], 0.2, atol=1e-6)  # Depth scales with the crop width
+    np.testing.assert_array_equal(pose.visibility, 1.0)
+
+
+def test_complexity_selector_waits_for_a_full_window_and_ignores_spikes():
+    selector = ComplexitySelector(budget_ms=10.0, window=5)
+    assert [selector.observe(20.0) for _ in range(4)] == [2, 2, 2, 2]  # Slow first frames of a fresh model
+    assert selector.observe(20.0) == 1
+    assert selector.latency_ms[2] == 20.0
+
+    for latency in (8.0, 8.0, 50.0, 8.0, 8.0):  # One re-detection spike, median within budget
+        assert selector.observe(latency) == 1
+    assert selector.switches == 1
+
+
+def test_complexity_selector_retries_a_slow_complexity_after_the_interval():
+    selector = ComplexitySelector(budget_ms=10.0, window=5, retry_interval=10)
+    for _ in range(5):
+        selector.observe(20.0)
+    assert selector.complexity == 1
+    # Clear headroom at complexity 1, but complexity 2 was just found too slow
+    assert [selector.observe(3.0) for _ in range(9)] == [1] * 9
+    assert selector.observe(3.0) == 2
+    assert selector.switches == 2
+
+
+def test_complexity_selector_validates_its_configuration():
+    with pytest.raises(ValueError):
+        ComplexitySelector(budget_ms=0)
+    with pytest.raises(ValueError):
+        ComplexitySelector(budget_ms=10.0, min_complexity=2, max_complexity=1)
+    selector = ComplexitySelector(budget_ms=10.0, max_complexity=1, min_complexity=1, window=3)
+    assert [selector.observe(30.0) for _ in range(3)] == [1, 1, 1]  # Nothing lower to fall back to
+
+
+class _HangingCapture:
+    """
+    Camera whose grab() blocks until the capture is released, like a stalled driver.
+    """
+    def __init__(self, *args):
+        self.released = threading.Event()
+
+    def isOpened(self):
+        return True
+
+    def set(self, prop, value):
+        return True
+
+    def get(self, prop):
+        return 0
+
+    def grab(self):
+        self.released.wait(5.0)
+        return False
+
+    def release(self):
+        self.released.set()
+
+
+def test_camera_capture_stop_does_not_hang_on_a_stalled_camera(monkeypatch):
+    monkeypatch.setattr(camera_utils.cv2, 'VideoCapture', _HangingCapture)
+    camera = camera_utils.CameraCapture(0)
+    camera.start()
+    capture, thread = camera.capture, camera.thread
+
+    started = time.monotonic()
+    camera.stop(timeout=0.1)
+    assert time.monotonic() - started < 1.0
+    assert capture.released.is_set() and camera.capture is None
+    thread.join(1.0)
+    assert not thread.is_alive()  # The released capture ends the blocked grab()